@@ -2,36 +2,12 @@
 #
 # Originally forked from the MIT-licensed Stripe Python bindings.
 
+import importlib
 import os
-import sys
 from typing import TYPE_CHECKING, Optional, Union, Callable
 
 from contextvars import ContextVar
 
-if "pkg_resources" not in sys.modules:
-    # workaround for the following:
-    # https://github.com/benoitc/gunicorn/pull/2539
-    sys.modules["pkg_resources"] = object()  # type: ignore[assignment]
-    import aiohttp
-
-    del sys.modules["pkg_resources"]
-
-from apacai.api_resources import (
-    Audio,
-    ChatCompletion,
-    Completion,
-    Customer,
-    Deployment,
-    Edit,
-    Embedding,
-    Engine,
-    ErrorObject,
-    File,
-    FineTune,
-    Image,
-    Model,
-    Moderation,
-)
 from apacai.error import APIError, InvalidRequestError, ApacAIError
 from apacai.version import VERSION
 
@@ -39,6 +15,63 @@ if TYPE_CHECKING:
     import requests
     from aiohttp import ClientSession
 
+    from apacai.api_requestor import aclose_sessions
+    from apacai.api_resources import (
+        Audio,
+        ChatCompletion,
+        Completion,
+        Customer,
+        Deployment,
+        Edit,
+        Embedding,
+        Engine,
+        ErrorObject,
+        File,
+        FineTune,
+        Image,
+        Model,
+        Moderation,
+    )
+    from apacai.caching import EmbeddingCache
+    from apacai.hedging import HedgingPolicy
+    from apacai.hooks import HookRegistry
+    from apacai.rate_limiting import RateLimiter
+    from apacai.streaming import StreamTiming
+
+# Resources and the HTTP transports are imported on first use, so that
+# `import apacai` stays fast; see `__getattr__`.
+_LAZY_ATTRIBUTES = {
+    "Audio": "apacai.api_resources",
+    "ChatCompletion": "apacai.api_resources",
+    "Completion": "apacai.api_resources",
+    "Customer": "apacai.api_resources",
+    "Deployment": "apacai.api_resources",
+    "Edit": "apacai.api_resources",
+    "Embedding": "apacai.api_resources",
+    "Engine": "apacai.api_resources",
+    "ErrorObject": "apacai.api_resources",
+    "File": "apacai.api_resources",
+    "FineTune": "apacai.api_resources",
+    "Image": "apacai.api_resources",
+    "Model": "apacai.api_resources",
+    "Moderation": "apacai.api_resources",
+    "aclose_sessions": "apacai.api_requestor",
+}
+
+# Submodules that used to be loaded by `import apacai`, and so can still be
+# used as attributes without being imported first.
+_LAZY_SUBMODULES = (
+    "apacai_object",
+    "apacai_response",
+    "api_requestor",
+    "api_resources",
+    "datalib",
+    "json_codec",
+    "rate_limiting",
+    "retry",
+    "util",
+)
+
 api_key = os.environ.get("APACAI_API_KEY")
 # Path of a file with an API key, whose contents can change. Supercedes
 # `api_key` if set.  The main use case is volume-mounted Kubernetes secrets,
@@ -59,17 +92,56 @@ enable_telemetry = False  # Ignored; the telemetry feature was removed.
 ca_bundle_path = None  # No longer used, feature was removed
 debug = False
 log = None  # Set to either 'debug' or 'info', controls console logging
+object_format = "object"  # Set to "lazy" or "raw"; see `util.OBJECT_FORMATS`.
+max_retries = 2  # Retries for requests rejected with 429, 503 or 409.
+rate_limiter: Optional["RateLimiter"] = None  # Paces requests; see `rate_limiting`.
+request_hooks: Optional["HookRegistry"] = None  # Request lifecycle callbacks; see `hooks`.
+tracer = None  # An OpenTelemetry tracer, to trace API calls; see `tracing`.
+hedging_policy: Optional["HedgingPolicy"] = None  # Hedges idempotent requests; see `hedging`.
+embedding_cache: Optional["EmbeddingCache"] = None  # See `caching.EmbeddingCache`.
+# Called with the `streaming.StreamTiming` of each streamed response once it ends.
+stream_timing_hook: Optional[Callable[["StreamTiming"], None]] = None
 
 requestssession: Optional[
     Union["requests.Session", Callable[[], "requests.Session"]]
 ] = None # Provide a requests.Session or Session factory.
 
+# Connection pooling for the synchronous `requests` transport. An APIRequestor
+# can override these with its own `api_requestor.RequestsPoolConfig`.
+requests_pool_connections = 10  # Number of per-host connection pools to cache.
+requests_pool_maxsize = 10  # Connections kept open per host.
+requests_pool_block = False  # Wait for a free connection instead of opening extras.
+requests_session_lifetime: Optional[float] = None  # Seconds; None means 180.
+requests_session_idle_timeout: Optional[float] = None  # Recycle sessions idle this long.
+
 aiosession: ContextVar[Optional["ClientSession"]] = ContextVar(
     "aiohttp-session", default=None
 )  # Acts as a global aiohttp ClientSession that reuses connections.
-# This is user-supplied; otherwise, a session is remade for each request.
+# This is user-supplied; otherwise, requests made from the same event loop share
+# a pooled session configured by the connector settings below.
+
+aiohttp_limit = 100  # Total number of simultaneous connections per event loop.
+aiohttp_limit_per_host = 0  # Connections per host; 0 means no limit.
+aiohttp_keepalive_timeout: Optional[float] = 15.0  # Seconds to keep idle connections.
+aiohttp_ttl_dns_cache: Optional[int] = 10  # Seconds to cache DNS; None caches forever.
 
 __version__ = VERSION
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    elif name in _LAZY_SUBMODULES:
+        value = importlib.import_module("%s.%s" % (__name__, name))
+    else:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_LAZY_SUBMODULES))
+
 __all__ = [
     "APIError",
     "Audio",
@@ -88,6 +160,11 @@ __all__ = [
     "Model",
     "Moderation",
     "ApacAIError",
+    "aclose_sessions",
+    "aiohttp_keepalive_timeout",
+    "aiohttp_limit",
+    "aiohttp_limit_per_host",
+    "aiohttp_ttl_dns_cache",
     "api_base",
     "api_key",
     "api_type",
@@ -96,9 +173,22 @@ __all__ = [
     "app_info",
     "ca_bundle_path",
     "debug",
+    "embedding_cache",
     "enable_telemetry",
+    "hedging_policy",
+    "request_hooks",
     "log",
+    "max_retries",
+    "object_format",
     "organization",
     "proxy",
+    "rate_limiter",
+    "requests_pool_block",
+    "requests_pool_connections",
+    "requests_pool_maxsize",
+    "requests_session_idle_timeout",
+    "requests_session_lifetime",
+    "stream_timing_hook",
+    "tracer",
     "verify_ssl_certs",
 ]
@@ -5,11 +5,27 @@ from typing import Optional, Tuple, Union
 import apacai
 from apacai import api_requestor, util
 from apacai.apacai_response import ApacAIResponse
+from apacai.streaming import AsyncStream, Stream
 from apacai.util import ApiType
 
 
 class ApacAIObject(dict):
-    api_base_override = None
+    # Bookkeeping attributes live in slots instead of a per-instance __dict__.
+    # Subclasses declare empty __slots__ to keep it that way. Other private
+    # attributes, which callers may set on objects, go in `_extra_attributes`,
+    # created on first use.
+    __slots__ = (
+        "api_key",
+        "api_version",
+        "api_type",
+        "organization",
+        "api_base_override",
+        "engine",
+        "_response_ms",
+        "_retrieve_params",
+        "_previous",
+        "_extra_attributes",
+    )
 
     def __init__(
         self,
@@ -46,14 +62,28 @@ class ApacAIObject(dict):
         return self._response_ms
 
     def __setattr__(self, k, v):
-        if k[0] == "_" or k in self.__dict__:
+        if k in ApacAIObject.__slots__:
             return super(ApacAIObject, self).__setattr__(k, v)
+        if k[0] == "_":
+            try:
+                return super(ApacAIObject, self).__setattr__(k, v)
+            except AttributeError:
+                # Not a slot or a property: there is no __dict__ to hold it.
+                extra = getattr(self, "_extra_attributes", None)
+                if extra is None:
+                    extra = self._extra_attributes = {}
+                extra[k] = v
+                return None
 
         self[k] = v
         return None
 
     def __getattr__(self, k):
         if k[0] == "_":
+            if k != "_extra_attributes":
+                extra = getattr(self, "_extra_attributes", None)
+                if extra is not None and k in extra:
+                    return extra[k]
             raise AttributeError(k)
         try:
             return self[k]
@@ -61,7 +91,13 @@ class ApacAIObject(dict):
             raise AttributeError(*err.args)
 
     def __delattr__(self, k):
-        if k[0] == "_" or k in self.__dict__:
+        if k in ApacAIObject.__slots__:
+            return super(ApacAIObject, self).__delattr__(k)
+        if k[0] == "_":
+            extra = getattr(self, "_extra_attributes", None)
+            if extra is not None and k in extra:
+                del extra[k]
+                return None
             return super(ApacAIObject, self).__delattr__(k)
         else:
             del self[k]
@@ -147,7 +183,10 @@ class ApacAIObject(dict):
         self.clear()
         for k, v in values.items():
             super(ApacAIObject, self).__setitem__(
-                k, util.convert_to_apacai_object(v, api_key, api_version, organization)
+                k,
+                util.convert_to_apacai_object(
+                    v, api_key, api_version, organization, object_format="object"
+                ),
             )
 
         self._previous = values
@@ -166,6 +205,7 @@ class ApacAIObject(dict):
         plain_old_data=False,
         request_id: Optional[str] = None,
         request_timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        retry_policy=None,
     ):
         if params is None:
             params = self._retrieve_params
@@ -175,6 +215,7 @@ class ApacAIObject(dict):
             api_type=self.api_type,
             api_version=self.api_version,
             organization=self.organization,
+            retry_policy=retry_policy,
         )
         response, stream, api_key = requestor.request(
             method,
@@ -188,15 +229,18 @@ class ApacAIObject(dict):
 
         if stream:
             assert not isinstance(response, ApacAIResponse)  # must be an iterator
-            return (
-                util.convert_to_apacai_object(
-                    line,
-                    api_key,
-                    self.api_version,
-                    self.organization,
-                    plain_old_data=plain_old_data,
-                )
-                for line in response
+            return Stream(
+                (
+                    util.convert_to_apacai_object(
+                        line,
+                        api_key,
+                        self.api_version,
+                        self.organization,
+                        plain_old_data=plain_old_data,
+                    )
+                    for line in response
+                ),
+                response.timing,
             )
         else:
             return util.convert_to_apacai_object(
@@ -217,6 +261,7 @@ class ApacAIObject(dict):
         plain_old_data=False,
         request_id: Optional[str] = None,
         request_timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        retry_policy=None,
     ):
         if params is None:
             params = self._retrieve_params
@@ -226,6 +271,7 @@ class ApacAIObject(dict):
             api_type=self.api_type,
             api_version=self.api_version,
             organization=self.organization,
+            retry_policy=retry_policy,
         )
         response, stream, api_key = await requestor.arequest(
             method,
@@ -239,15 +285,18 @@ class ApacAIObject(dict):
 
         if stream:
             assert not isinstance(response, ApacAIResponse)  # must be an iterator
-            return (
-                util.convert_to_apacai_object(
-                    line,
-                    api_key,
-                    self.api_version,
-                    self.organization,
-                    plain_old_data=plain_old_data,
-                )
-                for line in response
+            return AsyncStream(
+                (
+                    util.convert_to_apacai_object(
+                        line,
+                        api_key,
+                        self.api_version,
+                        self.organization,
+                        plain_old_data=plain_old_data,
+                    )
+                    async for line in response
+                ),
+                response.timing,
             )
         else:
             return util.convert_to_apacai_object(
@@ -345,3 +394,112 @@ class ApacAIObject(dict):
             super(ApacAIObject, copied).__setitem__(k, deepcopy(v, memo))
 
         return copied
+
+
+class LazyApacAIObject(ApacAIObject):
+    """An ApacAIObject that converts nested values on first access.
+
+    The decoded response is kept as is, and a nested dict (or list of dicts) is
+    turned into a LazyApacAIObject the first time it is read, so the parts of a
+    large response that are never touched are never converted. Unlike
+    ApacAIObject, it does not keep a reference to the values it was built from.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def construct_from(
+        cls,
+        values,
+        api_key: Optional[str] = None,
+        api_version=None,
+        organization=None,
+        engine=None,
+        response_ms: Optional[int] = None,
+    ):
+        # refresh_from sets every key, so don't set the id here.
+        instance = cls(engine=engine)
+        instance.refresh_from(
+            values,
+            api_key=api_key,
+            api_version=api_version,
+            organization=organization,
+            response_ms=response_ms,
+        )
+        return instance
+
+    def refresh_from(
+        self,
+        values,
+        api_key=None,
+        api_version=None,
+        api_type=None,
+        organization=None,
+        response_ms: Optional[int] = None,
+    ):
+        self.api_key = api_key or getattr(values, "api_key", None)
+        self.api_version = api_version or getattr(values, "api_version", None)
+        self.api_type = api_type or getattr(values, "api_type", None)
+        self.organization = organization or getattr(values, "organization", None)
+        self._response_ms = response_ms or getattr(values, "_response_ms", None)
+
+        self.clear()
+        dict.update(self, values)
+
+    def _convert(self, k, v):
+        if type(v) is dict:
+            v = util.convert_to_apacai_object(
+                v, self.api_key, self.api_version, self.organization, object_format="lazy"
+            )
+            dict.__setitem__(self, k, v)
+        elif type(v) is list and v and type(v[0]) is dict:
+            # The list belongs to this object, so convert its items in place.
+            for i, item in enumerate(v):
+                if type(item) is dict:
+                    v[i] = util.convert_to_apacai_object(
+                        item,
+                        self.api_key,
+                        self.api_version,
+                        self.organization,
+                        object_format="lazy",
+                    )
+        return v
+
+    def __getitem__(self, k):
+        return self._convert(k, dict.__getitem__(self, k))
+
+    def get(self, k, default=None):
+        if k in self:
+            return self[k]
+        return default
+
+    def pop(self, k, *default):
+        v = dict.pop(self, k, *default)
+        if type(v) is dict:
+            v = util.convert_to_apacai_object(
+                v, self.api_key, self.api_version, self.organization, object_format="lazy"
+            )
+        return v
+
+    def items(self):
+        return [(k, self[k]) for k in self]
+
+    def values(self):
+        return [self[k] for k in self]
+
+
+_lazy_classes = {ApacAIObject: LazyApacAIObject}
+
+
+def lazy_class(klass):
+    """Returns the lazy counterpart of an ApacAIObject subclass."""
+    lazy = _lazy_classes.get(klass)
+    if lazy is None:
+        name = "Lazy" + klass.__name__
+        lazy = type(
+            name, (LazyApacAIObject, klass), {"__module__": __name__, "__slots__": ()}
+        )
+        # Make the class reachable by name so that instances can be pickled.
+        globals()[name] = lazy
+        _lazy_classes[klass] = lazy
+    return lazy
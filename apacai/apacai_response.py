@@ -14,7 +14,7 @@ class ApacAIResponse:
     def retry_after(self) -> Optional[int]:
         try:
             return int(self._headers.get("retry-after"))
-        except TypeError:
+        except (TypeError, ValueError):
             return None
 
     @property
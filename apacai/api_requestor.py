@@ -1,4 +1,7 @@
 import asyncio
+import concurrent.futures
+import contextvars
+import functools
 import json
 import time
 import platform
@@ -6,14 +9,20 @@ import sys
 import threading
 import time
 import warnings
+import weakref
 from contextlib import asynccontextmanager
-from json import JSONDecodeError
 from typing import (
+    TYPE_CHECKING,
+    Any,
     AsyncGenerator,
     AsyncIterator,
+    Awaitable,
     Callable,
     Dict,
+    Iterable,
     Iterator,
+    List,
+    NamedTuple,
     Optional,
     Tuple,
     Union,
@@ -21,8 +30,8 @@ from typing import (
 )
 from urllib.parse import urlencode, urlsplit, urlunsplit
 
-import aiohttp
 import requests
+import urllib3
 
 if sys.version_info >= (3, 8):
     from typing import Literal
@@ -30,17 +39,31 @@ else:
     from typing_extensions import Literal
 
 import apacai
-from apacai import error, util, version
+from apacai import error, hedging, json_codec, retry, sse, tracing, util, version
+from apacai.rate_limiting import RateLimiter
 from apacai.apacai_response import ApacAIResponse
+from apacai.hooks import HookRegistry, RequestInfo
+from apacai.streaming import AsyncStream, Stream, StreamTiming
 from apacai.util import ApiType
 
+if TYPE_CHECKING:
+    import aiohttp
+
 TIMEOUT_SECS = 600
 MAX_SESSION_LIFETIME_SECS = 180
 MAX_CONNECTION_RETRIES = 2
 
-# Has one attribute per thread, 'session'.
+# Has one attribute per thread, 'sessions', which maps each RequestsPoolConfig
+# in use on that thread to its _PooledSession, 'timing', the StreamTiming
+# of the request being sent on that thread, if any, and 'primary', the
+# hedging.PrimaryAttempt of the hedged request being sent on that thread.
 _thread_context = threading.local()
 
+# Pooled aiohttp sessions, keyed by the event loop they are bound to. Each value
+# is a (session, closer) pair; see `_aiohttp_pooled_session`.
+_aiohttp_sessions: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_aiohttp_sessions_lock = threading.Lock()
+
 
 def _build_api_url(url, query):
     scheme, netloc, path, base_query, fragment = urlsplit(url)
@@ -79,7 +102,110 @@ def _aiohttp_proxies_arg(proxy) -> Optional[str]:
         )
 
 
-def _make_session() -> requests.Session:
+class RequestsPoolConfig(NamedTuple):
+    """Connection pool settings for the synchronous `requests` transport.
+
+    `max_lifetime` and `idle_timeout` are in seconds. A `max_lifetime` of None
+    uses `MAX_SESSION_LIFETIME_SECS`; pass `math.inf` to never recycle sessions.
+    An `idle_timeout` of None never recycles a session for being idle.
+    """
+
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+    pool_block: bool = False
+    max_lifetime: Optional[float] = None
+    idle_timeout: Optional[float] = None
+
+
+def _default_pool_config() -> RequestsPoolConfig:
+    return RequestsPoolConfig(
+        pool_connections=apacai.requests_pool_connections,
+        pool_maxsize=apacai.requests_pool_maxsize,
+        pool_block=apacai.requests_pool_block,
+        max_lifetime=apacai.requests_session_lifetime,
+        idle_timeout=apacai.requests_session_idle_timeout,
+    )
+
+
+class _PooledSession:
+    def __init__(self, session: requests.Session, create_time: float):
+        self.session = session
+        self.create_time = create_time
+        self.last_used = create_time
+
+    def expired(self, config: RequestsPoolConfig, now: float) -> bool:
+        max_lifetime = (
+            MAX_SESSION_LIFETIME_SECS
+            if config.max_lifetime is None
+            else config.max_lifetime
+        )
+        if now - self.create_time >= max_lifetime:
+            return True
+        return (
+            config.idle_timeout is not None
+            and now - self.last_used >= config.idle_timeout
+        )
+
+
+def _record_connect(start: float) -> None:
+    timing = getattr(_thread_context, "timing", None)
+    if timing is not None:
+        timing.add_connect(time.monotonic() - start)
+
+
+def _track_connection(connection) -> None:
+    # Lets a hedge that answers first shut down the connection of the attempt
+    # it hedges; raises hedging.Abandoned if that has already happened.
+    primary = getattr(_thread_context, "primary", None)
+    if primary is not None:
+        primary.track(connection)
+
+
+class _TimedHTTPConnection(urllib3.connection.HTTPConnection):
+    def connect(self):
+        start = time.monotonic()
+        super().connect()
+        _record_connect(start)
+        _track_connection(self)
+
+
+class _TimedHTTPSConnection(urllib3.connection.HTTPSConnection):
+    def connect(self):
+        start = time.monotonic()
+        super().connect()
+        _record_connect(start)
+        _track_connection(self)
+
+
+class _TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+    def _make_request(self, conn, *args, **kwargs):
+        _track_connection(conn)
+        return super()._make_request(conn, *args, **kwargs)
+
+
+class _TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+    def _make_request(self, conn, *args, **kwargs):
+        _track_connection(conn)
+        return super()._make_request(conn, *args, **kwargs)
+
+
+class _TimedHTTPAdapter(requests.adapters.HTTPAdapter):
+    """An HTTPAdapter that reports the time spent opening new connections, and
+    the connections used by hedged requests."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def _make_session(config: RequestsPoolConfig) -> requests.Session:
     if apacai.requestssession:
         if isinstance(apacai.requestssession, requests.Session):
             return apacai.requestssession
@@ -90,39 +216,216 @@ def _make_session() -> requests.Session:
     proxies = _requests_proxies_arg(apacai.proxy)
     if proxies:
         s.proxies = proxies
-    s.mount(
-        "https://",
-        requests.adapters.HTTPAdapter(max_retries=MAX_CONNECTION_RETRIES),
+    adapter = _TimedHTTPAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        pool_block=config.pool_block,
+        max_retries=MAX_CONNECTION_RETRIES,
     )
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
     return s
 
 
-def parse_stream_helper(line: bytes) -> Optional[str]:
+def _retire_session(session: requests.Session) -> None:
+    # The user owns the lifecycle of a session they handed us.
+    if session is apacai.requestssession:
+        return
+    # Clearing the pool managers closes idle connections right away, while a
+    # connection still checked out by an unfinished streamed response is only
+    # closed once that response releases it, so in-flight requests drain
+    # instead of failing.
+    session.close()
+
+
+def _thread_session(config: RequestsPoolConfig) -> requests.Session:
+    sessions = getattr(_thread_context, "sessions", None)
+    if sessions is None:
+        sessions = _thread_context.sessions = {}
+
+    now = time.time()
+    pooled = sessions.get(config)
+    if pooled is not None and pooled.expired(config, now):
+        _retire_session(pooled.session)
+        pooled = None
+    if pooled is None:
+        pooled = sessions[config] = _PooledSession(_make_session(config), now)
+    pooled.last_used = now
+    return pooled.session
+
+
+def _file_positions(files) -> Optional[List[Tuple[Any, int]]]:
+    """Returns where each file object of a multipart upload is at, so that a
+    retry can rewind them, or None if one of them can't be rewound."""
+    positions = []
+    for _, value in files.items() if isinstance(files, dict) else files or ():
+        fileobj = value[1] if isinstance(value, tuple) else value
+        if fileobj is None or isinstance(fileobj, (str, bytes, bytearray)):
+            continue
+        seekable = getattr(fileobj, "seekable", None)
+        if seekable is None or not seekable():
+            return None
+        positions.append((fileobj, fileobj.tell()))
+    return positions
+
+
+def _rewind_files(positions: List[Tuple[Any, int]]) -> None:
+    for fileobj, position in positions:
+        fileobj.seek(position)
+
+
+def _import_aiohttp():
+    # aiohttp is imported on first use, so that programs making only
+    # synchronous requests don't load it.
+    if "aiohttp" not in sys.modules and "pkg_resources" not in sys.modules:
+        # workaround for the following:
+        # https://github.com/benoitc/gunicorn/pull/2539
+        sys.modules["pkg_resources"] = object()  # type: ignore[assignment]
+        try:
+            import aiohttp
+        finally:
+            del sys.modules["pkg_resources"]
+    import aiohttp
+
+    return aiohttp
+
+
+async def _on_connection_create_start(session, context, params) -> None:
+    context.connect_start = time.monotonic()
+
+
+async def _on_connection_create_end(session, context, params) -> None:
+    # The StreamTiming of the request is passed as its trace_request_ctx.
+    timing = context.trace_request_ctx
+    if isinstance(timing, StreamTiming):
+        timing.add_connect(time.monotonic() - context.connect_start)
+
+
+def _make_aiohttp_session() -> "aiohttp.ClientSession":
+    aiohttp = _import_aiohttp()
+    connector = aiohttp.TCPConnector(
+        limit=apacai.aiohttp_limit,
+        limit_per_host=apacai.aiohttp_limit_per_host,
+        keepalive_timeout=apacai.aiohttp_keepalive_timeout,
+        ttl_dns_cache=apacai.aiohttp_ttl_dns_cache,
+    )
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_start.append(_on_connection_create_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    return aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
+
+
+async def _close_on_loop_shutdown(
+    session: "aiohttp.ClientSession",
+) -> AsyncGenerator[None, None]:
+    # The event loop finalizes started async generators when it shuts down
+    # (`asyncio.run` does this for us), which gives the pooled session a chance
+    # to close its connections before the loop goes away.
+    try:
+        yield
+    finally:
+        await session.close()
+
+
+async def _aiohttp_pooled_session() -> "aiohttp.ClientSession":
+    loop = asyncio.get_running_loop()
+    with _aiohttp_sessions_lock:
+        entry = _aiohttp_sessions.get(loop)
+    if entry is not None and not entry[0].closed:
+        return entry[0]
+
+    session = _make_aiohttp_session()
+    closer = _close_on_loop_shutdown(session)
+    await closer.__anext__()
+    with _aiohttp_sessions_lock:
+        _aiohttp_sessions[loop] = (session, closer)
+    return session
+
+
+async def aclose_sessions() -> None:
+    """Closes the pooled aiohttp session of the running event loop.
+
+    Sessions are closed automatically when the loop is shut down by
+    `asyncio.run`; call this when managing the loop by hand, or to drop pooled
+    connections early. The next async request opens a fresh session.
+    """
+    with _aiohttp_sessions_lock:
+        entry = _aiohttp_sessions.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[1].aclose()
+
+
+@functools.lru_cache(maxsize=None)
+def _platform_user_agent() -> Dict[str, str]:
+    # Platform details cannot change while the process is running.
+    uname_without_node = " ".join(
+        v for k, v in platform.uname()._asdict().items() if k != "node"
+    )
+    return {
+        "bindings_version": version.VERSION,
+        "httplib": "requests",
+        "lang": "python",
+        "lang_version": platform.python_version(),
+        "platform": platform.platform(),
+        "publisher": "apacai",
+        "uname": uname_without_node,
+    }
+
+
+@functools.lru_cache(maxsize=8)
+def _user_agent_headers(app_info: Optional[str]) -> Dict[str, str]:
+    """Returns the user agent headers for the given JSON-encoded app_info.
+
+    The result is shared between requests and must not be modified.
+    """
+    user_agent = "APACAI/v1 PythonBindings/%s" % (version.VERSION,)
+    ua = dict(_platform_user_agent())
+    if app_info is not None:
+        info = json.loads(app_info)
+        user_agent += " " + APIRequestor.format_app_info(info)
+        ua["application"] = info
+
+    return {
+        "X-APACAI-Client-User-Agent": json.dumps(ua),
+        "User-Agent": user_agent,
+    }
+
+
+def parse_stream_helper(line: bytes) -> Optional[bytes]:
+    """Returns the undecoded payload of a `data:` line, if any."""
     if line:
         if line.strip() == b"data: [DONE]":
             # return here will cause GeneratorExit exception in urllib3
             # and it will close http connection with TCP Reset
             return None
         if line.startswith(b"data: "):
-            line = line[len(b"data: "):]
-            return line.decode("utf-8")
+            return line[len(b"data: "):]
         else:
             return None
     return None
 
 
-def parse_stream(rbody: Iterator[bytes]) -> Iterator[str]:
-    for line in rbody:
-        _line = parse_stream_helper(line)
-        if _line is not None:
-            yield _line
+def parse_stream(rbody: Iterable[bytes]) -> Iterator[bytes]:
+    """Yields the undecoded data of each event in a stream of body chunks."""
+    decoder = sse.SSEDecoder()
+    for chunk in rbody:
+        for data in decoder.feed_data(chunk):
+            if data != b"[DONE]":
+                yield data
+    for event in decoder.flush():
+        if event.data != b"[DONE]":
+            yield event.data
 
 
-async def parse_stream_async(rbody: aiohttp.StreamReader):
-    async for line in rbody:
-        _line = parse_stream_helper(line)
-        if _line is not None:
-            yield _line
+async def parse_stream_async(rbody: "aiohttp.StreamReader"):
+    decoder = sse.SSEDecoder()
+    async for chunk in rbody.iter_any():
+        for data in decoder.feed_data(chunk):
+            if data != b"[DONE]":
+                yield data
+    for event in decoder.flush():
+        if event.data != b"[DONE]":
+            yield event.data
 
 
 class APIRequestor:
@@ -133,6 +436,11 @@ class APIRequestor:
         api_type=None,
         api_version=None,
         organization=None,
+        pool_config: Optional[RequestsPoolConfig] = None,
+        retry_policy: Optional[retry.RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        hooks: Optional[HookRegistry] = None,
+        hedging_policy: Optional[hedging.HedgingPolicy] = None,
     ):
         self.api_base = api_base or apacai.api_base
         self.api_key = key or util.default_api_key()
@@ -143,6 +451,13 @@ class APIRequestor:
         )
         self.api_version = api_version or apacai.api_version
         self.organization = organization or apacai.organization
+        self.pool_config = pool_config
+        self.retry_policy = retry_policy or retry.RetryPolicy()
+        self.rate_limiter = rate_limiter or apacai.rate_limiter
+        self.hooks = hooks or apacai.request_hooks
+        self.hedging_policy = hedging_policy or apacai.hedging_policy
+        # Tokens reserved from the rate limiter for each request sent.
+        self.estimated_tokens = 0
 
     @classmethod
     def format_app_info(cls, info):
@@ -285,18 +600,60 @@ class APIRequestor:
         request_id: Optional[str] = None,
         request_timeout: Optional[Union[float, Tuple[float, float]]] = None,
     ) -> Tuple[Union[ApacAIResponse, Iterator[ApacAIResponse]], bool, str]:
-        result = self.request_raw(
-            method.lower(),
-            url,
-            params=params,
-            supplied_headers=headers,
-            files=files,
-            stream=stream,
-            request_id=request_id,
-            request_timeout=request_timeout,
-        )
-        resp, got_stream = self._interpret_response(result, stream)
-        return resp, got_stream, self.api_key
+        with tracing.span("apacai.request") as span:
+            self.retry_policy.budget.deposit()
+            start = time.monotonic()
+            timing = StreamTiming(url, start) if stream else None
+            self._trace_request(span, method, url, params, stream)
+            info = self._request_info(method, url, params, timing)
+            # Each attempt reads the files it uploads.
+            file_positions = _file_positions(files)
+            attempt = 0
+            while True:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(self.estimated_tokens)
+                if info is not None:
+                    info.attempt = attempt
+                    self.hooks.emit("request_start", info)
+                try:
+                    result = self.request_raw(
+                        method.lower(),
+                        url,
+                        params=params,
+                        supplied_headers=headers,
+                        files=files,
+                        stream=stream,
+                        request_id=request_id,
+                        request_timeout=request_timeout,
+                        timing=timing,
+                    )
+                    span.set_attribute("http.response.status_code", result.status_code)
+                    if info is not None:
+                        info.record_headers(
+                            result.status_code,
+                            result.headers,
+                            result.request.headers if result.request else None,
+                        )
+                        self.hooks.emit("response_headers", info)
+                    resp, got_stream = self._interpret_response(result, stream, timing)
+                    if got_stream:
+                        tracing.trace_stream(resp.timing)
+                    if info is not None:
+                        if got_stream:
+                            resp = Stream(self._hooked_stream(info, resp), resp.timing)
+                        else:
+                            self._complete(info, len(result.content))
+                    return resp, got_stream, self.api_key
+                except Exception as e:
+                    delay = self._retry_delay(
+                        e, attempt, start, info, file_positions is not None
+                    )
+                    if delay is None:
+                        raise
+                    self._trace_retry(span, e, attempt, delay)
+                    _rewind_files(file_positions)
+                time.sleep(delay)
+                attempt += 1
 
     @overload
     async def arequest(
@@ -366,37 +723,203 @@ class APIRequestor:
         request_id: Optional[str] = None,
         request_timeout: Optional[Union[float, Tuple[float, float]]] = None,
     ) -> Tuple[Union[ApacAIResponse, AsyncGenerator[ApacAIResponse, None]], bool, str]:
-        ctx = aiohttp_session()
-        session = await ctx.__aenter__()
-        try:
-            result = await self.arequest_raw(
-                method.lower(),
-                url,
-                session,
-                params=params,
-                supplied_headers=headers,
-                files=files,
-                request_id=request_id,
-                request_timeout=request_timeout,
+        with tracing.span("apacai.request") as span:
+            ctx = aiohttp_session()
+            session = await ctx.__aenter__()
+            self.retry_policy.budget.deposit()
+            start = time.monotonic()
+            timing = StreamTiming(url, start) if stream else None
+            self._trace_request(span, method, url, params, stream)
+            info = self._request_info(method, url, params, timing)
+            # Each attempt reads the files it uploads.
+            file_positions = _file_positions(files)
+            attempt = 0
+            while True:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.aacquire(self.estimated_tokens)
+                if info is not None:
+                    info.attempt = attempt
+                    self.hooks.emit("request_start", info)
+                result = None
+                try:
+                    result = await self.arequest_raw(
+                        method.lower(),
+                        url,
+                        session,
+                        params=params,
+                        supplied_headers=headers,
+                        files=files,
+                        request_id=request_id,
+                        request_timeout=request_timeout,
+                        timing=timing,
+                    )
+                    span.set_attribute("http.response.status_code", result.status)
+                    if info is not None:
+                        info.record_headers(
+                            result.status, result.headers, result.request_info.headers
+                        )
+                        self.hooks.emit("response_headers", info)
+                    resp, got_stream = await self._interpret_async_response(
+                        result, stream, timing
+                    )
+                    break
+                except Exception as e:
+                    # Return the connection to the pool before retrying or
+                    # surfacing the error.
+                    if result is not None:
+                        result.release()
+                    delay = self._retry_delay(
+                        e, attempt, start, info, file_positions is not None
+                    )
+                    if delay is None:
+                        await ctx.__aexit__(None, None, None)
+                        raise
+                    self._trace_retry(span, e, attempt, delay)
+                    _rewind_files(file_positions)
+                await asyncio.sleep(delay)
+                attempt += 1
+            if got_stream:
+                tracing.trace_stream(resp.timing)
+
+                async def wrap_resp():
+                    assert isinstance(resp, AsyncStream)
+                    try:
+                        async for r in resp:
+                            yield r
+                    finally:
+                        # The consumer may stop iterating before the stream is
+                        # exhausted, so release the connection explicitly.
+                        result.release()
+                        await ctx.__aexit__(None, None, None)
+
+                stream_resp = AsyncStream(wrap_resp(), resp.timing)
+                if info is not None:
+                    stream_resp = AsyncStream(
+                        self._ahooked_stream(info, stream_resp), resp.timing
+                    )
+                return stream_resp, got_stream, self.api_key
+            else:
+                await ctx.__aexit__(None, None, None)
+                if info is not None:
+                    self._complete(info, len(await result.read()))
+                return resp, got_stream, self.api_key
+
+    def _retry_delay(
+        self,
+        exc: Exception,
+        attempt: int,
+        start: float,
+        info: Optional[RequestInfo] = None,
+        retryable: bool = True,
+    ) -> Optional[float]:
+        delay = (
+            self.retry_policy.next_delay(exc, attempt, time.monotonic() - start)
+            if retryable
+            else None
+        )
+        if delay is not None:
+            util.log_info(
+                "Retrying request",
+                error=exc,
+                attempt=attempt + 1,
+                delay=round(delay, 3),
+            )
+        if info is not None:
+            info.error = exc
+            if delay is None:
+                info.duration_ms = info.elapsed_ms()
+                self.hooks.emit("error", info)
+            else:
+                info.retry_delay = delay
+                self.hooks.emit("retry", info)
+        return delay
+
+    def _trace_request(self, span, method: str, url: str, params, stream: bool):
+        if span.is_recording():
+            tracing.set_attributes(
+                span,
+                {
+                    "http.request.method": method.upper(),
+                    "url.path": url,
+                    "gen_ai.request.model": params.get("model")
+                    if isinstance(params, dict)
+                    else None,
+                    "apacai.stream": stream,
+                },
             )
-            resp, got_stream = await self._interpret_async_response(result, stream)
-        except Exception:
-            await ctx.__aexit__(None, None, None)
-            raise
-        if got_stream:
 
-            async def wrap_resp():
-                assert isinstance(resp, AsyncGenerator)
-                try:
-                    async for r in resp:
-                        yield r
-                finally:
-                    await ctx.__aexit__(None, None, None)
+    def _trace_retry(self, span, exc: Exception, attempt: int, delay: float):
+        span.set_attribute("apacai.retries", attempt + 1)
+        if span.is_recording():
+            span.add_event(
+                "retry",
+                {
+                    "apacai.attempt": attempt + 1,
+                    "apacai.retry_delay": delay,
+                    "exception.type": type(exc).__name__,
+                },
+            )
 
-            return wrap_resp(), got_stream, self.api_key
+    def _request_info(
+        self, method: str, url: str, params, timing: Optional[StreamTiming]
+    ) -> Optional[RequestInfo]:
+        # Requests are only tracked when there are hooks to call.
+        if self.hooks is None:
+            return None
+        model = params.get("model") if isinstance(params, dict) else None
+        info = RequestInfo(method.lower(), url, model)
+        info.timing = timing
+        return info
+
+    def _complete(self, info: RequestInfo, response_bytes: Optional[int]) -> None:
+        info.error = None
+        info.response_bytes = response_bytes
+        info.duration_ms = info.elapsed_ms()
+        self.hooks.emit("response_complete", info)
+
+    def _end_stream(self, info: RequestInfo, exc: Optional[Exception]) -> None:
+        timing = info.timing
+        if exc is None:
+            self._complete(info, timing.event_bytes)
         else:
-            await ctx.__aexit__(None, None, None)
-            return resp, got_stream, self.api_key
+            info.error = exc
+            info.response_bytes = timing.event_bytes
+            info.duration_ms = info.elapsed_ms()
+            self.hooks.emit("error", info)
+
+    def _hooked_stream(self, info: RequestInfo, stream: Stream) -> Iterator:
+        emit_events = self.hooks.has("stream_event")
+        exc = None
+        try:
+            for event in stream:
+                if emit_events:
+                    info.response_bytes = stream.timing.event_bytes
+                    self.hooks.emit("stream_event", info)
+                yield event
+        except Exception as e:
+            exc = e
+            raise
+        finally:
+            stream.close()
+            self._end_stream(info, exc)
+
+    async def _ahooked_stream(
+        self, info: RequestInfo, stream: AsyncStream
+    ) -> AsyncIterator:
+        emit_events = self.hooks.has("stream_event")
+        exc = None
+        try:
+            async for event in stream:
+                if emit_events:
+                    info.response_bytes = stream.timing.event_bytes
+                    self.hooks.emit("stream_event", info)
+                yield event
+        except Exception as e:
+            exc = e
+            raise
+        finally:
+            await stream.aclose()
+            self._end_stream(info, exc)
 
     def handle_error_response(self, rbody, rcode, resp, rheaders, stream_error=False):
         try:
@@ -466,29 +989,11 @@ class APIRequestor:
     def request_headers(
         self, method: str, extra, request_id: Optional[str]
     ) -> Dict[str, str]:
-        user_agent = "APACAI/v1 PythonBindings/%s" % (version.VERSION,)
-        if apacai.app_info:
-            user_agent += " " + self.format_app_info(apacai.app_info)
-
-        uname_without_node = " ".join(
-            v for k, v in platform.uname()._asdict().items() if k != "node"
+        # app_info is a user-mutable dict, so key the cache on its contents.
+        app_info = (
+            json.dumps(apacai.app_info, sort_keys=True) if apacai.app_info else None
         )
-        ua = {
-            "bindings_version": version.VERSION,
-            "httplib": "requests",
-            "lang": "python",
-            "lang_version": platform.python_version(),
-            "platform": platform.platform(),
-            "publisher": "apacai",
-            "uname": uname_without_node,
-        }
-        if apacai.app_info:
-            ua["application"] = apacai.app_info
-
-        headers = {
-            "X-APACAI-Client-User-Agent": json.dumps(ua),
-            "User-Agent": user_agent,
-        }
+        headers = dict(_user_agent_headers(app_info))
 
         headers.update(util.api_key_to_header(self.api_type, self.api_key))
 
@@ -550,7 +1055,8 @@ class APIRequestor:
             if params and files:
                 data = params
             if params and not files:
-                data = json.dumps(params).encode()
+                with tracing.span("apacai.serialize"):
+                    data = json_codec.dumps(params)
                 headers["Content-Type"] = "application/json"
         else:
             raise error.APIConnectionError(
@@ -559,10 +1065,12 @@ class APIRequestor:
                 "assistance." % (method,)
             )
 
-        headers = self.request_headers(method, headers, request_id)
+        with tracing.span("apacai.headers"):
+            headers = self.request_headers(method, headers, request_id)
 
-        util.log_debug("Request to APACAI API", method=method, path=abs_url)
-        util.log_debug("Post details", data=data, api_version=self.api_version)
+        if util.debug_enabled():
+            util.log_debug("Request to APACAI API", method=method, path=abs_url)
+            util.log_debug("Post details", data=data, api_version=self.api_version)
 
         return abs_url, headers, data
 
@@ -577,45 +1085,67 @@ class APIRequestor:
         stream: bool = False,
         request_id: Optional[str] = None,
         request_timeout: Optional[Union[float, Tuple[float, float]]] = None,
+        timing: Optional[StreamTiming] = None,
     ) -> requests.Response:
         abs_url, headers, data = self._prepare_request_raw(
             url, supplied_headers, method, params, files, request_id
         )
 
-        if not hasattr(_thread_context, "session"):
-            _thread_context.session = _make_session()
-            _thread_context.session_create_time = time.time()
-        elif (
-            time.time() - getattr(_thread_context, "session_create_time", 0)
-            >= MAX_SESSION_LIFETIME_SECS
+        config = self.pool_config or _default_pool_config()
+
+        def send(stream: bool) -> requests.Response:
+            # Looks up the session when called, as hedged requests are sent
+            # from other threads, and so on other connections.
+            session = _thread_session(config)
+            _thread_context.timing = timing
+            try:
+                with tracing.span("apacai.http") as span:
+                    result = session.request(
+                        method,
+                        abs_url,
+                        headers=headers,
+                        data=data,
+                        files=files,
+                        stream=stream,
+                        timeout=request_timeout if request_timeout else TIMEOUT_SECS,
+                        proxies=session.proxies,
+                    )
+                    span.set_attribute(
+                        "http.response.status_code", result.status_code
+                    )
+            except requests.exceptions.Timeout as e:
+                raise error.Timeout("Request timed out: {}".format(e)) from e
+            except requests.exceptions.RequestException as e:
+                raise error.APIConnectionError(
+                    "Error communicating with APACAI: {}".format(e)
+                ) from e
+            finally:
+                _thread_context.timing = None
+            return result
+
+        policy = self.hedging_policy
+        if (
+            policy is not None
+            and not stream
+            and hedging.is_idempotent(method, abs_url, files)
         ):
-            _thread_context.session.close()
-            _thread_context.session = _make_session()
-            _thread_context.session_create_time = time.time()
-        try:
-            result = _thread_context.session.request(
-                method,
-                abs_url,
-                headers=headers,
-                data=data,
-                files=files,
-                stream=stream,
-                timeout=request_timeout if request_timeout else TIMEOUT_SECS,
-                proxies=_thread_context.session.proxies,
+            # Each attempt returns once its headers arrive; the body of the
+            # winner is read by the caller.
+            result = self._hedge(
+                policy, policy.key(method, url), functools.partial(send, True)
+            )
+        else:
+            result = send(stream)
+        if timing is not None:
+            timing.record_headers(result.headers)
+        if util.debug_enabled():
+            util.log_debug(
+                "APACAI API response",
+                path=abs_url,
+                response_code=result.status_code,
+                processing_ms=result.headers.get("APACAI-Processing-Ms"),
+                request_id=result.headers.get("X-Request-Id"),
             )
-        except requests.exceptions.Timeout as e:
-            raise error.Timeout("Request timed out: {}".format(e)) from e
-        except requests.exceptions.RequestException as e:
-            raise error.APIConnectionError(
-                "Error communicating with APACAI: {}".format(e)
-            ) from e
-        util.log_debug(
-            "APACAI API response",
-            path=abs_url,
-            response_code=result.status_code,
-            processing_ms=result.headers.get("APACAI-Processing-Ms"),
-            request_id=result.headers.get("X-Request-Id"),
-        )
         # Don't read the whole stream for debug logging unless necessary.
         if apacai.log == "debug":
             util.log_debug(
@@ -634,7 +1164,9 @@ class APIRequestor:
         files=None,
         request_id: Optional[str] = None,
         request_timeout: Optional[Union[float, Tuple[float, float]]] = None,
-    ) -> aiohttp.ClientResponse:
+        timing: Optional[StreamTiming] = None,
+    ) -> "aiohttp.ClientResponse":
+        aiohttp = _import_aiohttp()
         abs_url, headers, data = self._prepare_request_raw(
             url, supplied_headers, method, params, files, request_id
         )
@@ -664,8 +1196,35 @@ class APIRequestor:
             "proxy": _aiohttp_proxies_arg(apacai.proxy),
             "timeout": timeout,
         }
-        try:
-            result = await session.request(**request_kwargs)
+        if timing is not None:
+            request_kwargs["trace_request_ctx"] = timing
+
+        async def send() -> "aiohttp.ClientResponse":
+            try:
+                with tracing.span("apacai.http") as span:
+                    result = await session.request(**request_kwargs)
+                    span.set_attribute("http.response.status_code", result.status)
+                return result
+            except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+                raise error.Timeout("Request timed out") from e
+            except aiohttp.ClientError as e:
+                raise error.APIConnectionError(
+                    "Error communicating with APACAI"
+                ) from e
+
+        policy = self.hedging_policy
+        # Streamed requests, which are the ones with a timing, aren't hedged.
+        if (
+            policy is not None
+            and timing is None
+            and hedging.is_idempotent(method, abs_url, files)
+        ):
+            result = await self._ahedge(policy, policy.key(method, url), send)
+        else:
+            result = await send()
+        if timing is not None:
+            timing.record_headers(result.headers)
+        if util.info_enabled():
             util.log_info(
                 "APACAI API response",
                 path=abs_url,
@@ -673,69 +1232,180 @@ class APIRequestor:
                 processing_ms=result.headers.get("APACAI-Processing-Ms"),
                 request_id=result.headers.get("X-Request-Id"),
             )
-            # Don't read the whole stream for debug logging unless necessary.
-            if apacai.log == "debug":
-                util.log_debug(
-                    "API response body", body=result.content, headers=result.headers
-                )
+        # Don't read the whole stream for debug logging unless necessary.
+        if apacai.log == "debug":
+            util.log_debug(
+                "API response body", body=result.content, headers=result.headers
+            )
+        return result
+
+    def _hedge(
+        self,
+        policy: hedging.HedgingPolicy,
+        key: Tuple[str, str],
+        send: Callable[[], requests.Response],
+    ) -> requests.Response:
+        """Sends an idempotent request, and sends it again if it is slow.
+
+        The first attempt is sent from this thread and the hedge from one of
+        the hedging threads.
+        """
+        delay = policy.delay(key)
+        start = time.monotonic()
+        if delay is None:
+            try:
+                return send()
+            finally:
+                policy.record(key, time.monotonic() - start)
+
+        primary = hedging.PrimaryAttempt()
+        # The hedge runs in a copy of this context, to keep the current span.
+        context = contextvars.copy_context()
+
+        def hedge_done(hedge: concurrent.futures.Future) -> None:
+            if hedge.exception() is not None:
+                return
+            if not primary.abandon() and primary.state == "finished":
+                hedge.result().close()
+
+        def fire() -> None:
+            if primary.state != "sending" or not policy.allow_hedge(key):
+                return
+            util.log_info("Hedging request", path=key[1], delay=delay)
+            hedge = primary.start_hedge(
+                lambda: hedging.executor().submit(context.run, send)
+            )
+            if hedge is not None:
+                hedge.add_done_callback(hedge_done)
+
+        timer = hedging.call_later(delay, fire)
+        _thread_context.primary = primary
+        try:
+            result = send()
+        except Exception:
+            if primary.end("failed") and primary.hedge is None:
+                raise
+            # Either the hedge answered first, or it may still succeed.
+            return primary.hedge.result()
+        finally:
+            _thread_context.primary = None
+            timer.cancel()
+            # The time of the first attempt alone, so that hedges answering
+            # quickly don't lower the delay of the next ones.
+            policy.record(key, time.monotonic() - start)
+        if primary.end("finished"):
             return result
-        except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
-            raise error.Timeout("Request timed out") from e
-        except aiohttp.ClientError as e:
-            raise error.APIConnectionError("Error communicating with APACAI") from e
+        result.close()
+        return primary.hedge.result()
+
+    async def _ahedge(
+        self,
+        policy: hedging.HedgingPolicy,
+        key: Tuple[str, str],
+        send: Callable[[], Awaitable["aiohttp.ClientResponse"]],
+    ) -> "aiohttp.ClientResponse":
+        """Async version of `APIRequestor._hedge`."""
+        delay = policy.delay(key)
+        start = time.monotonic()
+        if delay is None:
+            try:
+                return await send()
+            finally:
+                policy.record(key, time.monotonic() - start)
+
+        # The second attempt takes another connection from the pool, as the
+        # first one holds its connection until it has its headers.
+        primary = asyncio.ensure_future(send())
+        # The time of the first attempt alone, whether it answers, fails or is
+        # cancelled because the hedge answered first.
+        primary.add_done_callback(
+            lambda _: policy.record(key, time.monotonic() - start)
+        )
+        try:
+            done, _ = await asyncio.wait((primary,), timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        tasks = [primary]
+        if not done and policy.allow_hedge(key):
+            util.log_info("Hedging request", path=key[1], delay=delay)
+            tasks.append(asyncio.ensure_future(send()))
+        return await hedging.afirst_result(
+            tasks, lambda response: response.release()
+        )
 
     def _interpret_response(
-        self, result: requests.Response, stream: bool
+        self,
+        result: requests.Response,
+        stream: bool,
+        timing: Optional[StreamTiming] = None,
     ) -> Tuple[Union[ApacAIResponse, Iterator[ApacAIResponse]], bool]:
         """Returns the response(s) and a bool indicating whether it is a stream."""
         if stream and "text/event-stream" in result.headers.get("Content-Type", ""):
-            return (
-                self._interpret_response_line(
-                    line, result.status_code, result.headers, stream=True
-                )
-                for line in parse_stream(result.iter_lines())
+            if timing is None:
+                timing = StreamTiming()
+            # chunk_size=None hands over the body as it arrives.
+            events = timing.track(parse_stream(result.iter_content(chunk_size=None)))
+            return Stream(
+                (
+                    self._interpret_stream_event(
+                        data, result.status_code, result.headers
+                    )
+                    for data in events
+                ),
+                timing,
             ), True
         else:
-            return (
-                self._interpret_response_line(
-                    result.content.decode("utf-8"),
-                    result.status_code,
-                    result.headers,
-                    stream=False,
-                ),
-                False,
-            )
+            with tracing.span("apacai.read"):
+                return (
+                    self._interpret_response_line(
+                        result.content,
+                        result.status_code,
+                        result.headers,
+                        stream=False,
+                    ),
+                    False,
+                )
 
     async def _interpret_async_response(
-        self, result: aiohttp.ClientResponse, stream: bool
+        self,
+        result: "aiohttp.ClientResponse",
+        stream: bool,
+        timing: Optional[StreamTiming] = None,
     ) -> Tuple[Union[ApacAIResponse, AsyncGenerator[ApacAIResponse, None]], bool]:
         """Returns the response(s) and a bool indicating whether it is a stream."""
         if stream and "text/event-stream" in result.headers.get("Content-Type", ""):
-            return (
-                self._interpret_response_line(
-                    line, result.status, result.headers, stream=True
-                )
-                async for line in parse_stream_async(result.content)
+            if timing is None:
+                timing = StreamTiming()
+            events = timing.atrack(parse_stream_async(result.content))
+            return AsyncStream(
+                (
+                    self._interpret_stream_event(data, result.status, result.headers)
+                    async for data in events
+                ),
+                timing,
             ), True
         else:
-            try:
-                await result.read()
-            except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
-                raise error.Timeout("Request timed out") from e
-            except aiohttp.ClientError as e:
-                util.log_warn(e, body=result.content)
-            return (
-                self._interpret_response_line(
-                    (await result.read()).decode("utf-8"),
-                    result.status,
-                    result.headers,
-                    stream=False,
-                ),
-                False,
-            )
+            aiohttp = _import_aiohttp()
+            with tracing.span("apacai.read"):
+                try:
+                    await result.read()
+                except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+                    raise error.Timeout("Request timed out") from e
+                except aiohttp.ClientError as e:
+                    util.log_warn(e, body=result.content)
+                return (
+                    self._interpret_response_line(
+                        await result.read(),
+                        result.status,
+                        result.headers,
+                        stream=False,
+                    ),
+                    False,
+                )
 
     def _interpret_response_line(
-        self, rbody: str, rcode: int, rheaders, stream: bool
+        self, rbody: Union[bytes, str], rcode: int, rheaders, stream: bool
     ) -> ApacAIResponse:
         # HTTP 204 response code does not have any content in the body.
         if rcode == 204:
@@ -750,10 +1420,12 @@ class APIRequestor:
             )
         try:
             if 'text/plain' in rheaders.get('Content-Type', ''):
-                data = rbody
+                data = rbody.decode("utf-8") if isinstance(rbody, bytes) else rbody
             else:
-                data = json.loads(rbody)
-        except (JSONDecodeError, UnicodeDecodeError) as e:
+                # JSON is decoded straight from the response bytes.
+                data = json_codec.loads(rbody)
+        except ValueError as e:
+            rbody = _decode_body(rbody)
             raise error.APIError(
                 f"HTTP code {rcode} from API ({rbody})", rbody, rcode, headers=rheaders
             ) from e
@@ -763,16 +1435,55 @@ class APIRequestor:
         stream_error = stream and "error" in resp.data
         if stream_error or not 200 <= rcode < 300:
             raise self.handle_error_response(
-                rbody, rcode, resp.data, rheaders, stream_error=stream_error
+                _decode_body(rbody),
+                rcode,
+                resp.data,
+                rheaders,
+                stream_error=stream_error,
+            )
+        return resp
+
+    def _interpret_stream_event(
+        self, data: bytes, rcode: int, rheaders
+    ) -> ApacAIResponse:
+        # The content type of a stream is already known, so only the status
+        # and the event data need checking.
+        if rcode == 503:
+            raise error.ServiceUnavailableError(
+                "The server is overloaded or not ready yet.",
+                data,
+                rcode,
+                headers=rheaders,
+            )
+        try:
+            resp = ApacAIResponse(json_codec.loads(data), rheaders)
+        except ValueError as e:
+            body = _decode_body(data)
+            raise error.APIError(
+                f"HTTP code {rcode} from API ({body})", body, rcode, headers=rheaders
+            ) from e
+        stream_error = "error" in resp.data
+        if stream_error or not 200 <= rcode < 300:
+            raise self.handle_error_response(
+                _decode_body(data),
+                rcode,
+                resp.data,
+                rheaders,
+                stream_error=stream_error,
             )
         return resp
 
 
+def _decode_body(rbody: Union[bytes, str]) -> str:
+    if isinstance(rbody, bytes):
+        return rbody.decode("utf-8", errors="replace")
+    return rbody
+
+
 @asynccontextmanager
-async def aiohttp_session() -> AsyncIterator[aiohttp.ClientSession]:
+async def aiohttp_session() -> AsyncIterator["aiohttp.ClientSession"]:
     user_set_session = apacai.aiosession.get()
     if user_set_session:
         yield user_set_session
     else:
-        async with aiohttp.ClientSession() as session:
-            yield session
+        yield await _aiohttp_pooled_session()
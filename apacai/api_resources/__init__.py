@@ -1,14 +1,50 @@
-from apacai.api_resources.audio import Audio  # noqa: F401
-from apacai.api_resources.chat_completion import ChatCompletion  # noqa: F401
-from apacai.api_resources.completion import Completion  # noqa: F401
-from apacai.api_resources.customer import Customer  # noqa: F401
-from apacai.api_resources.deployment import Deployment  # noqa: F401
-from apacai.api_resources.edit import Edit  # noqa: F401
-from apacai.api_resources.embedding import Embedding  # noqa: F401
-from apacai.api_resources.engine import Engine  # noqa: F401
-from apacai.api_resources.error_object import ErrorObject  # noqa: F401
-from apacai.api_resources.file import File  # noqa: F401
-from apacai.api_resources.fine_tune import FineTune  # noqa: F401
-from apacai.api_resources.image import Image  # noqa: F401
-from apacai.api_resources.model import Model  # noqa: F401
-from apacai.api_resources.moderation import Moderation  # noqa: F401
+# Each resource is imported on first use; see `__getattr__`.
+import importlib
+from typing import TYPE_CHECKING
+
+_RESOURCES = {
+    "Audio": "audio",
+    "ChatCompletion": "chat_completion",
+    "Completion": "completion",
+    "Customer": "customer",
+    "Deployment": "deployment",
+    "Edit": "edit",
+    "Embedding": "embedding",
+    "Engine": "engine",
+    "ErrorObject": "error_object",
+    "File": "file",
+    "FineTune": "fine_tune",
+    "Image": "image",
+    "Model": "model",
+    "Moderation": "moderation",
+}
+
+if TYPE_CHECKING:
+    from apacai.api_resources.audio import Audio  # noqa: F401
+    from apacai.api_resources.chat_completion import ChatCompletion  # noqa: F401
+    from apacai.api_resources.completion import Completion  # noqa: F401
+    from apacai.api_resources.customer import Customer  # noqa: F401
+    from apacai.api_resources.deployment import Deployment  # noqa: F401
+    from apacai.api_resources.edit import Edit  # noqa: F401
+    from apacai.api_resources.embedding import Embedding  # noqa: F401
+    from apacai.api_resources.engine import Engine  # noqa: F401
+    from apacai.api_resources.error_object import ErrorObject  # noqa: F401
+    from apacai.api_resources.file import File  # noqa: F401
+    from apacai.api_resources.fine_tune import FineTune  # noqa: F401
+    from apacai.api_resources.image import Image  # noqa: F401
+    from apacai.api_resources.model import Model  # noqa: F401
+    from apacai.api_resources.moderation import Moderation  # noqa: F401
+
+__all__ = list(_RESOURCES)
+
+
+def __getattr__(name):
+    if name not in _RESOURCES:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    module = importlib.import_module("%s.%s" % (__name__, _RESOURCES[name]))
+    value = globals()[name] = getattr(module, name)
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_RESOURCES))
@@ -1,13 +1,14 @@
 from urllib.parse import quote_plus
 
 import apacai
-from apacai import api_requestor, error, util
+from apacai import api_requestor, error, tracing, util
 from apacai.apacai_object import ApacAIObject
 from apacai.util import ApiType
 from typing import Optional
 
 
 class APIResource(ApacAIObject):
+    __slots__ = ()
     api_prefix = ""
     azure_api_prefix = "apacai"
     azure_deployments_prefix = "deployments"
@@ -27,26 +28,28 @@ class APIResource(ApacAIObject):
         instance = cls(id=id, api_key=api_key, **params)
         return instance.arefresh(request_id=request_id, request_timeout=request_timeout)
 
+    @tracing.traced("retrieve")
     def refresh(self, request_id=None, request_timeout=None):
-        self.refresh_from(
-            self.request(
-                "get",
-                self.instance_url(),
-                request_id=request_id,
-                request_timeout=request_timeout,
-            )
+        response = self.request(
+            "get",
+            self.instance_url(),
+            request_id=request_id,
+            request_timeout=request_timeout,
         )
+        with tracing.span("apacai.convert"):
+            self.refresh_from(response)
         return self
 
+    @tracing.traced("retrieve")
     async def arefresh(self, request_id=None, request_timeout=None):
-        self.refresh_from(
-            await self.arequest(
-                "get",
-                self.instance_url(operation="refresh"),
-                request_id=request_id,
-                request_timeout=request_timeout,
-            )
+        response = await self.arequest(
+            "get",
+            self.instance_url(operation="refresh"),
+            request_id=request_id,
+            request_timeout=request_timeout,
         )
+        with tracing.span("apacai.convert"):
+            self.refresh_from(response)
         return self
 
     @classmethod
@@ -1,9 +1,10 @@
-from apacai import api_requestor, util, error
+from apacai import api_requestor, tracing, util, error
 from apacai.api_resources.abstract.api_resource import APIResource
 from apacai.util import ApiType
 
 
 class CreateableAPIResource(APIResource):
+    __slots__ = ()
     plain_old_data = False
 
     @classmethod
@@ -36,6 +37,7 @@ class CreateableAPIResource(APIResource):
         return requestor, url
 
     @classmethod
+    @tracing.traced("create")
     def create(
         cls,
         api_key=None,
@@ -46,6 +48,7 @@ class CreateableAPIResource(APIResource):
         organization=None,
         **params,
     ):
+        object_format = params.pop("object_format", None)
         requestor, url = cls.__prepare_create_requestor(
             api_key,
             api_base,
@@ -58,15 +61,18 @@ class CreateableAPIResource(APIResource):
             "post", url, params, request_id=request_id
         )
 
-        return util.convert_to_apacai_object(
-            response,
-            api_key,
-            api_version,
-            organization,
-            plain_old_data=cls.plain_old_data,
-        )
+        with tracing.span("apacai.convert"):
+            return util.convert_to_apacai_object(
+                response,
+                api_key,
+                api_version,
+                organization,
+                plain_old_data=cls.plain_old_data,
+                object_format=object_format,
+            )
 
     @classmethod
+    @tracing.traced("create")
     async def acreate(
         cls,
         api_key=None,
@@ -77,6 +83,7 @@ class CreateableAPIResource(APIResource):
         organization=None,
         **params,
     ):
+        object_format = params.pop("object_format", None)
         requestor, url = cls.__prepare_create_requestor(
             api_key,
             api_base,
@@ -89,10 +96,12 @@ class CreateableAPIResource(APIResource):
             "post", url, params, request_id=request_id
         )
 
-        return util.convert_to_apacai_object(
-            response,
-            api_key,
-            api_version,
-            organization,
-            plain_old_data=cls.plain_old_data,
-        )
+        with tracing.span("apacai.convert"):
+            return util.convert_to_apacai_object(
+                response,
+                api_key,
+                api_version,
+                organization,
+                plain_old_data=cls.plain_old_data,
+                object_format=object_format,
+            )
@@ -7,6 +7,8 @@ from apacai.util import ApiType
 
 
 class DeletableAPIResource(APIResource):
+    __slots__ = ()
+
     @classmethod
     def __prepare_delete(cls, sid, api_type=None, api_version=None):
         if isinstance(cls, APIResource):
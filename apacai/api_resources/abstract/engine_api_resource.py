@@ -4,15 +4,18 @@ from typing import Optional
 from urllib.parse import quote_plus
 
 import apacai
-from apacai import api_requestor, error, util
+from apacai import api_requestor, error, tracing, util
 from apacai.api_resources.abstract.api_resource import APIResource
 from apacai.apacai_response import ApacAIResponse
+from apacai.rate_limiting import estimate_tokens
+from apacai.streaming import AsyncStream, Stream
 from apacai.util import ApiType
 
 MAX_TIMEOUT = 20
 
 
 class EngineAPIResource(APIResource):
+    __slots__ = ()
     plain_old_data = False
 
     def __init__(self, engine: Optional[str] = None, **kwargs):
@@ -77,6 +80,8 @@ class EngineAPIResource(APIResource):
         stream = params.get("stream", False)
         headers = params.pop("headers", None)
         request_timeout = params.pop("request_timeout", None)
+        retry_policy = params.pop("retry_policy", None)
+        hedging_policy = params.pop("hedging_policy", None)
         typed_api_type = cls._get_api_type_and_version(api_type=api_type)[0]
         if typed_api_type in (util.ApiType.AZURE, util.ApiType.AZURE_AD):
             if deployment_id is None and engine is None:
@@ -109,7 +114,11 @@ class EngineAPIResource(APIResource):
             api_type=api_type,
             api_version=api_version,
             organization=organization,
+            retry_policy=retry_policy,
+            hedging_policy=hedging_policy,
         )
+        if requestor.rate_limiter is not None:
+            requestor.estimated_tokens = estimate_tokens(params)
         url = cls.class_url(engine, api_type, api_version)
         return (
             deployment_id,
@@ -125,6 +134,7 @@ class EngineAPIResource(APIResource):
         )
 
     @classmethod
+    @tracing.traced("create")
     def create(
         cls,
         api_key=None,
@@ -135,6 +145,7 @@ class EngineAPIResource(APIResource):
         organization=None,
         **params,
     ):
+        object_format = params.pop("object_format", None)
         (
             deployment_id,
             engine,
@@ -163,26 +174,32 @@ class EngineAPIResource(APIResource):
         if stream:
             # must be an iterator
             assert not isinstance(response, ApacAIResponse)
-            return (
-                util.convert_to_apacai_object(
-                    line,
+            return Stream(
+                (
+                    util.convert_to_apacai_object(
+                        line,
+                        api_key,
+                        api_version,
+                        organization,
+                        engine=engine,
+                        plain_old_data=cls.plain_old_data,
+                        object_format=object_format,
+                    )
+                    for line in response
+                ),
+                response.timing,
+            )
+        else:
+            with tracing.span("apacai.convert"):
+                obj = util.convert_to_apacai_object(
+                    response,
                     api_key,
                     api_version,
                     organization,
                     engine=engine,
                     plain_old_data=cls.plain_old_data,
+                    object_format=object_format,
                 )
-                for line in response
-            )
-        else:
-            obj = util.convert_to_apacai_object(
-                response,
-                api_key,
-                api_version,
-                organization,
-                engine=engine,
-                plain_old_data=cls.plain_old_data,
-            )
 
             if timeout is not None:
                 obj.wait(timeout=timeout or None)
@@ -190,6 +207,7 @@ class EngineAPIResource(APIResource):
         return obj
 
     @classmethod
+    @tracing.traced("create")
     async def acreate(
         cls,
         api_key=None,
@@ -200,6 +218,7 @@ class EngineAPIResource(APIResource):
         organization=None,
         **params,
     ):
+        object_format = params.pop("object_format", None)
         (
             deployment_id,
             engine,
@@ -227,26 +246,32 @@ class EngineAPIResource(APIResource):
         if stream:
             # must be an iterator
             assert not isinstance(response, ApacAIResponse)
-            return (
-                util.convert_to_apacai_object(
-                    line,
+            return AsyncStream(
+                (
+                    util.convert_to_apacai_object(
+                        line,
+                        api_key,
+                        api_version,
+                        organization,
+                        engine=engine,
+                        plain_old_data=cls.plain_old_data,
+                        object_format=object_format,
+                    )
+                    async for line in response
+                ),
+                response.timing,
+            )
+        else:
+            with tracing.span("apacai.convert"):
+                obj = util.convert_to_apacai_object(
+                    response,
                     api_key,
                     api_version,
                     organization,
                     engine=engine,
                     plain_old_data=cls.plain_old_data,
+                    object_format=object_format,
                 )
-                async for line in response
-            )
-        else:
-            obj = util.convert_to_apacai_object(
-                response,
-                api_key,
-                api_version,
-                organization,
-                engine=engine,
-                plain_old_data=cls.plain_old_data,
-            )
 
             if timeout is not None:
                 await obj.await_(timeout=timeout or None)
@@ -1,9 +1,12 @@
-from apacai import api_requestor, util, error
+from apacai import api_requestor, tracing, util, error
 from apacai.api_resources.abstract.api_resource import APIResource
+from apacai.apacai_object import ApacAIObject
 from apacai.util import ApiType
 
 
 class ListableAPIResource(APIResource):
+    __slots__ = ()
+
     @classmethod
     def auto_paging_iter(cls, *args, **params):
         return cls.list(*args, **params).auto_paging_iter()
@@ -39,6 +42,7 @@ class ListableAPIResource(APIResource):
         return requestor, url
 
     @classmethod
+    @tracing.traced("list")
     def list(
         cls,
         api_key=None,
@@ -49,6 +53,7 @@ class ListableAPIResource(APIResource):
         api_type=None,
         **params,
     ):
+        object_format = params.pop("object_format", None)
         requestor, url = cls.__prepare_list_requestor(
             api_key,
             api_version,
@@ -60,13 +65,20 @@ class ListableAPIResource(APIResource):
         response, _, api_key = requestor.request(
             "get", url, params, request_id=request_id
         )
-        apacai_object = util.convert_to_apacai_object(
-            response, api_key, api_version, organization
-        )
-        apacai_object._retrieve_params = params
+        with tracing.span("apacai.convert"):
+            apacai_object = util.convert_to_apacai_object(
+                response,
+                api_key,
+                api_version,
+                organization,
+                object_format=object_format,
+            )
+        if isinstance(apacai_object, ApacAIObject):
+            apacai_object._retrieve_params = params
         return apacai_object
 
     @classmethod
+    @tracing.traced("list")
     async def alist(
         cls,
         api_key=None,
@@ -77,6 +89,7 @@ class ListableAPIResource(APIResource):
         api_type=None,
         **params,
     ):
+        object_format = params.pop("object_format", None)
         requestor, url = cls.__prepare_list_requestor(
             api_key,
             api_version,
@@ -88,8 +101,14 @@ class ListableAPIResource(APIResource):
         response, _, api_key = await requestor.arequest(
             "get", url, params, request_id=request_id
         )
-        apacai_object = util.convert_to_apacai_object(
-            response, api_key, api_version, organization
-        )
-        apacai_object._retrieve_params = params
+        with tracing.span("apacai.convert"):
+            apacai_object = util.convert_to_apacai_object(
+                response,
+                api_key,
+                api_version,
+                organization,
+                object_format=object_format,
+            )
+        if isinstance(apacai_object, ApacAIObject):
+            apacai_object._retrieve_params = params
         return apacai_object
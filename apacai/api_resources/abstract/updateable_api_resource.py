@@ -5,6 +5,8 @@ from apacai.api_resources.abstract.api_resource import APIResource
 
 
 class UpdateableAPIResource(APIResource):
+    __slots__ = ()
+
     @classmethod
     def modify(cls, sid, **params):
         url = "%s/%s" % (cls.class_url(), quote_plus(sid))
@@ -6,6 +6,7 @@ from apacai.api_resources.abstract import APIResource
 
 
 class Audio(APIResource):
+    __slots__ = ()
     OBJECT_NAME = "audio"
 
     @classmethod
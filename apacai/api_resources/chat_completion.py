@@ -1,11 +1,9 @@
-import time
-
-from apacai import util
 from apacai.api_resources.abstract.engine_api_resource import EngineAPIResource
-from apacai.error import TryAgain
+from apacai.retry import RetryPolicy
 
 
 class ChatCompletion(EngineAPIResource):
+    __slots__ = ()
     engine_required = False
     OBJECT_NAME = "chat.completions"
 
@@ -17,17 +15,11 @@ class ChatCompletion(EngineAPIResource):
         See https://platform.apacai.com/docs/api-reference/chat/create
         for a list of valid parameters.
         """
-        start = time.time()
         timeout = kwargs.pop("timeout", None)
+        if timeout is not None:
+            kwargs.setdefault("retry_policy", RetryPolicy.for_timeout(timeout))
 
-        while True:
-            try:
-                return super().create(*args, **kwargs)
-            except TryAgain as e:
-                if timeout is not None and time.time() > start + timeout:
-                    raise
-
-                util.log_info("Waiting for model to warm up", error=e)
+        return super().create(*args, **kwargs)
 
     @classmethod
     async def acreate(cls, *args, **kwargs):
@@ -37,14 +29,8 @@ class ChatCompletion(EngineAPIResource):
         See https://platform.apacai.com/docs/api-reference/chat/create
         for a list of valid parameters.
         """
-        start = time.time()
         timeout = kwargs.pop("timeout", None)
+        if timeout is not None:
+            kwargs.setdefault("retry_policy", RetryPolicy.for_timeout(timeout))
 
-        while True:
-            try:
-                return await super().acreate(*args, **kwargs)
-            except TryAgain as e:
-                if timeout is not None and time.time() > start + timeout:
-                    raise
-
-                util.log_info("Waiting for model to warm up", error=e)
+        return await super().acreate(*args, **kwargs)
@@ -1,12 +1,10 @@
-import time
-
-from apacai import util
 from apacai.api_resources.abstract import DeletableAPIResource, ListableAPIResource
 from apacai.api_resources.abstract.engine_api_resource import EngineAPIResource
-from apacai.error import TryAgain
+from apacai.retry import RetryPolicy
 
 
 class Completion(EngineAPIResource):
+    __slots__ = ()
     OBJECT_NAME = "completions"
 
     @classmethod
@@ -17,17 +15,11 @@ class Completion(EngineAPIResource):
         See https://platform.apacai.com/docs/api-reference/completions/create for a list
         of valid parameters.
         """
-        start = time.time()
         timeout = kwargs.pop("timeout", None)
+        if timeout is not None:
+            kwargs.setdefault("retry_policy", RetryPolicy.for_timeout(timeout))
 
-        while True:
-            try:
-                return super().create(*args, **kwargs)
-            except TryAgain as e:
-                if timeout is not None and time.time() > start + timeout:
-                    raise
-
-                util.log_info("Waiting for model to warm up", error=e)
+        return super().create(*args, **kwargs)
 
     @classmethod
     async def acreate(cls, *args, **kwargs):
@@ -37,14 +29,8 @@ class Completion(EngineAPIResource):
         See https://platform.apacai.com/docs/api-reference/completions/create for a list
         of valid parameters.
         """
-        start = time.time()
         timeout = kwargs.pop("timeout", None)
+        if timeout is not None:
+            kwargs.setdefault("retry_policy", RetryPolicy.for_timeout(timeout))
 
-        while True:
-            try:
-                return await super().acreate(*args, **kwargs)
-            except TryAgain as e:
-                if timeout is not None and time.time() > start + timeout:
-                    raise
-
-                util.log_info("Waiting for model to warm up", error=e)
+        return await super().acreate(*args, **kwargs)
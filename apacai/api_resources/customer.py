@@ -2,6 +2,8 @@ from apacai.apacai_object import ApacAIObject
 
 
 class Customer(ApacAIObject):
+    __slots__ = ()
+
     @classmethod
     def get_url(cls, customer, endpoint):
         return f"/customer/{customer}/{endpoint}"
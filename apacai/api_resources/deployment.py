@@ -8,6 +8,7 @@ from apacai.error import InvalidRequestError, APIError
 
 
 class Deployment(CreateableAPIResource, ListableAPIResource, DeletableAPIResource):
+    __slots__ = ()
     OBJECT_NAME = "deployments"
 
     @classmethod
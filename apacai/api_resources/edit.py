@@ -1,11 +1,10 @@
-import time
-
 from apacai import util, error
 from apacai.api_resources.abstract.engine_api_resource import EngineAPIResource
-from apacai.error import TryAgain
+from apacai.retry import RetryPolicy
 
 
 class Edit(EngineAPIResource):
+    __slots__ = ()
     OBJECT_NAME = "edits"
 
     @classmethod
@@ -13,7 +12,6 @@ class Edit(EngineAPIResource):
         """
         Creates a new edit for the provided input, instruction, and parameters.
         """
-        start = time.time()
         timeout = kwargs.pop("timeout", None)
 
         api_type = kwargs.pop("api_type", None)
@@ -23,21 +21,16 @@ class Edit(EngineAPIResource):
                 "This operation is not supported by the Azure APACAI API yet."
             )
 
-        while True:
-            try:
-                return super().create(*args, **kwargs)
-            except TryAgain as e:
-                if timeout is not None and time.time() > start + timeout:
-                    raise
+        if timeout is not None:
+            kwargs.setdefault("retry_policy", RetryPolicy.for_timeout(timeout))
 
-                util.log_info("Waiting for model to warm up", error=e)
+        return super().create(*args, **kwargs)
 
     @classmethod
     async def acreate(cls, *args, **kwargs):
         """
         Creates a new edit for the provided input, instruction, and parameters.
         """
-        start = time.time()
         timeout = kwargs.pop("timeout", None)
 
         api_type = kwargs.pop("api_type", None)
@@ -47,11 +40,7 @@ class Edit(EngineAPIResource):
                 "This operation is not supported by the Azure APACAI API yet."
             )
 
-        while True:
-            try:
-                return await super().acreate(*args, **kwargs)
-            except TryAgain as e:
-                if timeout is not None and time.time() > start + timeout:
-                    raise
+        if timeout is not None:
+            kwargs.setdefault("retry_policy", RetryPolicy.for_timeout(timeout))
 
-                util.log_info("Waiting for model to warm up", error=e)
+        return await super().acreate(*args, **kwargs)
@@ -1,14 +1,46 @@
+import asyncio
 import base64
-import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
+import apacai
 from apacai import util
 from apacai.api_resources.abstract.engine_api_resource import EngineAPIResource
 from apacai.datalib.numpy_helper import assert_has_numpy
 from apacai.datalib.numpy_helper import numpy as np
-from apacai.error import TryAgain
+from apacai.rate_limiting import estimate_tokens
+from apacai.retry import RetryPolicy
+
+# Most inputs the API accepts in a single embeddings request.
+MAX_BATCH_SIZE = 2048
+
+# Arguments that don't change the embeddings returned for an input. All others,
+# such as `dimensions`, are part of the cache key.
+_NOT_CACHE_KEY_ARGS = frozenset(
+    (
+        "input",
+        "model",
+        "engine",
+        "deployment_id",
+        "encoding_format",
+        "api_key",
+        "api_base",
+        "api_type",
+        "api_version",
+        "organization",
+        "request_id",
+        "request_timeout",
+        "headers",
+        "retry_policy",
+        "hedging_policy",
+        "object_format",
+        "user",
+    )
+)
 
 
 class Embedding(EngineAPIResource):
+    __slots__ = ()
     OBJECT_NAME = "embeddings"
 
     @classmethod
@@ -17,39 +49,51 @@ class Embedding(EngineAPIResource):
         Creates a new embedding for the provided input and parameters.
 
         See https://platform.apacai.com/docs/api-reference/embeddings for a list
-        of valid parameters.
+        of valid parameters. With `return_numpy=True`, returns the embeddings as a
+        float32 array of shape (number of inputs, dimensions) instead.
+
+        Text inputs are looked up in `cache` (`apacai.embedding_cache` by default)
+        first, and only the ones that are missing are sent to the API.
         """
-        start = time.time()
         timeout = kwargs.pop("timeout", None)
+        if timeout is not None:
+            kwargs.setdefault("retry_policy", RetryPolicy.for_timeout(timeout))
+
+        return_numpy = kwargs.pop("return_numpy", False)
+        cache = kwargs.pop("cache", apacai.embedding_cache)
+        if cache is not None and cls._cacheable(kwargs):
+            texts, found, misses = cls._cache_lookup(cache, kwargs)
+            response = None
+            if misses:
+                response = super().create(
+                    *args,
+                    **dict(
+                        kwargs, input=misses, encoding_format="base64", object_format="raw"
+                    ),
+                )
+            return cls._cached_result(
+                cache, kwargs, texts, found, misses, response, return_numpy
+            )
 
         user_provided_encoding_format = kwargs.get("encoding_format", None)
 
         # If encoding format was not explicitly specified, we opaquely use base64 for performance
         if not user_provided_encoding_format:
             kwargs["encoding_format"] = "base64"
+        if return_numpy:
+            assert_has_numpy()
+            # The response is only read to fill the array.
+            kwargs["object_format"] = "raw"
 
-        while True:
-            try:
-                response = super().create(*args, **kwargs)
-
-                # If a user specifies base64, we'll just return the encoded string.
-                # This is only for the default case.
-                if not user_provided_encoding_format:
-                    for data in response.data:
-
-                        # If an engine isn't using this optimization, don't do anything
-                        if type(data["embedding"]) == str:
-                            assert_has_numpy()
-                            data["embedding"] = np.frombuffer(
-                                base64.b64decode(data["embedding"]), dtype="float32"
-                            ).tolist()
-
-                return response
-            except TryAgain as e:
-                if timeout is not None and time.time() > start + timeout:
-                    raise
+        response = super().create(*args, **kwargs)
 
-                util.log_info("Waiting for model to warm up", error=e)
+        if return_numpy:
+            return cls._to_numpy(response["data"])
+        # If a user specifies base64, we'll just return the encoded string.
+        # This is only for the default case.
+        if not user_provided_encoding_format:
+            cls._decode_base64(response["data"])
+        return response
 
     @classmethod
     async def acreate(cls, *args, **kwargs):
@@ -57,35 +101,267 @@ class Embedding(EngineAPIResource):
         Creates a new embedding for the provided input and parameters.
 
         See https://platform.apacai.com/docs/api-reference/embeddings for a list
-        of valid parameters.
+        of valid parameters. With `return_numpy=True`, returns the embeddings as a
+        float32 array of shape (number of inputs, dimensions) instead.
+
+        Text inputs are looked up in `cache` (`apacai.embedding_cache` by default)
+        first, and only the ones that are missing are sent to the API.
         """
-        start = time.time()
         timeout = kwargs.pop("timeout", None)
+        if timeout is not None:
+            kwargs.setdefault("retry_policy", RetryPolicy.for_timeout(timeout))
+
+        return_numpy = kwargs.pop("return_numpy", False)
+        cache = kwargs.pop("cache", apacai.embedding_cache)
+        if cache is not None and cls._cacheable(kwargs):
+            texts, found, misses = cls._cache_lookup(cache, kwargs)
+            response = None
+            if misses:
+                response = await super().acreate(
+                    *args,
+                    **dict(
+                        kwargs, input=misses, encoding_format="base64", object_format="raw"
+                    ),
+                )
+            return cls._cached_result(
+                cache, kwargs, texts, found, misses, response, return_numpy
+            )
 
         user_provided_encoding_format = kwargs.get("encoding_format", None)
 
         # If encoding format was not explicitly specified, we opaquely use base64 for performance
         if not user_provided_encoding_format:
             kwargs["encoding_format"] = "base64"
+        if return_numpy:
+            assert_has_numpy()
+            # The response is only read to fill the array.
+            kwargs["object_format"] = "raw"
+
+        response = await super().acreate(*args, **kwargs)
 
-        while True:
+        if return_numpy:
+            return cls._to_numpy(response["data"])
+        # If a user specifies base64, we'll just return the encoded string.
+        # This is only for the default case.
+        if not user_provided_encoding_format:
+            cls._decode_base64(response["data"])
+        return response
+
+    @classmethod
+    def create_many(
+        cls,
+        input,
+        max_batch_size=MAX_BATCH_SIZE,
+        max_batch_tokens=None,
+        max_concurrency=4,
+        **kwargs,
+    ):
+        """
+        Embeds any number of inputs, splitting them into requests of at most
+        `max_batch_size` inputs and, if given, `max_batch_tokens` estimated tokens.
+
+        Up to `max_concurrency` requests are sent at once from a thread pool.
+        Yields `(start, embeddings)` for each batch in input order as soon as it
+        is available, where `embeddings` holds the vectors for
+        `input[start:start + len(embeddings)]` (a float32 array when
+        `return_numpy=True`). Each batch is retried on its own according to
+        `retry_policy`; if it still fails, the error is raised and the batches
+        that have not started are cancelled.
+        """
+        batches = cls._split_input(input, max_batch_size, max_batch_tokens)
+        with ThreadPoolExecutor(max_concurrency) as pool:
+            pending = deque()
             try:
-                response = await super().acreate(*args, **kwargs)
+                for start, batch in batches:
+                    pending.append(
+                        (start, pool.submit(cls._create_batch, batch, kwargs))
+                    )
+                    if len(pending) >= max_concurrency:
+                        start, future = pending.popleft()
+                        yield start, future.result()
+                while pending:
+                    start, future = pending.popleft()
+                    yield start, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    @classmethod
+    async def acreate_many(
+        cls,
+        input,
+        max_batch_size=MAX_BATCH_SIZE,
+        max_batch_tokens=None,
+        max_concurrency=4,
+        **kwargs,
+    ):
+        """
+        Embeds any number of inputs, splitting them into requests of at most
+        `max_batch_size` inputs and, if given, `max_batch_tokens` estimated tokens.
+
+        Up to `max_concurrency` requests are in flight at once. Yields
+        `(start, embeddings)` for each batch in input order, like `create_many`.
+        """
+        batches = cls._split_input(input, max_batch_size, max_batch_tokens)
+        pending = deque()
+        try:
+            for start, batch in batches:
+                pending.append(
+                    (start, asyncio.ensure_future(cls._acreate_batch(batch, kwargs)))
+                )
+                if len(pending) >= max_concurrency:
+                    start, task = pending.popleft()
+                    yield start, await task
+            while pending:
+                start, task = pending.popleft()
+                yield start, await task
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    @staticmethod
+    def _split_input(input, max_batch_size, max_batch_tokens):
+        # A single string or list of tokens is one input; anything else is an
+        # iterable of inputs.
+        if isinstance(input, str) or (
+            isinstance(input, list) and input and isinstance(input[0], int)
+        ):
+            input = [input]
+        batch = []
+        batch_start = batch_tokens = 0
+        for i, item in enumerate(input):
+            tokens = estimate_tokens({"input": item}) if max_batch_tokens else 0
+            if batch and (
+                len(batch) >= max_batch_size
+                or (max_batch_tokens and batch_tokens + tokens > max_batch_tokens)
+            ):
+                yield batch_start, batch
+                batch = []
+                batch_start, batch_tokens = i, 0
+            batch.append(item)
+            batch_tokens += tokens
+        if batch:
+            yield batch_start, batch
+
+    @classmethod
+    def _create_batch(cls, batch, kwargs):
+        response = cls.create(**dict(kwargs, input=batch, object_format="raw"))
+        return cls._batch_embeddings(response)
+
+    @classmethod
+    async def _acreate_batch(cls, batch, kwargs):
+        response = await cls.acreate(
+            **dict(kwargs, input=batch, object_format="raw")
+        )
+        return cls._batch_embeddings(response)
+
+    @staticmethod
+    def _batch_embeddings(response):
+        if isinstance(response, dict):
+            data = sorted(response["data"], key=lambda item: item["index"])
+            return [item["embedding"] for item in data]
+        # Already an array from return_numpy=True.
+        return response
+
+    @staticmethod
+    def _cache_model(kwargs):
+        return kwargs.get("model") or kwargs.get("engine") or kwargs.get("deployment_id")
+
+    @classmethod
+    def _cache_namespace(cls, kwargs):
+        # Embeddings are cached per server and per set of options, as well as
+        # per model.
+        options = sorted(
+            (k, v) for k, v in kwargs.items() if k not in _NOT_CACHE_KEY_ARGS
+        )
+        return "%s\0%s\0%s\0%r" % (
+            cls._cache_model(kwargs),
+            kwargs.get("api_type") or apacai.api_type,
+            kwargs.get("api_base") or apacai.api_base,
+            options,
+        )
+
+    @classmethod
+    def _cacheable(cls, kwargs):
+        input = kwargs.get("input")
+        if isinstance(input, str):
+            input = [input]
+        return (
+            bool(input)
+            and isinstance(input, list)
+            and all(isinstance(text, str) for text in input)
+            and kwargs.get("encoding_format") in (None, "float")
+            and cls._cache_model(kwargs) is not None
+        )
+
+    @classmethod
+    def _cache_lookup(cls, cache, kwargs):
+        texts = kwargs["input"]
+        if isinstance(texts, str):
+            texts = [texts]
+        found = cache.get_many(cls._cache_namespace(kwargs), texts)
+        # Each missing text is requested once, even if it is repeated.
+        misses = list(dict.fromkeys(t for t, v in zip(texts, found) if v is None))
+        return texts, found, misses
+
+    @classmethod
+    def _cached_result(cls, cache, kwargs, texts, found, misses, response, return_numpy):
+        model = cls._cache_model(kwargs)
+        usage = {"prompt_tokens": 0, "total_tokens": 0}
+        if response is not None:
+            vectors = cls._to_numpy(response["data"])
+            cache.set_many(cls._cache_namespace(kwargs), misses, vectors)
+            fetched = dict(zip(misses, vectors))
+            found = [fetched[t] if v is None else v for t, v in zip(texts, found)]
+            model = response.get("model", model)
+            usage = response.get("usage", usage)
 
-                # If a user specifies base64, we'll just return the encoded string.
-                # This is only for the default case.
-                if not user_provided_encoding_format:
-                    for data in response.data:
+        if return_numpy:
+            return np.stack(found).astype("float32", copy=False)
+        response = {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": vector.tolist()}
+                for i, vector in enumerate(found)
+            ],
+            "model": model,
+            # Only the inputs that were not cached count towards the usage.
+            "usage": usage,
+        }
+        return util.convert_to_apacai_object(
+            response,
+            kwargs.get("api_key"),
+            kwargs.get("api_version"),
+            kwargs.get("organization"),
+            object_format=kwargs.get("object_format"),
+        )
 
-                        # If an engine isn't using this optimization, don't do anything
-                        if type(data["embedding"]) == str:
-                            data["embedding"] = np.frombuffer(
-                                base64.b64decode(data["embedding"]), dtype="float32"
-                            ).tolist()
+    @staticmethod
+    def _decode_base64(data):
+        for item in data:
+            # If an engine isn't using this optimization, don't do anything
+            if type(item["embedding"]) == str:
+                assert_has_numpy()
+                item["embedding"] = np.frombuffer(
+                    base64.b64decode(item["embedding"]), dtype="float32"
+                ).tolist()
 
-                return response
-            except TryAgain as e:
-                if timeout is not None and time.time() > start + timeout:
-                    raise
+    @staticmethod
+    def _to_numpy(data):
+        if not data:
+            return np.empty((0, 0), dtype="float32")
+        first = data[0]["embedding"]
+        if type(first) == str:
+            dim = len(base64.b64decode(first)) // 4
+        else:
+            dim = len(first)
 
-                util.log_info("Waiting for model to warm up", error=e)
+        # Rows are written straight into one preallocated buffer, in the order
+        # of the inputs.
+        matrix = np.empty((len(data), dim), dtype="float32")
+        for i, item in enumerate(data):
+            embedding = item["embedding"]
+            if type(embedding) == str:
+                embedding = np.frombuffer(base64.b64decode(embedding), dtype="float32")
+            matrix[item.get("index", i)] = embedding
+        return matrix
@@ -1,47 +1,34 @@
-import time
 import warnings
 
-from apacai import util
 from apacai.api_resources.abstract import ListableAPIResource, UpdateableAPIResource
-from apacai.error import TryAgain
+from apacai.retry import RetryPolicy
 
 
 class Engine(ListableAPIResource, UpdateableAPIResource):
+    __slots__ = ()
     OBJECT_NAME = "engines"
 
     def generate(self, timeout=None, **params):
-        start = time.time()
-        while True:
-            try:
-                return self.request(
-                    "post",
-                    self.instance_url() + "/generate",
-                    params,
-                    stream=params.get("stream"),
-                    plain_old_data=True,
-                )
-            except TryAgain as e:
-                if timeout is not None and time.time() > start + timeout:
-                    raise
-
-                util.log_info("Waiting for model to warm up", error=e)
+        retry_policy = RetryPolicy.for_timeout(timeout) if timeout is not None else None
+        return self.request(
+            "post",
+            self.instance_url() + "/generate",
+            params,
+            stream=params.get("stream"),
+            plain_old_data=True,
+            retry_policy=retry_policy,
+        )
 
     async def agenerate(self, timeout=None, **params):
-        start = time.time()
-        while True:
-            try:
-                return await self.arequest(
-                    "post",
-                    self.instance_url() + "/generate",
-                    params,
-                    stream=params.get("stream"),
-                    plain_old_data=True,
-                )
-            except TryAgain as e:
-                if timeout is not None and time.time() > start + timeout:
-                    raise
-
-                util.log_info("Waiting for model to warm up", error=e)
+        retry_policy = RetryPolicy.for_timeout(timeout) if timeout is not None else None
+        return await self.arequest(
+            "post",
+            self.instance_url() + "/generate",
+            params,
+            stream=params.get("stream"),
+            plain_old_data=True,
+            retry_policy=retry_policy,
+        )
 
     def embeddings(self, **params):
         warnings.warn(
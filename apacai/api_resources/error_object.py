@@ -5,6 +5,8 @@ from apacai.util import merge_dicts
 
 
 class ErrorObject(ApacAIObject):
+    __slots__ = ()
+
     def refresh_from(
         self,
         values,
@@ -8,4 +8,5 @@ from apacai.api_resources.abstract import (
 class CompletionConfig(
     CreateableAPIResource, ListableAPIResource, DeletableAPIResource
 ):
+    __slots__ = ()
     OBJECT_NAME = "experimental.completion_configs"
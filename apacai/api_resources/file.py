@@ -1,14 +1,13 @@
-import json
 import os
-from typing import cast
 
 import apacai
-from apacai import api_requestor, util, error
+from apacai import api_requestor, json_codec, tracing, util, error
 from apacai.api_resources.abstract import DeletableAPIResource, ListableAPIResource
 from apacai.util import ApiType
 
 
 class File(ListableAPIResource, DeletableAPIResource):
+    __slots__ = ()
     OBJECT_NAME = "files"
 
     @classmethod
@@ -58,6 +57,7 @@ class File(ListableAPIResource, DeletableAPIResource):
         return requestor, url, files
 
     @classmethod
+    @tracing.traced("create")
     def create(
         cls,
         file,
@@ -82,11 +82,13 @@ class File(ListableAPIResource, DeletableAPIResource):
             user_provided_filename,
         )
         response, _, api_key = requestor.request("post", url, files=files)
-        return util.convert_to_apacai_object(
-            response, api_key, api_version, organization
-        )
+        with tracing.span("apacai.convert"):
+            return util.convert_to_apacai_object(
+                response, api_key, api_version, organization
+            )
 
     @classmethod
+    @tracing.traced("create")
     async def acreate(
         cls,
         file,
@@ -111,9 +113,10 @@ class File(ListableAPIResource, DeletableAPIResource):
             user_provided_filename,
         )
         response, _, api_key = await requestor.arequest("post", url, files=files)
-        return util.convert_to_apacai_object(
-            response, api_key, api_version, organization
-        )
+        with tracing.span("apacai.convert"):
+            return util.convert_to_apacai_object(
+                response, api_key, api_version, organization
+            )
 
     @classmethod
     def __prepare_file_download(
@@ -147,6 +150,7 @@ class File(ListableAPIResource, DeletableAPIResource):
         return requestor, url
 
     @classmethod
+    @tracing.traced("download")
     def download(
         cls,
         id,
@@ -165,13 +169,14 @@ class File(ListableAPIResource, DeletableAPIResource):
             raise requestor.handle_error_response(
                 result.content,
                 result.status_code,
-                json.loads(cast(bytes, result.content)),
+                json_codec.loads(result.content),
                 result.headers,
                 stream_error=False,
             )
         return result.content
 
     @classmethod
+    @tracing.traced("download")
     async def adownload(
         cls,
         id,
@@ -187,15 +192,17 @@ class File(ListableAPIResource, DeletableAPIResource):
 
         async with api_requestor.aiohttp_session() as session:
             result = await requestor.arequest_raw("get", url, session)
+            # Read the whole body so the connection goes back to the pool.
+            content = await result.read()
             if not 200 <= result.status < 300:
                 raise requestor.handle_error_response(
-                    result.content,
+                    content,
                     result.status,
-                    json.loads(cast(bytes, result.content)),
+                    json_codec.loads(content),
                     result.headers,
                     stream_error=False,
                 )
-            return result.content
+            return content
 
     @classmethod
     def __find_matching_files(cls, name, bytes, all_files, purpose):
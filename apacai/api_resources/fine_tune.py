@@ -8,11 +8,13 @@ from apacai.api_resources.abstract import (
 )
 from apacai.api_resources.abstract.deletable_api_resource import DeletableAPIResource
 from apacai.apacai_response import ApacAIResponse
+from apacai.streaming import AsyncStream, Stream
 from apacai.util import ApiType
 
 
 @nested_resource_class_methods("event", operations=["list"])
 class FineTune(ListableAPIResource, CreateableAPIResource, DeletableAPIResource):
+    __slots__ = ()
     OBJECT_NAME = "fine-tunes"
 
     @classmethod
@@ -155,14 +157,17 @@ class FineTune(ListableAPIResource, CreateableAPIResource, DeletableAPIResource)
         )
 
         assert not isinstance(response, ApacAIResponse)  # must be an iterator
-        return (
-            util.convert_to_apacai_object(
-                line,
-                api_key,
-                api_version,
-                organization,
-            )
-            for line in response
+        return Stream(
+            (
+                util.convert_to_apacai_object(
+                    line,
+                    api_key,
+                    api_version,
+                    organization,
+                )
+                for line in response
+            ),
+            response.timing,
         )
 
     @classmethod
@@ -193,12 +198,15 @@ class FineTune(ListableAPIResource, CreateableAPIResource, DeletableAPIResource)
         )
 
         assert not isinstance(response, ApacAIResponse)  # must be an iterator
-        return (
-            util.convert_to_apacai_object(
-                line,
-                api_key,
-                api_version,
-                organization,
-            )
-            async for line in response
+        return AsyncStream(
+            (
+                util.convert_to_apacai_object(
+                    line,
+                    api_key,
+                    api_version,
+                    organization,
+                )
+                async for line in response
+            ),
+            response.timing,
         )
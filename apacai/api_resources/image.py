@@ -7,6 +7,7 @@ from apacai.api_resources.abstract import APIResource
 
 
 class Image(APIResource):
+    __slots__ = ()
     OBJECT_NAME = "images"
 
     @classmethod
@@ -2,4 +2,5 @@ from apacai.api_resources.abstract import DeletableAPIResource, ListableAPIResou
 
 
 class Model(ListableAPIResource, DeletableAPIResource):
+    __slots__ = ()
     OBJECT_NAME = "models"
@@ -4,6 +4,7 @@ from apacai.apacai_object import ApacAIObject
 
 
 class Moderation(ApacAIObject):
+    __slots__ = ()
     VALID_MODEL_NAMES: List[str] = ["text-moderation-stable", "text-moderation-latest"]
 
     @classmethod
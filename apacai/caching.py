@@ -0,0 +1,202 @@
+"""
+Caching of embeddings, so that texts seen before are not sent to the API again.
+
+Set `apacai.embedding_cache` to an `EmbeddingCache`, or pass `cache=` to
+`Embedding.create`, and only the inputs that are not cached are embedded.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from apacai.datalib.numpy_helper import assert_has_numpy
+from apacai.datalib.numpy_helper import numpy as np
+
+# Keeps SQLite statements under its limit on the number of parameters.
+_SQL_BATCH_SIZE = 500
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(("%s\0%s" % (model, text)).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Caches float32 embeddings by model and input text.
+
+    `model` can be any string that identifies how the embeddings were made;
+    `Embedding.create` also puts the API base and the request's options in it.
+
+    The most recently used `max_items` embeddings are kept in memory. If `path`
+    is given, embeddings are also stored in a SQLite database there, which can
+    be shared by the threads and processes of a host; the least recently used
+    rows are removed once it holds more than `max_disk_bytes` of vectors.
+    Entries older than `ttl` seconds are treated as missing.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_items: int = 100_000,
+        max_disk_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        assert_has_numpy()
+        self.path = path
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if path is not None:
+            self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections can't be shared across threads or forks.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+                "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def _remember(self, key: str, vector, stored_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (vector, stored_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[Any]]:
+        """Returns the cached embedding of each text, or None where there is none."""
+        now = time.time()
+        keys = [cache_key(model, text) for text in texts]
+        found: List[Optional[Any]] = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._memory.get(key)
+                if entry is not None and not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    found[i] = entry[0]
+                else:
+                    missing.append(i)
+
+        if missing and self.path is not None:
+            rows = self._disk_get({keys[i] for i in missing}, now)
+            still_missing = []
+            for i in missing:
+                row = rows.get(keys[i])
+                if row is None:
+                    still_missing.append(i)
+                    continue
+                vector = np.frombuffer(row[0], dtype="float32")
+                found[i] = vector
+                self._remember(keys[i], vector, row[1])
+            missing = still_missing
+
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return found
+
+    def _disk_get(self, keys, now: float) -> Dict[str, Any]:
+        conn = self._connection()
+        oldest = now - self.ttl if self.ttl is not None else 0.0
+        keys = list(keys)
+        rows = {}
+        for start in range(0, len(keys), _SQL_BATCH_SIZE):
+            batch = keys[start : start + _SQL_BATCH_SIZE]
+            marks = ",".join("?" * len(batch))
+            for key, vector, stored_at in conn.execute(
+                "SELECT key, vector, stored_at FROM embeddings "
+                "WHERE key IN (%s) AND stored_at >= ?" % marks,
+                (*batch, oldest),
+            ):
+                rows[key] = (vector, stored_at)
+        hits = list(rows)
+        for start in range(0, len(hits), _SQL_BATCH_SIZE):
+            batch = hits[start : start + _SQL_BATCH_SIZE]
+            conn.execute(
+                "UPDATE embeddings SET accessed_at = ? WHERE key IN (%s)"
+                % ",".join("?" * len(batch)),
+                (now, *batch),
+            )
+        return rows
+
+    def set_many(self, model: str, texts: Sequence[str], vectors) -> None:
+        """Stores the embedding of each text."""
+        now = time.time()
+        entries = []
+        for text, vector in zip(texts, vectors):
+            # Copy rows so that cached vectors don't keep a whole matrix alive.
+            vector = np.array(vector, dtype="float32")
+            key = cache_key(model, text)
+            self._remember(key, vector, now)
+            entries.append((key, vector.tobytes(), now, now))
+
+        if self.path is not None and entries:
+            conn = self._connection()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", entries
+                )
+                self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl is not None:
+            conn.execute("DELETE FROM embeddings WHERE stored_at < ?", (now - self.ttl,))
+        if self.max_disk_bytes is None:
+            return
+        (size,) = conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        if size <= self.max_disk_bytes:
+            return
+        evict = []
+        for key, length in conn.execute(
+            "SELECT key, LENGTH(vector) FROM embeddings ORDER BY accessed_at"
+        ):
+            evict.append(key)
+            size -= length
+            if size <= self.max_disk_bytes:
+                break
+        for start in range(0, len(evict), _SQL_BATCH_SIZE):
+            batch = evict[start : start + _SQL_BATCH_SIZE]
+            conn.execute(
+                "DELETE FROM embeddings WHERE key IN (%s)" % ",".join("?" * len(batch)),
+                batch,
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.misses = 0
+        if self.path is not None:
+            self._connection().execute("DELETE FROM embeddings")
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit and miss counts for this cache object."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_items": len(self._memory),
+            }
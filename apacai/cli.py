@@ -8,6 +8,7 @@ from typing import Optional
 import requests
 
 import apacai
+from apacai.streaming import StreamAccumulator
 from apacai.upload_progress import BufferReader
 from apacai.validators import (
     apply_necessary_remediation,
@@ -108,6 +109,13 @@ class Engine:
         display(engines)
 
 
+def _write_stream(chunks):
+    accumulator = StreamAccumulator()
+    for _, text in accumulator.consume(chunks):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
 class ChatCompletion:
     @classmethod
     def create(cls, args):
@@ -132,24 +140,21 @@ class ChatCompletion:
             top_p=args.top_p,
             stop=args.stop,
             stream=args.stream,
+            # Streamed chunks are merged as plain dicts.
+            object_format="raw" if args.stream else None,
         )
-        if not args.stream:
-            resp = [resp]
+        if args.stream:
+            _write_stream(resp)
+            return
 
-        for part in resp:
-            choices = part["choices"]
-            for c_idx, c in enumerate(sorted(choices, key=lambda s: s["index"])):
-                if len(choices) > 1:
-                    sys.stdout.write("===== Chat Completion {} =====\n".format(c_idx))
-                if args.stream:
-                    delta = c["delta"]
-                    if "content" in delta:
-                        sys.stdout.write(delta["content"])
-                else:
-                    sys.stdout.write(c["message"]["content"])
-                    if len(choices) > 1:  # not in streams
-                        sys.stdout.write("\n")
-                sys.stdout.flush()
+        choices = resp["choices"]
+        for c_idx, c in enumerate(sorted(choices, key=lambda s: s["index"])):
+            if len(choices) > 1:
+                sys.stdout.write("===== Chat Completion {} =====\n".format(c_idx))
+            sys.stdout.write(c["message"]["content"])
+            if len(choices) > 1:
+                sys.stdout.write("\n")
+            sys.stdout.flush()
 
 
 class Completion:
@@ -175,19 +180,20 @@ class Completion:
             top_p=args.top_p,
             stop=args.stop,
             echo=True,
+            object_format="raw" if args.stream else None,
         )
-        if not args.stream:
-            resp = [resp]
+        if args.stream:
+            _write_stream(resp)
+            return
 
-        for part in resp:
-            choices = part["choices"]
-            for c_idx, c in enumerate(sorted(choices, key=lambda s: s["index"])):
-                if len(choices) > 1:
-                    sys.stdout.write("===== Completion {} =====\n".format(c_idx))
-                sys.stdout.write(c["text"])
-                if len(choices) > 1:
-                    sys.stdout.write("\n")
-                sys.stdout.flush()
+        choices = resp["choices"]
+        for c_idx, c in enumerate(sorted(choices, key=lambda s: s["index"])):
+            if len(choices) > 1:
+                sys.stdout.write("===== Completion {} =====\n".format(c_idx))
+            sys.stdout.write(c["text"])
+            if len(choices) > 1:
+                sys.stdout.write("\n")
+            sys.stdout.flush()
 
 
 class Deployment:
@@ -0,0 +1,399 @@
+"""
+In-process vector indexes for semantic search over embeddings.
+
+`FlatIndex` compares each query with every vector. `IVFIndex` partitions the
+vectors with k-means and only searches the partitions closest to each query,
+trading a little recall for much faster queries on large collections. Both rank
+vectors by cosine distance, take the float32 arrays returned by
+`Embedding.create(..., return_numpy=True)`, and can be saved to a directory and
+loaded back with the vectors memory-mapped.
+"""
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from apacai.datalib.numpy_helper import assert_has_numpy
+from apacai.datalib.numpy_helper import numpy as np
+
+# Largest number of query-vector similarities computed at once.
+MAX_CHUNK_ELEMENTS = 2 ** 24
+
+# Vectors per partition that an `IVFIndex` waits for before training itself.
+TRAIN_VECTORS_PER_LIST = 32
+
+
+def top_k(distances, k: int) -> "np.ndarray":
+    """Return the indices of the `k` smallest distances, nearest first.
+
+    Works along the last axis, so a (q, n) array gives a (q, k) array. Uses
+    `np.argpartition` and only sorts the `k` selected distances.
+    """
+    distances = np.asarray(distances)
+    if k >= distances.shape[-1]:
+        return np.argsort(distances, axis=-1)
+    indices = np.argpartition(distances, k - 1, axis=-1)[..., :k]
+    order = np.argsort(np.take_along_axis(distances, indices, axis=-1), axis=-1)
+    return np.take_along_axis(indices, order, axis=-1)
+
+
+def _normalize(vectors) -> "np.ndarray":
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    vectors /= norms
+    return vectors
+
+
+def _filter_mask(ids, filter) -> Optional["np.ndarray"]:
+    if filter is None:
+        return None
+    if callable(filter):
+        return np.asarray(filter(ids), dtype=bool)
+    return np.isin(ids, np.fromiter(filter, dtype=np.int64))
+
+
+def _pad(ids, distances, k: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    # Fewer than k matches are padded with id -1 at an infinite distance.
+    missing = k - ids.shape[-1]
+    if missing > 0:
+        ids = np.pad(ids, [(0, 0), (0, missing)], constant_values=-1)
+        distances = np.pad(
+            distances, [(0, 0), (0, missing)], constant_values=np.inf
+        )
+    ids[np.isinf(distances)] = -1
+    return ids, distances
+
+
+class _VectorIndex:
+    """Storage shared by the indexes: vectors, their ids, and extra columns."""
+
+    def __init__(self):
+        assert_has_numpy()
+        self._columns: Dict[str, Any] = {
+            "vectors": np.empty((0, 0), dtype=np.float32),
+            "ids": np.empty(0, dtype=np.int64),
+        }
+        self._size = 0
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def ids(self) -> "np.ndarray":
+        return self._columns["ids"][: self._size]
+
+    @property
+    def vectors(self) -> "np.ndarray":
+        """The stored vectors, normalized to unit length."""
+        return self._columns["vectors"][: self._size]
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._columns["vectors"].shape[1] if self._size else None
+
+    def _append(self, **columns) -> None:
+        n = len(columns["ids"])
+        needed = self._size + n
+        for name, values in columns.items():
+            column = self._columns[name]
+            if len(column) < needed or not column.flags.writeable:
+                # Grow geometrically so that repeated adds stay cheap. Loaded
+                # indexes are copied out of their read-only memory maps here.
+                capacity = max(needed, 2 * len(column))
+                grown = np.empty((capacity,) + values.shape[1:], dtype=column.dtype)
+                grown[: self._size] = column[: self._size]
+                self._columns[name] = column = grown
+            column[self._size : needed] = values
+        self._size = needed
+
+    def _select(self, rows) -> None:
+        self._columns = {
+            name: column[: self._size][rows] for name, column in self._columns.items()
+        }
+        self._size = len(self._columns["ids"])
+
+    def add(self, vectors, ids=None) -> "np.ndarray":
+        """Adds vectors, returning their ids.
+
+        Ids are assigned in sequence unless given. Adding many vectors per call
+        is much faster than adding them one by one.
+        """
+        vectors = _normalize(vectors)
+        if self._size and vectors.shape[1] != self.dim:
+            raise ValueError(
+                "Expected vectors with %d dimensions, got %d"
+                % (self.dim, vectors.shape[1])
+            )
+        if ids is None:
+            ids = np.arange(self._next_id, self._next_id + len(vectors))
+        ids = np.asarray(ids, dtype=np.int64)
+        if ids.shape != (len(vectors),):
+            raise ValueError("Expected one id per vector")
+        if not len(ids):
+            return ids
+        if not self._size:
+            self._columns["vectors"] = np.empty((0, vectors.shape[1]), np.float32)
+        self._add(vectors, ids)
+        self._next_id = max(self._next_id, int(ids.max()) + 1)
+        return ids
+
+    def _add(self, vectors, ids) -> None:
+        self._append(vectors=vectors, ids=ids)
+
+    def _exact_search(
+        self, queries, k: int, filter
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        single = np.ndim(queries) == 1
+        queries = _normalize(queries)
+        vectors, ids = self.vectors, self.ids
+        mask = _filter_mask(ids, filter)
+
+        result_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        result_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        if not self._size:
+            queries = queries[:0]
+        batch = max(1, MAX_CHUNK_ELEMENTS // max(1, self._size))
+        for start in range(0, len(queries), batch):
+            distances = 1 - queries[start : start + batch] @ vectors.T
+            if mask is not None:
+                distances[:, ~mask] = np.inf
+            nearest = top_k(distances, k)
+            batch_ids, batch_distances = _pad(
+                ids[nearest], np.take_along_axis(distances, nearest, axis=-1), k
+            )
+            result_ids[start : start + batch] = batch_ids
+            result_distances[start : start + batch] = batch_distances
+        if single:
+            return result_ids[0], result_distances[0]
+        return result_ids, result_distances
+
+    def remove(self, ids) -> int:
+        """Removes the vectors with the given ids, returning how many were removed."""
+        keep = ~np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+        removed = self._size - int(keep.sum())
+        if removed:
+            self._select(keep)
+        return removed
+
+    def save(self, path: str) -> None:
+        """Saves the index to the directory `path`."""
+        os.makedirs(path, exist_ok=True)
+        for name, column in self._columns.items():
+            np.save(os.path.join(path, name + ".npy"), column[: self._size])
+        with open(os.path.join(path, "index.json"), "w") as f:
+            json.dump(dict(self._meta(), type=type(self).__name__), f)
+
+    def _meta(self) -> Dict[str, Any]:
+        return {"next_id": self._next_id}
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """Loads an index saved with `save`, memory-mapping its arrays by default."""
+        with open(os.path.join(path, "index.json")) as f:
+            meta = json.load(f)
+        if meta.pop("type") != cls.__name__:
+            raise ValueError("%s does not contain a %s" % (path, cls.__name__))
+        index = cls._from_meta(meta)
+        for name in index._columns:
+            index._columns[name] = np.load(
+                os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None
+            )
+        index._size = len(index._columns["ids"])
+        index._loaded(path, mmap)
+        return index
+
+    @classmethod
+    def _from_meta(cls, meta):
+        index = cls()
+        index._next_id = meta["next_id"]
+        return index
+
+    def _loaded(self, path: str, mmap: bool) -> None:
+        pass
+
+
+class FlatIndex(_VectorIndex):
+    """Exact search over all vectors with batched matrix products."""
+
+    def search(
+        self, queries, k: int = 10, filter=None
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Returns the ids and cosine distances of the `k` vectors nearest each query.
+
+        `queries` is one vector or a (q, d) array. `filter` restricts the results
+        to the given ids, or to the ids for which a function of an array of ids
+        returns True. Missing results have id -1.
+        """
+        return self._exact_search(queries, k, filter)
+
+
+class IVFIndex(_VectorIndex):
+    """Approximate search over k-means partitions of the vectors.
+
+    The index is trained by calling `train`, which picks `n_lists` centroids
+    (about sqrt(n) by default), or on its own once it holds `train_size`
+    vectors (32 per partition by default, or 1024 without `n_lists`); until
+    then, searches are exact. A query is compared with the vectors of the
+    `n_probe` partitions whose centroids are closest to it; probing more
+    partitions improves recall and costs time.
+    """
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        train_size: Optional[int] = None,
+    ):
+        super().__init__()
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        if train_size is None:
+            train_size = TRAIN_VECTORS_PER_LIST * (n_lists or 32)
+        self.train_size = train_size
+        self.centroids: Optional["np.ndarray"] = None
+        self._columns["lists"] = np.empty(0, dtype=np.int32)
+        self._offsets: Optional["np.ndarray"] = None
+
+    def train(self, vectors, n_iter: int = 10, max_samples: int = 64, seed: int = 0):
+        """Fits the partition centroids with spherical k-means.
+
+        At most `max_samples` vectors per partition are used.
+        """
+        vectors = _normalize(vectors)
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        rng = np.random.default_rng(seed)
+        if len(vectors) > max_samples * n_lists:
+            vectors = vectors[rng.choice(len(vectors), max_samples * n_lists, replace=False)]
+
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)]
+        for _ in range(n_iter):
+            assignment = self._assign(vectors, centroids)
+            order = np.argsort(assignment, kind="stable")
+            counts = np.bincount(assignment, minlength=n_lists)
+            filled = np.flatnonzero(counts)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+            sums = np.add.reduceat(vectors[order], starts, axis=0)
+            # Empty partitions are moved onto random vectors.
+            centroids = vectors[rng.choice(len(vectors), n_lists)]
+            centroids[filled] = sums
+            centroids = _normalize(centroids)
+
+        self.centroids = centroids
+        if self._size:
+            self._columns["lists"] = self._assign(self.vectors, centroids)
+            self._offsets = None
+
+    @staticmethod
+    def _assign(vectors, centroids) -> "np.ndarray":
+        assignment = np.empty(len(vectors), dtype=np.int32)
+        batch = max(1, MAX_CHUNK_ELEMENTS // len(centroids))
+        for start in range(0, len(vectors), batch):
+            similarity = vectors[start : start + batch] @ centroids.T
+            assignment[start : start + batch] = similarity.argmax(axis=1)
+        return assignment
+
+    def _add(self, vectors, ids) -> None:
+        if self.centroids is None:
+            # Partitioned once there are enough vectors to pick the centroids.
+            lists = np.zeros(len(vectors), dtype=np.int32)
+            self._append(vectors=vectors, ids=ids, lists=lists)
+            if self._size >= self.train_size:
+                self.train(self.vectors)
+        else:
+            lists = self._assign(vectors, self.centroids)
+            self._append(vectors=vectors, ids=ids, lists=lists)
+        self._offsets = None
+
+    def _select(self, rows) -> None:
+        super()._select(rows)
+        self._offsets = None
+
+    def _partitioned(self) -> "np.ndarray":
+        # Keeps each partition's vectors contiguous so that a search reads
+        # slices of the matrix instead of gathering rows.
+        if self._offsets is None:
+            lists = self._columns["lists"][: self._size]
+            if np.any(lists[1:] < lists[:-1]):
+                self._select(np.argsort(lists, kind="stable"))
+                lists = self._columns["lists"]
+            n_lists = len(self.centroids)
+            self._offsets = np.searchsorted(lists, np.arange(n_lists + 1))
+        return self._offsets
+
+    def search(
+        self, queries, k: int = 10, filter=None, n_probe: Optional[int] = None
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Returns the ids and cosine distances of about the `k` nearest vectors.
+
+        Takes the same arguments as `FlatIndex.search`, plus `n_probe` to
+        override the number of partitions searched.
+        """
+        if self.centroids is None:
+            return self._exact_search(queries, k, filter)
+        single = np.ndim(queries) == 1
+        queries = _normalize(queries)
+        result_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        result_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        if not self._size:
+            queries = queries[:0]
+        else:
+            offsets = self._partitioned()
+            probes = top_k(-(queries @ self.centroids.T), n_probe or self.n_probe)
+        vectors, ids = self.vectors, self.ids
+        for i, query in enumerate(queries):
+            candidate_ids = []
+            candidate_distances = []
+            for partition in probes[i]:
+                start, end = offsets[partition], offsets[partition + 1]
+                if start == end:
+                    continue
+                candidate_ids.append(ids[start:end])
+                candidate_distances.append(1 - vectors[start:end] @ query)
+            if not candidate_ids:
+                continue
+            candidate_ids = np.concatenate(candidate_ids)
+            distances = np.concatenate(candidate_distances)
+            mask = _filter_mask(candidate_ids, filter)
+            if mask is not None:
+                distances[~mask] = np.inf
+            nearest = top_k(distances, k)
+            found_ids, found_distances = _pad(
+                candidate_ids[nearest][None], distances[nearest][None], k
+            )
+            result_ids[i] = found_ids[0]
+            result_distances[i] = found_distances[0]
+        if single:
+            return result_ids[0], result_distances[0]
+        return result_ids, result_distances
+
+    def save(self, path: str) -> None:
+        if self._size and self.centroids is not None:
+            self._partitioned()
+        super().save(path)
+        if self.centroids is not None:
+            np.save(os.path.join(path, "centroids.npy"), self.centroids)
+
+    def _meta(self) -> Dict[str, Any]:
+        return dict(
+            super()._meta(),
+            n_lists=self.n_lists,
+            n_probe=self.n_probe,
+            train_size=self.train_size,
+        )
+
+    @classmethod
+    def _from_meta(cls, meta):
+        index = cls(
+            n_lists=meta["n_lists"],
+            n_probe=meta["n_probe"],
+            train_size=meta.get("train_size"),
+        )
+        index._next_id = meta["next_id"]
+        return index
+
+    def _loaded(self, path: str, mmap: bool) -> None:
+        centroids = os.path.join(path, "centroids.npy")
+        if os.path.exists(centroids):
+            self.centroids = np.load(centroids)
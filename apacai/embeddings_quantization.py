@@ -0,0 +1,209 @@
+"""
+Compact representations of embeddings, for cheaper storage and search.
+
+`quantize` turns float32 embeddings, such as those returned by
+`Embedding.create(..., return_numpy=True)`, into half precision (2x smaller),
+int8 codes with a scale per vector (4x smaller) or packed sign bits (32x
+smaller). Indexing a quantized matrix returns float32 rows, so it can be passed
+to `embeddings_utils.distances_from_embeddings`, which decodes it a chunk at a
+time, and to `embeddings_utils.cosine_similarity`. Binary codes also offer a
+Hamming-distance search that rescores its best candidates with float vectors.
+"""
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from apacai.datalib.numpy_helper import assert_has_numpy
+from apacai.datalib.numpy_helper import numpy as np
+from apacai.embeddings_index import MAX_CHUNK_ELEMENTS, top_k
+
+METHODS = ("float16", "int8", "binary")
+
+
+def _as_matrix(embeddings) -> "np.ndarray":
+    return np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+
+
+class QuantizedEmbeddings:
+    """A quantized (n, dim) matrix of embeddings; rows decode to float32."""
+
+    method: str = ""
+
+    def __init__(self, codes, dim: int):
+        assert_has_numpy()
+        self.codes = codes
+        self.dim = dim
+        self.dtype = np.dtype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (len(self), self.dim)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+    def __getitem__(self, rows) -> "np.ndarray":
+        return self._decode(rows)
+
+    def __array__(self, dtype=None, copy=None) -> "np.ndarray":
+        decoded = self.dequantize()
+        return decoded if dtype is None else decoded.astype(dtype)
+
+    def dequantize(self) -> "np.ndarray":
+        """Returns all embeddings as a float32 matrix."""
+        return self._decode(slice(None))
+
+    def _decode(self, rows) -> "np.ndarray":
+        raise NotImplementedError
+
+
+class Float16Embeddings(QuantizedEmbeddings):
+    method = "float16"
+
+    @classmethod
+    def from_float(cls, embeddings) -> "Float16Embeddings":
+        matrix = _as_matrix(embeddings)
+        return cls(matrix.astype(np.float16), matrix.shape[1])
+
+    def _decode(self, rows) -> "np.ndarray":
+        return self.codes[rows].astype(np.float32)
+
+
+class Int8Embeddings(QuantizedEmbeddings):
+    """Int8 codes, each vector scaled so that its largest component is 127."""
+
+    method = "int8"
+
+    def __init__(self, codes, scales, dim: int):
+        super().__init__(codes, dim)
+        self.scales = scales
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes
+
+    @classmethod
+    def from_float(cls, embeddings) -> "Int8Embeddings":
+        matrix = _as_matrix(embeddings)
+        scales = np.abs(matrix).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+        return cls(codes, scales.astype(np.float32), matrix.shape[1])
+
+    def _decode(self, rows) -> "np.ndarray":
+        decoded = self.codes[rows].astype(np.float32)
+        decoded *= np.asarray(self.scales[rows])[..., None]
+        return decoded
+
+
+@lru_cache(maxsize=None)
+def _popcount_table() -> "np.ndarray":
+    # Number of set bits in each byte value.
+    return np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class BinaryEmbeddings(QuantizedEmbeddings):
+    """The sign of each component, packed 8 to a byte. Rows decode to +1/-1."""
+
+    method = "binary"
+
+    @classmethod
+    def from_float(cls, embeddings) -> "BinaryEmbeddings":
+        matrix = _as_matrix(embeddings)
+        return cls(np.packbits(matrix > 0, axis=1), matrix.shape[1])
+
+    def _decode(self, rows) -> "np.ndarray":
+        bits = np.unpackbits(self.codes[rows], axis=-1, count=self.dim)
+        return bits.astype(np.float32) * 2 - 1
+
+    def hamming_distances(self, query_embedding) -> "np.ndarray":
+        """Returns the number of differing signs between each query and vector."""
+        queries = np.packbits(_as_matrix(query_embedding) > 0, axis=1)
+        distances = np.empty((len(queries), len(self)), dtype=np.int32)
+        for start, chunk in self._chunks(len(queries)):
+            distances[:, start : start + len(chunk)] = self._hamming(queries, chunk)
+        if np.ndim(query_embedding) == 1:
+            return distances[0]
+        return distances
+
+    def _chunks(self, n_queries: int):
+        rows = max(1, MAX_CHUNK_ELEMENTS // max(1, n_queries * self.codes.shape[1]))
+        for start in range(0, len(self), rows):
+            yield start, self.codes[start : start + rows]
+
+    @staticmethod
+    def _hamming(queries, chunk) -> "np.ndarray":
+        differing = np.bitwise_xor(queries[:, None, :], chunk[None, :, :])
+        if hasattr(np, "bitwise_count"):
+            bits = np.bitwise_count(differing)
+        else:
+            bits = _popcount_table()[differing]
+        return bits.sum(axis=-1, dtype=np.int32)
+
+    def search(
+        self,
+        query_embedding,
+        k: int = 10,
+        candidates: Optional[int] = None,
+        rescore_embeddings=None,
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Return the indices and cosine distances of the `k` nearest embeddings.
+
+        The `candidates` vectors (10 * k by default) closest in Hamming distance
+        are rescored with the float query against `rescore_embeddings`, such as
+        the original float32 matrix or an `Int8Embeddings`, or against the sign
+        vectors if none are given.
+        """
+        queries = _as_matrix(query_embedding)
+        packed = np.packbits(queries > 0, axis=1)
+        candidates = min(len(self), candidates or 10 * k)
+        k = min(k, candidates)
+        indices = np.empty((len(queries), k), dtype=np.intp)
+        cosine = np.empty((len(queries), k), dtype=np.float32)
+
+        best = best_distances = None
+        for start, chunk in self._chunks(len(queries)):
+            distances = self._hamming(packed, chunk)
+            nearest = top_k(distances, candidates)
+            distances = np.take_along_axis(distances, nearest, axis=-1)
+            nearest += start
+            if best is not None:
+                nearest = np.concatenate([best, nearest], axis=-1)
+                distances = np.concatenate([best_distances, distances], axis=-1)
+                order = top_k(distances, candidates)
+                nearest = np.take_along_axis(nearest, order, axis=-1)
+                distances = np.take_along_axis(distances, order, axis=-1)
+            best, best_distances = nearest, distances
+
+        rescore = self if rescore_embeddings is None else rescore_embeddings
+        for i, query in enumerate(queries if best is not None else ()):
+            vectors = np.asarray(rescore[best[i]], dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+            norms[norms == 0] = 1
+            distances = 1 - (vectors @ query) / norms
+            order = top_k(distances, k)
+            indices[i] = best[i][order]
+            cosine[i] = distances[order]
+        if np.ndim(query_embedding) == 1:
+            return indices[0], cosine[0]
+        return indices, cosine
+
+
+_CLASSES = {
+    "float16": Float16Embeddings,
+    "int8": Int8Embeddings,
+    "binary": BinaryEmbeddings,
+}
+
+
+def quantize(embeddings, method: str = "int8") -> QuantizedEmbeddings:
+    """Quantizes an (n, dim) matrix of embeddings with one of `METHODS`."""
+    assert_has_numpy()
+    if method not in _CLASSES:
+        raise ValueError(
+            "method must be one of %s, got %r" % (", ".join(METHODS), method)
+        )
+    return _CLASSES[method].from_float(embeddings)
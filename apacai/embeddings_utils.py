@@ -1,29 +1,63 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import random
 import textwrap as tr
-from typing import List, Optional
-
-import matplotlib.pyplot as plt
-import plotly.express as px
-from scipy import spatial
-from sklearn.decomposition import PCA
-from sklearn.manifold import TSNE
-from sklearn.metrics import average_precision_score, precision_recall_curve
-from tenacity import retry, stop_after_attempt, wait_random_exponential
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 import apacai
 from apacai.datalib.numpy_helper import numpy as np
-from apacai.datalib.pandas_helper import pandas as pd
+from apacai.embeddings_index import top_k
+from apacai.embeddings_quantization import QuantizedEmbeddings
+
+# The plotting, dimensionality reduction and metrics helpers import pandas,
+# matplotlib, plotly and scikit-learn when they are called, so that importing
+# this module for embeddings and distances stays cheap.
+
+# get_embedding(s) and aget_embedding(s) make up to 6 attempts on any error,
+# connection errors and timeouts included, 1 to 20 seconds apart.
+EMBEDDING_MAX_ATTEMPTS = 6
+
+
+def _backoff(attempt: int) -> float:
+    # Random exponential backoff, as tenacity's wait_random_exponential(1, 20).
+    return random.uniform(1, min(20, 2 ** attempt))
+
+
+def _with_retries(create, **kwargs):
+    for attempt in range(1, EMBEDDING_MAX_ATTEMPTS + 1):
+        try:
+            return create(**kwargs)
+        except Exception:
+            if attempt == EMBEDDING_MAX_ATTEMPTS:
+                raise
+        time.sleep(_backoff(attempt))
+
+
+async def _awith_retries(acreate, **kwargs):
+    for attempt in range(1, EMBEDDING_MAX_ATTEMPTS + 1):
+        try:
+            return await acreate(**kwargs)
+        except Exception:
+            if attempt == EMBEDDING_MAX_ATTEMPTS:
+                raise
+        await asyncio.sleep(_backoff(attempt))
 
 
-@retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(6))
 def get_embedding(text: str, engine="text-similarity-davinci-001", **kwargs) -> List[float]:
 
     # replace newlines, which can negatively affect performance.
     text = text.replace("\n", " ")
 
-    return apacai.Embedding.create(input=[text], engine=engine, **kwargs)["data"][0]["embedding"]
+    return _with_retries(apacai.Embedding.create, input=[text], engine=engine, **kwargs)[
+        "data"
+    ][0]["embedding"]
 
 
-@retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(6))
 async def aget_embedding(
     text: str, engine="text-similarity-davinci-001", **kwargs
 ) -> List[float]:
@@ -31,39 +65,231 @@ async def aget_embedding(
     # replace newlines, which can negatively affect performance.
     text = text.replace("\n", " ")
 
-    return (await apacai.Embedding.acreate(input=[text], engine=engine, **kwargs))["data"][0][
-        "embedding"
-    ]
+    return (
+        await _awith_retries(
+            apacai.Embedding.acreate, input=[text], engine=engine, **kwargs
+        )
+    )["data"][0]["embedding"]
 
 
-@retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(6))
 def get_embeddings(
-    list_of_text: List[str], engine="text-similarity-babbage-001", **kwargs
-) -> List[List[float]]:
+    list_of_text: List[str],
+    engine="text-similarity-babbage-001",
+    return_numpy: bool = False,
+    **kwargs,
+) -> Union[List[List[float]], "np.ndarray"]:
     assert len(list_of_text) <= 2048, "The batch size should not be larger than 2048."
 
     # replace newlines, which can negatively affect performance.
     list_of_text = [text.replace("\n", " ") for text in list_of_text]
 
-    data = apacai.Embedding.create(input=list_of_text, engine=engine, **kwargs).data
-    return [d["embedding"] for d in data]
+    response = _with_retries(
+        apacai.Embedding.create,
+        input=list_of_text,
+        engine=engine,
+        return_numpy=return_numpy,
+        **kwargs,
+    )
+    if return_numpy:
+        # One float32 row per input, decoded without going through Python floats.
+        return response
+    return [d["embedding"] for d in response["data"]]
 
 
-@retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(6))
 async def aget_embeddings(
-    list_of_text: List[str], engine="text-similarity-babbage-001", **kwargs
-) -> List[List[float]]:
+    list_of_text: List[str],
+    engine="text-similarity-babbage-001",
+    return_numpy: bool = False,
+    **kwargs,
+) -> Union[List[List[float]], "np.ndarray"]:
     assert len(list_of_text) <= 2048, "The batch size should not be larger than 2048."
 
     # replace newlines, which can negatively affect performance.
     list_of_text = [text.replace("\n", " ") for text in list_of_text]
 
-    data = (await apacai.Embedding.acreate(input=list_of_text, engine=engine, **kwargs)).data
-    return [d["embedding"] for d in data]
+    response = await _awith_retries(
+        apacai.Embedding.acreate,
+        input=list_of_text,
+        engine=engine,
+        return_numpy=return_numpy,
+        **kwargs,
+    )
+    if return_numpy:
+        # One float32 row per input, decoded without going through Python floats.
+        return response
+    return [d["embedding"] for d in response["data"]]
+
+
+def get_embeddings_bulk(
+    list_of_text: Iterable[str], engine="text-similarity-babbage-001", **kwargs
+) -> "np.ndarray":
+    # Any number of texts, embedded in concurrent batches by Embedding.create_many.
+    texts = (text.replace("\n", " ") for text in list_of_text)
+    batches = [
+        embeddings
+        for _, embeddings in apacai.Embedding.create_many(
+            texts, engine=engine, return_numpy=True, **kwargs
+        )
+    ]
+    return np.concatenate(batches) if batches else np.empty((0, 0), dtype="float32")
+
+
+async def aget_embeddings_bulk(
+    list_of_text: Iterable[str], engine="text-similarity-babbage-001", **kwargs
+) -> "np.ndarray":
+    texts = (text.replace("\n", " ") for text in list_of_text)
+    batches = [
+        embeddings
+        async for _, embeddings in apacai.Embedding.acreate_many(
+            texts, engine=engine, return_numpy=True, **kwargs
+        )
+    ]
+    return np.concatenate(batches) if batches else np.empty((0, 0), dtype="float32")
+
+
+class _Batch:
+    def __init__(self):
+        self.texts = []
+        self.futures = []
+        self.full = threading.Event()
+
+
+class EmbeddingCoalescer:
+    """Merges concurrent single-text embedding calls into batched requests.
+
+    Calls to `get_embedding` (from threads) or `aget_embedding` (from
+    coroutines) that arrive within `max_wait` seconds of each other, up to
+    `max_batch_size` of them, are sent as one `Embedding.create` request, and
+    each caller gets its own vector. Other keyword arguments are passed to
+    every request.
+    """
+
+    def __init__(
+        self,
+        engine="text-similarity-davinci-001",
+        max_batch_size: int = 256,
+        max_wait: float = 0.01,
+        **kwargs,
+    ):
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.kwargs = kwargs
+        self._lock = threading.Lock()
+        self._batch = _Batch()
+        self._abatches = weakref.WeakKeyDictionary()
+        # The event loop only keeps weak references to tasks, so the batches
+        # being sent are kept here until they are done.
+        self._tasks = set()
+
+    def get_embedding(self, text: str) -> List[float]:
+        future = concurrent.futures.Future()
+        with self._lock:
+            batch = self._batch
+            batch.texts.append(text.replace("\n", " "))
+            batch.futures.append(future)
+            leader = len(batch.texts) == 1
+            if len(batch.texts) >= self.max_batch_size:
+                self._batch = _Batch()
+                batch.full.set()
+
+        if leader:
+            # The first caller sends the batch once it is full or the window
+            # has passed, whichever comes first.
+            try:
+                batch.full.wait(self.max_wait)
+                self._close(batch)
+                self._send(batch)
+            except BaseException as e:
+                # Interrupted before the batch was sent: the other callers
+                # get the same error instead of waiting forever.
+                self._close(batch)
+                for pending in batch.futures:
+                    if not pending.done():
+                        pending.set_exception(e)
+                raise
+        return future.result()
+
+    def _close(self, batch: _Batch) -> None:
+        # Later calls go to a new batch.
+        with self._lock:
+            if self._batch is batch:
+                self._batch = _Batch()
+
+    async def aget_embedding(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._abatches.get(loop)
+        if batch is None:
+            batch = self._abatches[loop] = _Batch()
+            loop.call_later(self.max_wait, self._aflush, loop, batch)
+        batch.texts.append(text.replace("\n", " "))
+        batch.futures.append(future)
+        if len(batch.texts) >= self.max_batch_size:
+            self._aflush(loop, batch)
+        return await future
+
+    def _send(self, batch: _Batch) -> None:
+        try:
+            response = apacai.Embedding.create(
+                input=batch.texts, engine=self.engine, object_format="raw", **self.kwargs
+            )
+        except BaseException as e:
+            # Also on KeyboardInterrupt, so that the other callers don't wait
+            # forever.
+            for future in batch.futures:
+                future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            for future, item in zip(batch.futures, self._ordered(response)):
+                future.set_result(item["embedding"])
+
+    def _aflush(self, loop, batch: _Batch) -> None:
+        if self._abatches.get(loop) is batch:
+            del self._abatches[loop]
+            task = asyncio.ensure_future(self._asend(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _asend(self, batch: _Batch) -> None:
+        try:
+            response = await apacai.Embedding.acreate(
+                input=batch.texts, engine=self.engine, object_format="raw", **self.kwargs
+            )
+        except BaseException as e:
+            # Also when cancelled, so that the callers don't wait forever.
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            for future, item in zip(batch.futures, self._ordered(response)):
+                if not future.done():
+                    future.set_result(item["embedding"])
+
+    @staticmethod
+    def _ordered(response):
+        return sorted(response["data"], key=lambda item: item["index"])
 
 
 def cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    # Either argument may also be a matrix of embeddings, quantized ones
+    # included, which np.asarray decodes to float32. Two matrices give the
+    # similarity of every pair of rows.
+    a, b = np.asarray(a), np.asarray(b)
+    a = a / np.linalg.norm(a, axis=-1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=-1, keepdims=True)
+    return np.dot(a, b.T)
+
+
+def _pandas():
+    from apacai.datalib.pandas_helper import assert_has_pandas
+    from apacai.datalib.pandas_helper import pandas
+
+    assert_has_pandas()
+    return pandas
 
 
 def plot_multiclass_precision_recall(
@@ -74,6 +300,10 @@ def plot_multiclass_precision_recall(
 
     Code slightly modified, but heavily based on https://scikit-learn.org/stable/auto_examples/model_selection/plot_precision_recall.html
     """
+    import matplotlib.pyplot as plt
+    from sklearn.metrics import average_precision_score, precision_recall_curve
+
+    pd = _pandas()
     n_classes = len(class_list)
     y_true = pd.concat(
         [(y_true_untransformed == class_list[i]) for i in range(n_classes)], axis=1
@@ -136,34 +366,319 @@ def plot_multiclass_precision_recall(
     plt.legend(lines, labels)
 
 
+DISTANCE_METRICS = ("cosine", "L1", "L2", "Linf")
+
+# Largest number of array elements a distance computation works on at once.
+MAX_CHUNK_ELEMENTS = 2 ** 24
+
+
+def _as_float_array(embeddings) -> np.ndarray:
+    if isinstance(embeddings, QuantizedEmbeddings):
+        # Decoded to float32 a chunk at a time by slicing.
+        return embeddings
+    array = np.asarray(embeddings)
+    if not np.issubdtype(array.dtype, np.floating):
+        array = array.astype(np.float64)
+    return array
+
+
+def _chunk_rows(n_queries: int, dim: int, distance_metric: str) -> int:
+    # L1 and Linf broadcast a (queries, rows, dim) array; the other metrics
+    # only need the rows themselves and a (queries, rows) matrix product.
+    if distance_metric in ("L1", "Linf"):
+        per_row = n_queries * dim
+    else:
+        per_row = max(n_queries, dim)
+    return max(1, MAX_CHUNK_ELEMENTS // max(1, per_row))
+
+
+def _distances_to_chunk(queries, query_norms, chunk, distance_metric):
+    if distance_metric == "cosine":
+        similarity = queries @ chunk.T
+        chunk_norms = np.sqrt(np.einsum("ij,ij->i", chunk, chunk))
+        similarity /= np.outer(query_norms, chunk_norms)
+        return 1 - similarity
+    if distance_metric == "L2":
+        squared = (
+            (query_norms ** 2)[:, None]
+            + np.einsum("ij,ij->i", chunk, chunk)[None, :]
+            - 2 * (queries @ chunk.T)
+        )
+        return np.sqrt(np.maximum(squared, 0, out=squared), out=squared)
+    difference = np.abs(queries[:, None, :] - chunk[None, :, :])
+    if distance_metric == "L1":
+        return difference.sum(axis=-1)
+    return difference.max(axis=-1)
+
+
+def _check_metric(distance_metric: str) -> None:
+    if distance_metric not in DISTANCE_METRICS:
+        raise ValueError(
+            "distance_metric must be one of %s, got %r"
+            % (", ".join(DISTANCE_METRICS), distance_metric)
+        )
+
+
+def _iter_distance_chunks(query_embedding, embeddings, distance_metric, chunk_size):
+    _check_metric(distance_metric)
+    embeddings = _as_float_array(embeddings)
+    # Half-precision embeddings are scanned in float32, a chunk at a time.
+    dtype = np.promote_types(embeddings.dtype, np.float32)
+    queries = np.atleast_2d(_as_float_array(query_embedding)).astype(dtype, copy=False)
+    query_norms = np.linalg.norm(queries, axis=1)
+    if chunk_size is None:
+        chunk_size = _chunk_rows(len(queries), queries.shape[1], distance_metric)
+    for start in range(0, len(embeddings), chunk_size):
+        chunk = embeddings[start : start + chunk_size].astype(dtype, copy=False)
+        yield start, _distances_to_chunk(queries, query_norms, chunk, distance_metric)
+
+
 def distances_from_embeddings(
-    query_embedding: List[float],
-    embeddings: List[List[float]],
+    query_embedding,
+    embeddings,
     distance_metric="cosine",
-) -> List[List]:
-    """Return the distances between a query embedding and a list of embeddings."""
-    distance_metrics = {
-        "cosine": spatial.distance.cosine,
-        "L1": spatial.distance.cityblock,
-        "L2": spatial.distance.euclidean,
-        "Linf": spatial.distance.chebyshev,
-    }
-    distances = [
-        distance_metrics[distance_metric](query_embedding, embedding)
-        for embedding in embeddings
-    ]
+    chunk_size: Optional[int] = None,
+) -> np.ndarray:
+    """Return the distances between a query embedding and a list of embeddings.
+
+    `embeddings` may be an (n, d) array. Several queries can be passed as a
+    (q, d) array, in which case a (q, n) array is returned. The embeddings are
+    processed `chunk_size` rows at a time to bound memory use.
+    """
+    queries = np.atleast_2d(_as_float_array(query_embedding))
+    embeddings = _as_float_array(embeddings)
+    distances = np.empty(
+        (len(queries), len(embeddings)),
+        dtype=np.result_type(queries, embeddings.dtype, np.float32),
+    )
+    for start, chunk_distances in _iter_distance_chunks(
+        queries, embeddings, distance_metric, chunk_size
+    ):
+        distances[:, start : start + chunk_distances.shape[1]] = chunk_distances
+    if np.ndim(query_embedding) == 1:
+        return distances[0]
     return distances
 
 
-def indices_of_nearest_neighbors_from_distances(distances) -> np.ndarray:
-    """Return a list of indices of nearest neighbors from a list of distances."""
+def nearest_neighbors_from_embeddings(
+    query_embedding,
+    embeddings,
+    k: int,
+    distance_metric="cosine",
+    chunk_size: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the indices and distances of the `k` embeddings nearest each query.
+
+    Only the best `k` candidates are kept while the embeddings are scanned in
+    chunks, so the full distance matrix is never held in memory.
+    """
+    best_indices = best_distances = None
+    embeddings = _as_float_array(embeddings)
+    for start, chunk_distances in _iter_distance_chunks(
+        query_embedding, embeddings, distance_metric, chunk_size
+    ):
+        chunk_best = top_k(chunk_distances, k)
+        chunk_distances = np.take_along_axis(chunk_distances, chunk_best, axis=-1)
+        chunk_best += start
+        if best_indices is not None:
+            chunk_best = np.concatenate([best_indices, chunk_best], axis=-1)
+            chunk_distances = np.concatenate([best_distances, chunk_distances], axis=-1)
+            order = top_k(chunk_distances, k)
+            chunk_best = np.take_along_axis(chunk_best, order, axis=-1)
+            chunk_distances = np.take_along_axis(chunk_distances, order, axis=-1)
+        best_indices, best_distances = chunk_best, chunk_distances
+
+    if best_indices is None:
+        n_queries = len(np.atleast_2d(query_embedding))
+        best_indices = np.empty((n_queries, 0), dtype=np.intp)
+        best_distances = np.empty((n_queries, 0))
+    if np.ndim(query_embedding) == 1:
+        return best_indices[0], best_distances[0]
+    return best_indices, best_distances
+
+
+def indices_of_nearest_neighbors_from_distances(
+    distances, k: Optional[int] = None
+) -> np.ndarray:
+    """Return a list of indices of nearest neighbors from a list of distances.
+
+    If `k` is given, only the indices of the `k` nearest are returned.
+    """
+    if k is not None:
+        return top_k(distances, k)
     return np.argsort(distances)
 
 
+class EmbeddingStore:
+    """An append-only store of embeddings on disk, for corpora larger than RAM.
+
+    The directory `path` holds the vectors as a raw float32 (or float16) matrix
+    that is read through `np.memmap`, plus one JSON line of metadata per vector.
+    Appends are atomic: a `store.json` header, replaced only once the data is
+    written, records how many rows are committed, and an exclusive `flock`
+    serializes writers across processes. Requires a POSIX platform to append.
+    """
+
+    def __init__(self, path: str, dim: Optional[int] = None, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError("dtype must be 'float32' or 'float16', got %r" % (dtype,))
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        header = self._header()
+        if header is None:
+            header = {"dim": dim, "dtype": dtype, "count": 0, "metadata_bytes": 0}
+            self._write_header(header)
+        elif dim is not None and header["dim"] not in (None, dim):
+            raise ValueError(
+                "%s holds %d-dimensional embeddings, not %d" % (path, header["dim"], dim)
+            )
+        self.dtype = np.dtype(header["dtype"])
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _header(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file("store.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_header(self, header: Dict[str, Any]) -> None:
+        tmp = self._file("store.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(header, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._file("store.json"))
+
+    def __len__(self) -> int:
+        return self._header()["count"]
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._header()["dim"]
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """The committed embeddings as a read-only (n, dim) memory map."""
+        header = self._header()
+        if not header["count"]:
+            return np.empty((0, header["dim"] or 0), dtype=self.dtype)
+        return np.memmap(
+            self._file("vectors.bin"),
+            dtype=self.dtype,
+            mode="r",
+            shape=(header["count"], header["dim"]),
+        )
+
+    def append(self, vectors, metadata: Optional[List[Dict[str, Any]]] = None) -> range:
+        """Appends embeddings, with an optional metadata dict for each.
+
+        Returns the row numbers of the new embeddings.
+        """
+        import fcntl
+
+        vectors = np.atleast_2d(np.asarray(vectors)).astype(self.dtype, copy=False)
+        if metadata is None:
+            metadata = [{}] * len(vectors)
+        if len(metadata) != len(vectors):
+            raise ValueError("Expected one metadata dict per embedding")
+        lines = [(json.dumps(m) + "\n").encode("utf-8") for m in metadata]
+
+        with open(self._file("lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            header = self._header()
+            if header["dim"] is None:
+                header["dim"] = vectors.shape[1]
+            elif vectors.shape[1] != header["dim"]:
+                raise ValueError(
+                    "Expected embeddings with %d dimensions, got %d"
+                    % (header["dim"], vectors.shape[1])
+                )
+            count = header["count"]
+            offsets = header["metadata_bytes"] + np.cumsum(
+                [0] + [len(line) for line in lines[:-1]], dtype=np.int64
+            )
+            # Anything past the committed sizes was left by an interrupted
+            # append, and is overwritten.
+            for name, committed, data in (
+                ("vectors.bin", count * header["dim"] * self.dtype.itemsize, vectors),
+                ("offsets.bin", count * 8, offsets.astype(np.int64)),
+                ("metadata.jsonl", header["metadata_bytes"], b"".join(lines)),
+            ):
+                with open(self._file(name), "ab") as f:
+                    f.truncate(committed)
+                    f.write(data if isinstance(data, bytes) else data.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            header["count"] = count + len(vectors)
+            header["metadata_bytes"] += sum(len(line) for line in lines)
+            self._write_header(header)
+        return range(count, count + len(vectors))
+
+    def add_texts(self, texts: List[str], metadata=None, **kwargs) -> range:
+        """Embeds texts with `Embedding.create_many` and appends each batch.
+
+        Each text is stored in its metadata under "text". Other keyword
+        arguments are passed to `Embedding.create_many`.
+        """
+        texts = [text.replace("\n", " ") for text in texts]
+        first = len(self)
+        for start, embeddings in apacai.Embedding.create_many(
+            texts, return_numpy=True, **kwargs
+        ):
+            batch = range(start, start + len(embeddings))
+            self.append(
+                embeddings,
+                [
+                    dict(metadata[i] if metadata else {}, text=texts[i])
+                    for i in batch
+                ],
+            )
+        return range(first, len(self))
+
+    def get_metadata(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        """Returns the metadata of the given rows."""
+        header = self._header()
+        rows = list(rows)
+        if not rows:
+            return []
+        offsets = np.memmap(
+            self._file("offsets.bin"), dtype=np.int64, mode="r", shape=(header["count"],)
+        )
+        result = []
+        with open(self._file("metadata.jsonl"), "rb") as f:
+            for row in rows:
+                if not 0 <= row < header["count"]:
+                    raise IndexError("row %d is out of range" % (row,))
+                f.seek(int(offsets[row]))
+                result.append(json.loads(f.readline()))
+        return result
+
+    def search(
+        self,
+        query_embedding,
+        k: int = 10,
+        distance_metric="cosine",
+        chunk_size: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the rows and distances of the `k` embeddings nearest each query.
+
+        The memory-mapped embeddings are scanned chunk by chunk; see
+        `nearest_neighbors_from_embeddings`.
+        """
+        return nearest_neighbors_from_embeddings(
+            query_embedding, self.vectors, k, distance_metric, chunk_size
+        )
+
+
 def pca_components_from_embeddings(
     embeddings: List[List[float]], n_components=2
 ) -> np.ndarray:
     """Return the PCA components of a list of embeddings."""
+    from sklearn.decomposition import PCA
+
     pca = PCA(n_components=n_components)
     array_of_embeddings = np.array(embeddings)
     return pca.fit_transform(array_of_embeddings)
@@ -173,6 +688,8 @@ def tsne_components_from_embeddings(
     embeddings: List[List[float]], n_components=2, **kwargs
 ) -> np.ndarray:
     """Returns t-SNE components of a list of embeddings."""
+    from sklearn.manifold import TSNE
+
     # use better defaults if not specified
     if "init" not in kwargs.keys():
         kwargs["init"] = "pca"
@@ -193,6 +710,9 @@ def chart_from_components(
     **kwargs,
 ):
     """Return an interactive 2D chart of embedding components."""
+    import plotly.express as px
+
+    pd = _pandas()
     empty_list = ["" for _ in components]
     data = pd.DataFrame(
         {
@@ -227,6 +747,9 @@ def chart_from_components_3D(
     **kwargs,
 ):
     """Return an interactive 3D chart of embedding components."""
+    import plotly.express as px
+
+    pd = _pandas()
     empty_list = ["" for _ in components]
     data = pd.DataFrame(
         {
@@ -1,6 +1,3 @@
-import apacai
-
-
 class ApacAIError(Exception):
     def __init__(
         self,
@@ -64,9 +61,9 @@ class ApacAIError(Exception):
         ):
             return None
 
-        return apacai.api_resources.error_object.ErrorObject.construct_from(
-            self.json_body["error"]
-        )
+        from apacai.api_resources.error_object import ErrorObject
+
+        return ErrorObject.construct_from(self.json_body["error"])
 
 
 class APIError(ApacAIError):
@@ -0,0 +1,286 @@
+"""
+Hedged requests, to cut the tail latency of idempotent calls.
+
+With a `HedgingPolicy` set as `apacai.hedging_policy`, or passed as
+`hedging_policy=` to an `APIRequestor` or a `create` call, an idempotent
+request whose response headers haven't arrived after the policy's delay is sent
+a second time, on another pooled connection. Whichever response arrives first
+is used and the other request is abandoned. Only GET requests and embedding
+requests, which are deterministic, are hedged.
+
+Synchronous requests are sent from the calling thread, and their hedges from a
+small pool of threads. A first attempt is abandoned by shutting down its
+connection, which needs the sessions made by `api_requestor`; with a session
+from `apacai.requestssession`, the calling thread still waits for the headers of
+its first attempt.
+"""
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import heapq
+import itertools
+import socket
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from apacai import util
+from apacai.hooks import endpoint
+from apacai.retry import RetryBudget
+
+# Threads that send the hedges of synchronous requests, whose first attempts
+# are sent from the calling thread. Each keeps its own pooled session, like any
+# other thread.
+MAX_HEDGING_THREADS = 32
+
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                MAX_HEDGING_THREADS, thread_name_prefix="apacai-hedging"
+            )
+        return _executor
+
+
+class _Timer:
+    def __init__(self, callback: Callable[[], None]):
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+_timers: List[Tuple[float, int, _Timer]] = []
+_timers_condition = threading.Condition()
+_timers_sequence = itertools.count()
+_timers_thread: Optional[threading.Thread] = None
+
+
+def _run_timers() -> None:
+    while True:
+        with _timers_condition:
+            while not _timers or _timers[0][0] > time.monotonic():
+                timeout = _timers[0][0] - time.monotonic() if _timers else None
+                _timers_condition.wait(timeout)
+            _, _, timer = heapq.heappop(_timers)
+        if not timer.cancelled:
+            try:
+                timer.callback()
+            except Exception:
+                util.logger.exception("Hedging timer failed")
+
+
+def call_later(delay: float, callback: Callable[[], None]) -> _Timer:
+    """Calls `callback` after `delay` seconds, unless cancelled first.
+
+    Callbacks run one after the other on a single thread, so must be quick.
+    """
+    global _timers_thread
+    timer = _Timer(callback)
+    with _timers_condition:
+        heapq.heappush(
+            _timers, (time.monotonic() + delay, next(_timers_sequence), timer)
+        )
+        if _timers_thread is None:
+            _timers_thread = threading.Thread(
+                target=_run_timers, name="apacai-hedging-timers", daemon=True
+            )
+            _timers_thread.start()
+        _timers_condition.notify()
+    return timer
+
+
+class Abandoned(Exception):
+    """Raised on the thread of a request whose hedge answered first."""
+
+
+class PrimaryAttempt:
+    """The first attempt of a hedged synchronous request.
+
+    It is sent on the calling thread and its hedge on another one. The first
+    to get its response headers calls `end` or `abandon`. Abandoning the
+    attempt shuts down its connection, so that the calling thread stops
+    waiting for it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Then "finished", "failed" or "abandoned".
+        self.state = "sending"
+        self.hedge: Optional[concurrent.futures.Future] = None
+        self._connection = None
+
+    def track(self, connection) -> None:
+        """Notes the connection that the attempt is sent on."""
+        with self._lock:
+            if self.state == "abandoned":
+                raise Abandoned()
+            self._connection = connection
+
+    def start_hedge(
+        self, submit: Callable[[], concurrent.futures.Future]
+    ) -> Optional[concurrent.futures.Future]:
+        with self._lock:
+            if self.state != "sending":
+                return None
+            self.hedge = submit()
+            return self.hedge
+
+    def end(self, state: str) -> bool:
+        """Marks the attempt as finished or failed, unless it was abandoned."""
+        with self._lock:
+            if self.state == "abandoned":
+                return False
+            self.state = state
+            return True
+
+    def abandon(self) -> bool:
+        """Abandons the attempt, unless it has already ended."""
+        with self._lock:
+            if self.state != "sending":
+                return False
+            self.state = "abandoned"
+            connection = self._connection
+        sock = getattr(connection, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        return True
+
+
+def is_idempotent(method: str, url: str, files=None) -> bool:
+    """Whether sending a request twice has the same effect as sending it once."""
+    if method == "get":
+        return True
+    return (
+        method == "post"
+        and not files
+        and urlsplit(url).path.rstrip("/").endswith("/embeddings")
+    )
+
+
+class _Endpoint:
+    def __init__(self, window: int, budget: RetryBudget):
+        self.latencies: Deque[float] = collections.deque(maxlen=window)
+        self.budget = budget
+
+
+class HedgingPolicy:
+    """Decides when to hedge the requests to an endpoint.
+
+    Requests are hedged after the `percentile` of the time to response headers
+    of the last `window` requests to the same endpoint, but never sooner than
+    `min_delay` seconds, and not before `min_samples` requests have been timed.
+    Each endpoint has a budget that lets hedges add at most `budget_ratio`
+    extra requests, after an initial reserve of `budget_capacity` hedges.
+    The policy is shared by all threads and event loops using it.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_delay: float = 0.01,
+        min_samples: int = 20,
+        window: int = 200,
+        budget_ratio: float = 0.1,
+        budget_capacity: float = 2.0,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.budget_ratio = budget_ratio
+        self.budget_capacity = budget_capacity
+        self._endpoints: Dict[Tuple[str, str], _Endpoint] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method: str, url: str) -> Tuple[str, str]:
+        return (method, endpoint(url))
+
+    def _endpoint(self, key: Tuple[str, str]) -> _Endpoint:
+        with self._lock:
+            state = self._endpoints.get(key)
+            if state is None:
+                budget = RetryBudget(
+                    ratio=self.budget_ratio,
+                    min_retries_per_sec=0.0,
+                    capacity=self.budget_capacity,
+                )
+                state = self._endpoints[key] = _Endpoint(self.window, budget)
+            return state
+
+    def delay(self, key: Tuple[str, str]) -> Optional[float]:
+        """Counts a request to the endpoint and returns when to hedge it.
+
+        Returns None if too few requests to the endpoint have been timed.
+        """
+        state = self._endpoint(key)
+        state.budget.deposit()
+        with self._lock:
+            latencies = sorted(state.latencies)
+        if len(latencies) < self.min_samples:
+            return None
+        if not latencies:
+            return self.min_delay
+        rank = min(len(latencies) - 1, int(self.percentile / 100 * len(latencies)))
+        return max(self.min_delay, latencies[rank])
+
+    def allow_hedge(self, key: Tuple[str, str]) -> bool:
+        """Takes a hedge from the endpoint's budget, if there is one left."""
+        return self._endpoint(key).budget.withdraw()
+
+    def record(self, key: Tuple[str, str], seconds: float) -> None:
+        """Records the time to the response headers of a request."""
+        state = self._endpoint(key)
+        with self._lock:
+            state.latencies.append(seconds)
+
+
+def _discard(discard: Callable[[Any], None], future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        discard(future.result())
+
+
+async def afirst_result(
+    tasks: Iterable["asyncio.Future"], discard: Callable[[Any], None]
+):
+    """Returns the result of the first of `tasks` to succeed.
+
+    The other tasks are cancelled, and the results of those that finish anyway
+    are passed to `discard`. If all of them fail, raises the error of the first
+    to fail.
+    """
+    pending = set(tasks)
+    winner = None
+    errors: List[BaseException] = []
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is not None:
+                    errors.append(task.exception())
+                elif winner is None:
+                    winner = task
+                else:
+                    discard(task.result())
+    finally:
+        # Also runs if the caller is cancelled while waiting.
+        for task in pending:
+            task.cancel()
+            task.add_done_callback(functools.partial(_discard, discard))
+    if winner is None:
+        raise errors[0]
+    return winner.result()
@@ -0,0 +1,285 @@
+"""
+Hooks into the requests sent by `APIRequestor`, and metrics built from them.
+
+Set `apacai.request_hooks` to a `HookRegistry`, or pass `hooks=` to an
+`APIRequestor`, and register callbacks for any of `EVENTS`. Each callback is
+called with the `RequestInfo` of the request, which is filled in as the request
+progresses.
+`MetricsAggregator` registers callbacks that count requests and record latency
+histograms per endpoint and model, and renders them in the Prometheus text
+format.
+"""
+import bisect
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from apacai.streaming import StreamTiming
+
+EVENTS = (
+    # Before each attempt is sent.
+    "request_start",
+    # When the response headers of an attempt arrive.
+    "response_headers",
+    # When the response has been read; for streams, once the stream ends.
+    "response_complete",
+    # For each event of a streamed response.
+    "stream_event",
+    # When an attempt failed and is about to be retried.
+    "retry",
+    # When the request fails for good, including while streaming.
+    "error",
+)
+
+Hook = Callable[["RequestInfo"], None]
+
+# Path segments with digits, such as resource IDs and model names, are
+# replaced so that endpoints make a small set of metric labels.
+_ID_SEGMENT = re.compile(r"[^/]*\d[^/]*")
+
+
+def endpoint(path: str) -> str:
+    """Returns the endpoint of a request path, without its query or IDs."""
+    return _ID_SEGMENT.sub("{id}", path.split("?", 1)[0])
+
+
+class RequestInfo:
+    """What is known of a request, passed to every hook.
+
+    Times are in milliseconds since the request started, including retries.
+    `attempt` counts the retries made so far. Streamed responses also have
+    the `StreamTiming` of the stream in `timing`.
+    """
+
+    def __init__(self, method: str, path: str, model: Optional[str] = None):
+        self.method = method
+        self.path = path
+        self.model = model
+        self.start = time.monotonic()
+        self.attempt = 0
+        self.status: Optional[int] = None
+        self.request_id: Optional[str] = None
+        self.request_bytes: Optional[int] = None
+        self.response_bytes: Optional[int] = None
+        self.headers_ms: Optional[float] = None
+        self.duration_ms: Optional[float] = None
+        self.timing: Optional[StreamTiming] = None
+        self.error: Optional[Exception] = None
+        self.retry_delay: Optional[float] = None
+
+    @property
+    def endpoint(self) -> str:
+        return endpoint(self.path)
+
+    @property
+    def stream(self) -> bool:
+        return self.timing is not None
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.start) * 1000
+
+    def record_headers(self, status: int, rheaders, request_headers) -> None:
+        self.headers_ms = self.elapsed_ms()
+        self.status = status
+        self.request_id = rheaders.get("X-Request-Id")
+        if request_headers is not None:
+            length = request_headers.get("Content-Length")
+            self.request_bytes = int(length) if length is not None else 0
+
+
+class HookRegistry:
+    """Callbacks for the events of requests, by event name.
+
+    Callbacks run on the thread or event loop that sends the request, so they
+    should be quick. `register` can be used as a decorator.
+    """
+
+    def __init__(self):
+        self._hooks: Dict[str, List[Hook]] = {event: [] for event in EVENTS}
+
+    def register(self, event: str, hook: Optional[Hook] = None):
+        if event not in self._hooks:
+            raise ValueError(
+                "event must be one of %s, got %r" % (", ".join(EVENTS), event)
+            )
+        if hook is None:
+            return lambda hook: self.register(event, hook)
+        # Lists are replaced rather than modified, so that requests in flight
+        # on other threads can keep iterating over them.
+        self._hooks[event] = self._hooks[event] + [hook]
+        return hook
+
+    def unregister(self, event: str, hook: Hook) -> None:
+        self._hooks[event] = [h for h in self._hooks[event] if h is not hook]
+
+    def has(self, event: str) -> bool:
+        return bool(self._hooks[event])
+
+    def emit(self, event: str, info: RequestInfo) -> None:
+        for hook in self._hooks[event]:
+            hook(info)
+
+
+# Upper bounds, in seconds, of the buckets of latency histograms.
+DEFAULT_BUCKETS = (
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # The last count is for values above the largest bucket.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value) -> str:
+    return (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def _labels(names, values) -> str:
+    return ",".join('%s="%s"' % (n, _escape(v)) for n, v in zip(names, values))
+
+
+class MetricsAggregator:
+    """Counts requests and records their latencies, per endpoint and model.
+
+    Call `attach` with a `HookRegistry` to start collecting, and
+    `to_prometheus` to render the metrics in the Prometheus text format, for
+    example to serve them from an existing endpoint or write them for the node
+    exporter's textfile collector.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # Keyed by (endpoint, model, method, status).
+        self.requests: Dict[Tuple[str, str, str, str], int] = {}
+        # Keyed by (endpoint, model).
+        self.retries: Dict[Tuple[str, str], int] = {}
+        self.request_bytes: Dict[Tuple[str, str], int] = {}
+        self.response_bytes: Dict[Tuple[str, str], int] = {}
+        self.durations: Dict[Tuple[str, str], Histogram] = {}
+        self.first_events: Dict[Tuple[str, str], Histogram] = {}
+        # Keyed by (endpoint, model, error type).
+        self.errors: Dict[Tuple[str, str, str], int] = {}
+
+    def attach(self, registry: HookRegistry) -> "MetricsAggregator":
+        registry.register("response_complete", self.on_response_complete)
+        registry.register("retry", self.on_retry)
+        registry.register("error", self.on_error)
+        return self
+
+    def _observe(self, histograms, key, value: Optional[float]) -> None:
+        if value is None:
+            return
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self.buckets)
+        histogram.observe(value / 1000)
+
+    def _count(self, info: RequestInfo, status: str) -> Tuple[str, str]:
+        key = (info.endpoint, info.model or "")
+        request_key = key + (info.method.upper(), status)
+        self.requests[request_key] = self.requests.get(request_key, 0) + 1
+        for counters, size in (
+            (self.request_bytes, info.request_bytes),
+            (self.response_bytes, info.response_bytes),
+        ):
+            if size:
+                counters[key] = counters.get(key, 0) + size
+        self._observe(self.durations, key, info.duration_ms)
+        return key
+
+    def on_response_complete(self, info: RequestInfo) -> None:
+        with self._lock:
+            key = self._count(info, str(info.status))
+            if info.timing is not None:
+                self._observe(self.first_events, key, info.timing.first_event_ms)
+
+    def on_retry(self, info: RequestInfo) -> None:
+        key = (info.endpoint, info.model or "")
+        with self._lock:
+            self.retries[key] = self.retries.get(key, 0) + 1
+
+    def on_error(self, info: RequestInfo) -> None:
+        with self._lock:
+            key = self._count(info, str(info.status or "error"))
+            error_key = key + (type(info.error).__name__,)
+            self.errors[error_key] = self.errors.get(error_key, 0) + 1
+
+    def to_prometheus(self, prefix: str = "apacai") -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def counter(name, help, labels, values):
+            name = "%s_%s" % (prefix, name)
+            lines.append("# HELP %s %s" % (name, help))
+            lines.append("# TYPE %s counter" % name)
+            for key, value in sorted(values.items()):
+                lines.append("%s{%s} %d" % (name, _labels(labels, key), value))
+
+        def histogram(name, help, histograms):
+            name = "%s_%s" % (prefix, name)
+            lines.append("# HELP %s %s" % (name, help))
+            lines.append("# TYPE %s histogram" % name)
+            for key, h in sorted(histograms.items()):
+                labels = _labels(("endpoint", "model"), key)
+                cumulative = 0
+                for bound, count in zip(h.buckets + (float("inf"),), h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(
+                        '%s_bucket{%s,le="%s"} %d' % (name, labels, le, cumulative)
+                    )
+                lines.append("%s_sum{%s} %r" % (name, labels, h.sum))
+                lines.append("%s_count{%s} %d" % (name, labels, h.count))
+
+        endpoint_model = ("endpoint", "model")
+        with self._lock:
+            counter(
+                "requests_total",
+                "Requests completed, by response status.",
+                endpoint_model + ("method", "status"),
+                self.requests,
+            )
+            counter("retries_total", "Attempts retried.", endpoint_model, self.retries)
+            counter(
+                "errors_total",
+                "Requests failed, by error type.",
+                endpoint_model + ("type",),
+                self.errors,
+            )
+            counter(
+                "request_bytes_total",
+                "Bytes of request bodies sent.",
+                endpoint_model,
+                self.request_bytes,
+            )
+            counter(
+                "response_bytes_total",
+                "Bytes of response bodies received.",
+                endpoint_model,
+                self.response_bytes,
+            )
+            histogram(
+                "request_duration_seconds",
+                "Time from the start of a request to the end of its response.",
+                self.durations,
+            )
+            histogram(
+                "time_to_first_event_seconds",
+                "Time from the start of a streamed request to its first event.",
+                self.first_events,
+            )
+        return "\n".join(lines) + "\n"
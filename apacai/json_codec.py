@@ -0,0 +1,84 @@
+"""
+JSON encoding and decoding for request bodies and API responses.
+
+Uses `orjson` when it is installed, then `ujson`, and falls back to the
+standard library otherwise. The backend can be forced with the
+`APACAI_JSON_BACKEND` environment variable or `set_backend`. Decoding failures
+raise `ValueError` whichever backend is in use.
+"""
+import json
+import os
+from typing import Any, Union
+
+BACKENDS = ("orjson", "ujson", "json")
+
+_backend = "json"
+_dumps_fast = None
+_loads_fast = None
+
+
+def _load_backend(name: str) -> bool:
+    global _backend, _dumps_fast, _loads_fast
+
+    if name == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            return False
+        _dumps_fast = orjson.dumps
+        _loads_fast = orjson.loads
+    elif name == "ujson":
+        try:
+            import ujson
+        except ImportError:
+            return False
+        _dumps_fast = lambda obj: ujson.dumps(obj, ensure_ascii=False).encode()
+        _loads_fast = ujson.loads
+    elif name == "json":
+        _dumps_fast = None
+        _loads_fast = None
+    else:
+        raise ValueError(
+            "Unknown JSON backend %r, expected one of %s" % (name, ", ".join(BACKENDS))
+        )
+    _backend = name
+    return True
+
+
+def set_backend(name: str) -> None:
+    """Selects the JSON backend by name; raises ImportError if it isn't installed."""
+    if not _load_backend(name):
+        raise ImportError("JSON backend %r is not installed" % (name,))
+
+
+def backend() -> str:
+    """Returns the name of the JSON backend in use."""
+    return _backend
+
+
+def dumps(obj: Any) -> bytes:
+    """Encodes `obj` as compact UTF-8 JSON."""
+    if _dumps_fast is not None:
+        try:
+            return _dumps_fast(obj)
+        except (TypeError, OverflowError):
+            # Fall back for values the fast encoder rejects, such as integers
+            # wider than 64 bits.
+            pass
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Decodes JSON from UTF-8 bytes or a string."""
+    if _loads_fast is not None:
+        return _loads_fast(data)
+    return json.loads(data)
+
+
+_requested = os.environ.get("APACAI_JSON_BACKEND")
+if _requested:
+    set_backend(_requested)
+else:
+    for _name in BACKENDS:
+        if _load_backend(_name):
+            break
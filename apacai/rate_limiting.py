@@ -0,0 +1,162 @@
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# Rough number of characters per token for English text, used to estimate the
+# cost of a request before it is sent.
+CHARS_PER_TOKEN = 4
+# Tokens the chat format adds around each message.
+TOKENS_PER_MESSAGE = 4
+
+
+def _text_tokens(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return math.ceil(len(value) / CHARS_PER_TOKEN)
+    if isinstance(value, int):
+        # Prompts and inputs may already be tokenized.
+        return 1
+    if isinstance(value, (list, tuple)):
+        return sum(_text_tokens(v) for v in value)
+    return 0
+
+
+def estimate_tokens(params: Mapping[str, Any]) -> int:
+    """Estimates the tokens a create request will consume.
+
+    Counts the `prompt`, `messages` and `input` text plus the completion budget
+    (`max_tokens` times the number of choices). This errs on the side of
+    reserving too much; the API's own tokenizer is not used.
+    """
+    tokens = _text_tokens(params.get("prompt")) + _text_tokens(params.get("input"))
+    for message in params.get("messages") or ():
+        tokens += TOKENS_PER_MESSAGE + _text_tokens(message.get("content"))
+    max_tokens = params.get("max_tokens")
+    if max_tokens:
+        choices = max(params.get("n") or 1, params.get("best_of") or 1)
+        tokens += max_tokens * choices
+    return tokens
+
+
+def _take(
+    level: float, updated: float, now: float, amount: float, per_minute: float
+) -> Tuple[float, float]:
+    """Takes `amount` from a token bucket refilled at `per_minute`.
+
+    The bucket may go into debt, so callers queue up in arrival order. Returns
+    the new level and how long the caller must wait for its reservation.
+    """
+    rate = per_minute / 60
+    level = min(per_minute, level + (now - updated) * rate) - amount
+    wait = -level / rate if level < 0 else 0.0
+    return level, wait
+
+
+class RateLimiter:
+    """Client-side pacing for requests-per-minute and tokens-per-minute limits.
+
+    Requests reserve capacity before they are sent and sleep until the
+    reservation is covered. This limiter is shared by the threads and event
+    loops of one process; see `FileRateLimiter` to share limits between
+    processes on the same host. Either limit may be None to leave it unmetered.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        now = time.time()
+        self._state: Dict[str, float] = self._initial_state(now)
+        self._lock = threading.Lock()
+
+    def _initial_state(self, now: float) -> Dict[str, float]:
+        return {
+            "requests": self.requests_per_minute or 0.0,
+            "tokens": self.tokens_per_minute or 0.0,
+            "updated": now,
+        }
+
+    def _reserve_state(self, state: Dict[str, float], tokens: int) -> float:
+        now = time.time()
+        updated = min(state["updated"], now)
+        wait = 0.0
+        if self.requests_per_minute:
+            state["requests"], request_wait = _take(
+                state["requests"], updated, now, 1, self.requests_per_minute
+            )
+            wait = max(wait, request_wait)
+        if self.tokens_per_minute:
+            state["tokens"], token_wait = _take(
+                state["tokens"], updated, now, tokens, self.tokens_per_minute
+            )
+            # Requests that consume no tokens are not held up by token debt.
+            if tokens:
+                wait = max(wait, token_wait)
+        state["updated"] = now
+        return wait
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserves one request and `tokens` tokens; returns the seconds to wait."""
+        with self._lock:
+            return self._reserve_state(self._state, tokens)
+
+    def acquire(self, tokens: int = 0) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class FileRateLimiter(RateLimiter):
+    """A `RateLimiter` whose state lives in a file shared by several processes.
+
+    Every reservation takes an exclusive `flock` on `path`, so all processes on
+    the host pointing at the same file share one budget. Requires a POSIX
+    platform.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        super().__init__(requests_per_minute, tokens_per_minute)
+        self.path = path
+
+    def reserve(self, tokens: int = 0) -> float:
+        import fcntl
+
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = b""
+                while True:
+                    chunk = os.read(fd, 4096)
+                    if not chunk:
+                        break
+                    raw += chunk
+                try:
+                    state = json.loads(raw)
+                except ValueError:
+                    state = self._initial_state(time.time())
+                wait = self._reserve_state(state, tokens)
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, json.dumps(state).encode())
+                return wait
+            finally:
+                os.close(fd)
@@ -0,0 +1,160 @@
+import random
+import sys
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import apacai
+from apacai import error
+
+# Errors the API uses to ask the client to try the same request again later.
+RETRYABLE_ERRORS = (
+    error.RateLimitError,
+    error.ServiceUnavailableError,
+    error.TryAgain,
+)
+
+
+class RetryBudget:
+    """Caps retries to a fraction of the traffic sent through it.
+
+    Every request deposits `ratio` tokens and every retry withdraws one, so
+    retries can add at most `ratio` extra load once the reserve is spent. The
+    reserve refills at `min_retries_per_sec` so that a quiet client can still
+    retry occasional failures. The budget is shared by all threads and event
+    loops of the process.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_retries_per_sec: float = 1.0,
+        capacity: float = 10.0,
+    ):
+        self.ratio = ratio
+        self.min_retries_per_sec = min_retries_per_sec
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(
+            self.capacity, self._tokens + elapsed * self.min_retries_per_sec
+        )
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+default_budget = RetryBudget()
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Returns the delay requested by the `Retry-After` headers, if any."""
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """Decides whether and when to retry a request the API asked us to retry.
+
+    Delays use exponential backoff with full jitter, starting at
+    `initial_backoff` and capped at `max_backoff` seconds. A `Retry-After`
+    header from the server takes precedence, as long as it is no longer than
+    `max_retry_after`. `timeout` bounds the total time spent on a request and
+    its retries. A `max_retries` of None uses `apacai.max_retries`.
+    """
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 20.0,
+        max_retry_after: float = 60.0,
+        timeout: Optional[float] = None,
+        budget: Optional[RetryBudget] = None,
+    ):
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.timeout = timeout
+        self.budget = budget or default_budget
+
+    @classmethod
+    def for_timeout(cls, timeout: float) -> "RetryPolicy":
+        """Returns a policy that retries until `timeout` seconds have passed.
+
+        This is what the `timeout` argument of `create` and `Engine.generate`
+        means: neither `max_retries` nor a retry budget cut it short.
+        """
+        unlimited = RetryBudget(
+            ratio=0.0, min_retries_per_sec=0.0, capacity=float("inf")
+        )
+        return cls(max_retries=sys.maxsize, timeout=timeout, budget=unlimited)
+
+    def backoff(self, attempt: int) -> float:
+        ceiling = min(self.max_backoff, self.initial_backoff * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def next_delay(
+        self, exc: Exception, attempt: int, elapsed: float
+    ) -> Optional[float]:
+        """Returns how long to wait before retrying, or None to give up.
+
+        `attempt` counts the retries already made and `elapsed` is the time in
+        seconds since the first attempt started.
+        """
+        if not isinstance(exc, RETRYABLE_ERRORS):
+            return None
+        max_retries = (
+            apacai.max_retries if self.max_retries is None else self.max_retries
+        )
+        if attempt >= max_retries:
+            return None
+
+        retry_after = retry_after_seconds(getattr(exc, "headers", None))
+        if retry_after is None:
+            delay = self.backoff(attempt)
+        elif retry_after <= self.max_retry_after:
+            delay = retry_after
+        else:
+            return None
+
+        if self.timeout is not None and elapsed + delay > self.timeout:
+            return None
+        if not self.budget.withdraw():
+            return None
+        return delay
@@ -0,0 +1,122 @@
+"""
+Incremental decoding of server-sent event (`text/event-stream`) bodies.
+
+`SSEDecoder` is fed the raw bytes of a streamed response as they arrive, in
+chunks of any size, and returns each complete event. Event data is left as
+bytes so that it can be handed to `json_codec.loads` without decoding it first.
+"""
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class ServerSentEvent(NamedTuple):
+    data: bytes
+    event: Optional[str] = None
+    id: Optional[str] = None
+
+
+class SSEDecoder:
+    """Decodes a stream of server-sent events from chunks of bytes.
+
+    Lines may end in CRLF, LF or CR and be split anywhere across chunks.
+    Multi-line `data` fields are joined with newlines, `event` and `id` fields
+    are attached to the event they belong to, and comments are skipped. The
+    last `retry` field received is kept in `retry`.
+    """
+
+    def __init__(self):
+        self.retry: Optional[int] = None
+        # Pieces of a line that hasn't ended yet.
+        self._parts: List[bytes] = []
+        # Set when a chunk ended in CR, so that a LF starting the next chunk
+        # isn't read as a second line ending.
+        self._skip_lf = False
+        # Fields of the event being received.
+        self._data: List[bytes] = []
+        self._event: Optional[str] = None
+        self._last_id: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> List[ServerSentEvent]:
+        """Adds a chunk of the body and returns the events it completes."""
+        return [ServerSentEvent(*event) for event in self._decode(chunk)]
+
+    def feed_data(self, chunk: bytes) -> List[bytes]:
+        """Like `feed`, but returns only the data of each event.
+
+        This is all a stream of JSON objects needs, and saves building an
+        event object for each of them.
+        """
+        return [event[0] for event in self._decode(chunk)]
+
+    def flush(self) -> List[ServerSentEvent]:
+        """Returns the last event of a body that ended without a blank line."""
+        return self.feed(b"\n\n")
+
+    def _decode(
+        self, chunk: bytes
+    ) -> List[Tuple[bytes, Optional[str], Optional[str]]]:
+        if self._skip_lf and chunk:
+            self._skip_lf = False
+            if chunk[:1] == b"\n":
+                chunk = chunk[1:]
+        if not chunk:
+            return []
+
+        # bytes.splitlines splits on exactly the line endings SSE allows.
+        lines = chunk.splitlines()
+        last = chunk[-1:]
+        rest = None
+        if last == b"\r":
+            self._skip_lf = True
+        elif last != b"\n":
+            rest = lines.pop()
+        parts = self._parts
+        if parts and lines:
+            lines[0] = b"".join(parts) + lines[0]
+            parts.clear()
+        if rest is not None:
+            # Pieces are joined once the line ends, so a long line costs no
+            # more than a short one per byte.
+            parts.append(rest)
+
+        events = []
+        data = self._data
+        for line in lines:
+            if line.startswith(b"data: "):
+                data.append(line[6:])
+            elif not line:
+                if data:
+                    events.append(
+                        (
+                            data[0] if len(data) == 1 else b"\n".join(data),
+                            self._event,
+                            self._last_id,
+                        )
+                    )
+                    data.clear()
+                self._event = None
+            elif line[:1] != b":":
+                self._field(line)
+        return events
+
+    def _field(self, line: bytes) -> None:
+        name, _, value = line.partition(b":")
+        if value[:1] == b" ":
+            value = value[1:]
+        if name == b"data":
+            self._data.append(value)
+        elif name == b"event":
+            self._event = value.decode("utf-8", errors="replace")
+        elif name == b"id":
+            if b"\0" not in value:
+                self._last_id = value.decode("utf-8", errors="replace")
+        elif name == b"retry":
+            if value.isdigit():
+                self.retry = int(value)
+
+
+def iter_events(chunks: Iterable[bytes]) -> Iterator[ServerSentEvent]:
+    """Yields the events of a body given as an iterable of byte chunks."""
+    decoder = SSEDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.flush()
@@ -0,0 +1,316 @@
+"""
+Streamed responses: their client-side timings, and the merging of streamed
+completions and chat completions.
+
+Streamed requests return a `Stream` (or an `AsyncStream`), whose `timing`
+records the time to response headers, to the first event, between events, and
+to the end of the stream. `apacai.stream_timing_hook` is called with the
+`StreamTiming` of every stream once it ends.
+
+`StreamAccumulator` consumes the chunks of `Completion.create(stream=True)` or
+`ChatCompletion.create(stream=True)`, hands out the text of each chunk as it
+arrives, and rebuilds the response that the request would have returned
+without streaming. Pass `object_format="raw"` to `create` so that no object is
+built for each chunk.
+"""
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import apacai
+from apacai import util
+
+T = TypeVar("T")
+
+
+class StreamTiming:
+    """Client-side timings of a streamed response, in milliseconds.
+
+    `headers_ms`, `first_event_ms` and `total_ms` are measured from the start of
+    the request, including any retries, so `first_event_ms` is the time to first
+    token as the caller sees it. `connect_ms` is the time spent opening new
+    connections, and stays None when a pooled connection was reused or the
+    transport doesn't report it. `gaps_ms` holds the time between consecutive
+    events, and `event_bytes` the size of their data.
+    """
+
+    def __init__(self, url: Optional[str] = None, start: Optional[float] = None):
+        self.url = url
+        self.request_id: Optional[str] = None
+        self.start = time.monotonic() if start is None else start
+        self.connect_ms: Optional[float] = None
+        self.headers_ms: Optional[float] = None
+        self.first_event_ms: Optional[float] = None
+        self.total_ms: Optional[float] = None
+        self.events = 0
+        self.event_bytes = 0
+        self.gaps_ms: List[float] = []
+        self._last_event: Optional[float] = None
+        self._on_finish: List[Callable[["StreamTiming"], None]] = []
+
+    def add_connect(self, seconds: float) -> None:
+        self.connect_ms = (self.connect_ms or 0.0) + seconds * 1000
+
+    def record_headers(self, rheaders) -> None:
+        self.headers_ms = (time.monotonic() - self.start) * 1000
+        self.request_id = rheaders.get("X-Request-Id")
+
+    def record_event(self) -> None:
+        now = time.monotonic()
+        if self._last_event is None:
+            self.first_event_ms = (now - self.start) * 1000
+        else:
+            self.gaps_ms.append((now - self._last_event) * 1000)
+        self._last_event = now
+        self.events += 1
+
+    def finish(self) -> None:
+        if self.total_ms is not None:
+            return
+        self.total_ms = (time.monotonic() - self.start) * 1000
+        for callback in self._on_finish:
+            callback(self)
+        hook = apacai.stream_timing_hook
+        if hook is not None:
+            hook(self)
+
+    def on_finish(self, callback: Callable[["StreamTiming"], None]) -> None:
+        """Calls `callback` with this timing once the stream ends."""
+        self._on_finish.append(callback)
+
+    def gap_percentile(self, percent: float) -> Optional[float]:
+        """Returns a percentile (0-100) of the time between events."""
+        if not self.gaps_ms:
+            return None
+        gaps = sorted(self.gaps_ms)
+        rank = min(len(gaps) - 1, max(0, round(percent / 100 * len(gaps)) - 1))
+        return gaps[rank]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "request_id": self.request_id,
+            "connect_ms": self.connect_ms,
+            "headers_ms": self.headers_ms,
+            "first_event_ms": self.first_event_ms,
+            "total_ms": self.total_ms,
+            "events": self.events,
+            "event_bytes": self.event_bytes,
+            "gap_p50_ms": self.gap_percentile(50),
+            "gap_p90_ms": self.gap_percentile(90),
+            "gap_p99_ms": self.gap_percentile(99),
+            "gap_max_ms": max(self.gaps_ms) if self.gaps_ms else None,
+        }
+
+    def track(self, events: Iterable[bytes]) -> Iterator[bytes]:
+        """Yields `events`, recording when each arrives and when they end."""
+        try:
+            for event in events:
+                self.record_event()
+                self.event_bytes += len(event)
+                yield event
+        finally:
+            self.finish()
+
+    async def atrack(self, events: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Like `track`, for an async iterator."""
+        try:
+            async for event in events:
+                self.record_event()
+                self.event_bytes += len(event)
+                yield event
+        finally:
+            self.finish()
+
+
+class Stream(Generic[T]):
+    """An iterator over the events of a streamed response, with its timing."""
+
+    def __init__(self, iterator: Iterator[T], timing: StreamTiming):
+        self._iterator = iterator
+        self.timing = timing
+
+    def __iter__(self) -> "Stream[T]":
+        return self
+
+    def __next__(self) -> T:
+        return next(self._iterator)
+
+    def close(self) -> None:
+        """Stops the stream early, releasing its connection."""
+        close = getattr(self._iterator, "close", None)
+        if close is not None:
+            close()
+        self.timing.finish()
+
+
+class AsyncStream(Generic[T]):
+    """Like `Stream`, for the events of an async request."""
+
+    def __init__(self, iterator: AsyncIterator[T], timing: StreamTiming):
+        self._iterator = iterator
+        self.timing = timing
+
+    def __aiter__(self) -> "AsyncStream[T]":
+        return self
+
+    async def __anext__(self) -> T:
+        return await self._iterator.__anext__()
+
+    async def aclose(self) -> None:
+        """Stops the stream early, releasing its connection."""
+        aclose = getattr(self._iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        self.timing.finish()
+
+
+# Lists in the `logprobs` of completion chunks, which are concatenated.
+_LOGPROBS_FIELDS = ("tokens", "token_logprobs", "top_logprobs", "text_offset")
+
+
+class _Choice:
+    __slots__ = (
+        "index",
+        "chat",
+        "role",
+        "text",
+        "function_name",
+        "function_arguments",
+        "logprobs",
+        "finish_reason",
+    )
+
+    def __init__(self, index: int, chat: bool):
+        self.index = index
+        self.chat = chat
+        self.role: Optional[str] = None
+        # Pieces are joined once, when the merged response is built.
+        self.text: List[str] = []
+        self.function_name: List[str] = []
+        self.function_arguments: List[str] = []
+        self.logprobs: Optional[Dict[str, List[Any]]] = None
+        self.finish_reason: Optional[str] = None
+
+    def add_logprobs(self, logprobs) -> None:
+        if self.logprobs is None:
+            self.logprobs = {field: [] for field in _LOGPROBS_FIELDS}
+        for field in _LOGPROBS_FIELDS:
+            self.logprobs[field].extend(logprobs.get(field) or ())
+
+    def to_dict(self) -> Dict[str, Any]:
+        text = "".join(self.text)
+        if not self.chat:
+            return {
+                "index": self.index,
+                "text": text,
+                "logprobs": self.logprobs,
+                "finish_reason": self.finish_reason,
+            }
+        message: Dict[str, Any] = {"role": self.role or "assistant", "content": text}
+        if self.function_name or self.function_arguments:
+            message["function_call"] = {
+                "name": "".join(self.function_name),
+                "arguments": "".join(self.function_arguments),
+            }
+            if not text:
+                message["content"] = None
+        return {
+            "index": self.index,
+            "message": message,
+            "finish_reason": self.finish_reason,
+        }
+
+
+class StreamAccumulator:
+    """Merges the chunks of a streamed completion or chat completion.
+
+    Chunks may be plain dicts, as returned with `object_format="raw"`, or
+    `ApacAIObject`s. Choices are tracked by index, so `n > 1` streams are
+    merged too.
+    """
+
+    def __init__(self):
+        self._fields: Dict[str, Any] = {}
+        self._choices: Dict[int, _Choice] = {}
+
+    def add(self, chunk) -> List[Tuple[int, str]]:
+        """Merges a chunk and returns the `(choice index, text)` it added."""
+        if not self._fields:
+            self._fields = {k: v for k, v in chunk.items() if k != "choices"}
+        elif chunk.get("usage"):
+            self._fields["usage"] = chunk["usage"]
+
+        added = []
+        for c in chunk.get("choices") or ():
+            index = c.get("index", 0)
+            delta = c.get("delta")
+            choice = self._choices.get(index)
+            if choice is None:
+                choice = self._choices[index] = _Choice(index, delta is not None)
+
+            if delta is not None:
+                text = delta.get("content")
+                if delta.get("role"):
+                    choice.role = delta["role"]
+                function_call = delta.get("function_call")
+                if function_call:
+                    if function_call.get("name"):
+                        choice.function_name.append(function_call["name"])
+                    if function_call.get("arguments"):
+                        choice.function_arguments.append(function_call["arguments"])
+            else:
+                text = c.get("text")
+                if c.get("logprobs"):
+                    choice.add_logprobs(c["logprobs"])
+
+            if text:
+                choice.text.append(text)
+                added.append((index, text))
+            if c.get("finish_reason") is not None:
+                choice.finish_reason = c["finish_reason"]
+        return added
+
+    def consume(self, chunks: Iterable[Any]) -> Iterator[Tuple[int, str]]:
+        """Merges each chunk, yielding the `(choice index, text)` it adds."""
+        for chunk in chunks:
+            yield from self.add(chunk)
+
+    async def aconsume(
+        self, chunks: AsyncIterator[Any]
+    ) -> AsyncIterator[Tuple[int, str]]:
+        """Like `consume`, for the chunks of an `acreate(stream=True)`."""
+        async for chunk in chunks:
+            for added in self.add(chunk):
+                yield added
+
+    def text(self, index: int = 0) -> str:
+        """Returns the text received so far for a choice."""
+        choice = self._choices.get(index)
+        return "".join(choice.text) if choice is not None else ""
+
+    def finish_reason(self, index: int = 0) -> Optional[str]:
+        choice = self._choices.get(index)
+        return choice.finish_reason if choice is not None else None
+
+    def response(self, object_format: Optional[str] = None):
+        """Returns the merged response, in the shape of a non-streamed one."""
+        data = dict(self._fields)
+        obj = data.get("object")
+        if isinstance(obj, str) and obj.endswith(".chunk"):
+            data["object"] = obj[: -len(".chunk")]
+        data["choices"] = [
+            self._choices[index].to_dict() for index in sorted(self._choices)
+        ]
+        return util.convert_to_apacai_object(data, object_format=object_format)
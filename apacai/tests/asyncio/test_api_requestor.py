@@ -0,0 +1,52 @@
+import pytest
+from aiohttp import ClientSession
+
+import apacai
+from apacai import api_requestor
+
+pytestmark = [pytest.mark.asyncio]
+
+
+async def test_pooled_session_is_reused_within_loop() -> None:
+    async with api_requestor.aiohttp_session() as first:
+        pass
+    async with api_requestor.aiohttp_session() as second:
+        pass
+    assert first is second
+    assert not first.closed
+
+    await apacai.aclose_sessions()
+    assert first.closed
+
+    async with api_requestor.aiohttp_session() as third:
+        assert third is not first
+    await apacai.aclose_sessions()
+
+
+async def test_pooled_session_uses_connector_limits(monkeypatch) -> None:
+    monkeypatch.setattr(apacai, "aiohttp_limit", 7)
+    monkeypatch.setattr(apacai, "aiohttp_limit_per_host", 3)
+    async with api_requestor.aiohttp_session() as session:
+        assert session.connector.limit == 7
+        assert session.connector.limit_per_host == 3
+    await apacai.aclose_sessions()
+
+
+async def test_user_session_takes_precedence() -> None:
+    async with ClientSession() as user_session:
+        token = apacai.aiosession.set(user_session)
+        try:
+            async with api_requestor.aiohttp_session() as session:
+                assert session is user_session
+        finally:
+            apacai.aiosession.reset(token)
+
+
+async def test_parse_stream_async_reads_chunks() -> None:
+    class Reader:
+        async def iter_any(self):
+            for chunk in (b'data: {"a"', b": 1}\n\ndata: [DONE]\n", b"\n"):
+                yield chunk
+
+    payloads = [p async for p in api_requestor.parse_stream_async(Reader())]
+    assert payloads == [b'{"a": 1}']
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+import apacai
+
+pytestmark = [pytest.mark.asyncio]
+
+
+async def test_acreate_many_bounds_concurrency_and_keeps_order(monkeypatch) -> None:
+    in_flight = []
+    peak = 0
+
+    async def fake_acreate(input, **kwargs):
+        nonlocal peak
+        in_flight.append(input)
+        peak = max(peak, len(in_flight))
+        # Later batches finish first.
+        await asyncio.sleep(0.01 * (10 - int(input[0])))
+        in_flight.remove(input)
+        data = [
+            {"object": "embedding", "index": i, "embedding": [float(t)]}
+            for i, t in enumerate(input)
+        ]
+        return {"object": "list", "data": data[::-1]}
+
+    monkeypatch.setattr(apacai.Embedding, "acreate", fake_acreate)
+
+    results = [
+        r
+        async for r in apacai.Embedding.acreate_many(
+            [str(i) for i in range(10)], max_batch_size=2, max_concurrency=3
+        )
+    ]
+    assert peak == 3
+    assert [start for start, _ in results] == [0, 2, 4, 6, 8]
+    assert [v for _, batch in results for v in batch] == [[float(i)] for i in range(10)]
@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+import apacai
+from apacai.api_requestor import APIRequestor
+from apacai.hedging import HedgingPolicy
+from apacai.tests.test_hedging import (  # noqa: F401
+    SLOW_SECS,
+    server_url,
+    slow_server,
+)
+
+pytestmark = [pytest.mark.asyncio]
+
+
+async def test_hedges_slow_get(slow_server) -> None:  # noqa: F811
+    policy = HedgingPolicy(min_samples=0, min_delay=0.05)
+    requestor = APIRequestor(
+        key="test_key", api_base=server_url(slow_server), hedging_policy=policy
+    )
+    start = time.monotonic()
+    resp, _, _ = await requestor.arequest("get", "/files/file-1")
+    assert time.monotonic() - start < SLOW_SECS
+    assert resp.data["slow"] is False
+    assert slow_server.requests == ["/files/file-1"] * 2
+    await apacai.aclose_sessions()
+
+
+async def test_no_hedge_for_completions(slow_server) -> None:  # noqa: F811
+    policy = HedgingPolicy(min_samples=0, min_delay=0.05)
+    requestor = APIRequestor(
+        key="test_key", api_base=server_url(slow_server), hedging_policy=policy
+    )
+    resp, _, _ = await requestor.arequest("post", "/completions", {"prompt": "a"})
+    assert resp.data["slow"] is True
+    assert slow_server.requests == ["/completions"]
+    await apacai.aclose_sessions()
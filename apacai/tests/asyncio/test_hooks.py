@@ -0,0 +1,26 @@
+import pytest
+
+import apacai
+from apacai.api_requestor import APIRequestor
+from apacai.hooks import HookRegistry, MetricsAggregator
+from apacai.tests.test_streaming import sse_server  # noqa: F401
+
+pytestmark = [pytest.mark.asyncio]
+
+
+async def test_hooks_see_async_stream(sse_server) -> None:  # noqa: F811
+    registry = HookRegistry()
+    events = []
+    for event in ("request_start", "response_headers", "stream_event"):
+        registry.register(event, lambda info, event=event: events.append(event))
+    metrics = MetricsAggregator().attach(registry)
+
+    requestor = APIRequestor(key="test_key", api_base=sse_server, hooks=registry)
+    resp, _, _ = await requestor.arequest(
+        "post", "/completions", {"model": "ada"}, stream=True
+    )
+    assert len([r async for r in resp]) == 3
+    assert events == ["request_start", "response_headers"] + ["stream_event"] * 3
+    assert metrics.requests == {("/completions", "ada", "POST", "200"): 1}
+    assert metrics.first_events[("/completions", "ada")].count == 1
+    await apacai.aclose_sessions()
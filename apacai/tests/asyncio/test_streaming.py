@@ -0,0 +1,34 @@
+import pytest
+
+import apacai
+from apacai.api_requestor import APIRequestor
+from apacai.streaming import AsyncStream, StreamAccumulator
+from apacai.tests.test_streaming import sse_server  # noqa: F401
+
+pytestmark = [pytest.mark.asyncio]
+
+
+async def test_aconsume() -> None:
+    async def chunks():
+        for text in ("a", "b"):
+            yield {"object": "text_completion", "choices": [{"index": 0, "text": text}]}
+
+    accumulator = StreamAccumulator()
+    assert [t async for t in accumulator.aconsume(chunks())] == [(0, "a"), (0, "b")]
+    assert accumulator.response(object_format="raw")["choices"][0]["text"] == "ab"
+
+
+async def test_stream_timing(sse_server, monkeypatch) -> None:  # noqa: F811
+    finished = []
+    monkeypatch.setattr(apacai, "stream_timing_hook", finished.append)
+    requestor = APIRequestor(key="test_key", api_base=sse_server)
+    resp, _, _ = await requestor.arequest("post", "/completions", {}, stream=True)
+    assert isinstance(resp, AsyncStream)
+    assert [r.data["id"] async for r in resp] == ["0", "1", "2"]
+
+    timing = resp.timing
+    assert finished == [timing]
+    assert timing.connect_ms is not None
+    assert timing.headers_ms <= timing.first_event_ms <= timing.total_ms
+    assert len(timing.gaps_ms) == 2
+    await apacai.aclose_sessions()
@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+import apacai
+from apacai import tracing
+from apacai.tests.test_streaming import sse_server  # noqa: F401
+
+pytestmark = [pytest.mark.asyncio]
+
+
+async def test_spans_follow_tasks(sse_server, monkeypatch) -> None:  # noqa: F811
+    exporter = tracing.InMemorySpanExporter()
+    monkeypatch.setattr(apacai, "tracer", tracing.Tracer(exporter))
+
+    async def complete(model):
+        stream = await apacai.Completion.acreate(
+            model=model, prompt="hi", stream=True, api_base=sse_server
+        )
+        return [chunk async for chunk in stream]
+
+    results = await asyncio.gather(complete("ada"), complete("babbage"))
+    assert [len(r) for r in results] == [3, 3]
+    await apacai.aclose_sessions()
+
+    spans = exporter.get_finished_spans()
+    roots = [s for s in spans if s.name == "apacai.Completion.create"]
+    assert sorted(r.attributes["gen_ai.request.model"] for r in roots) == [
+        "ada",
+        "babbage",
+    ]
+    for span in spans:
+        if span.name == "apacai.request":
+            root = span.parent
+            assert root in roots
+            assert span.attributes["gen_ai.request.model"] == (
+                root.attributes["gen_ai.request.model"]
+            )
+        elif span.name == "apacai.stream":
+            assert span.parent.name == "apacai.request"
+            assert span.attributes["apacai.stream.events"] == 3
@@ -0,0 +1,29 @@
+import io
+
+import pytest
+import requests
+
+
+@pytest.fixture
+def fake_responses(mocker):
+    """Makes `requests` return the given responses, in order, instead of sending.
+
+    Each response is a `(status, content_type, body)` tuple. `headers` are
+    added to every response.
+    """
+
+    def patch(*responses, headers=None):
+        responses = list(responses)
+
+        def fake_request(self, *args, **kwargs):
+            status, content_type, body = responses.pop(0)
+            r = requests.Response()
+            r.status_code = status
+            r.headers["content-type"] = content_type
+            r.headers.update(headers or {})
+            r.raw = io.BytesIO(body)
+            return r
+
+        mocker.patch("requests.sessions.Session.request", fake_request)
+
+    return patch
@@ -1,10 +1,14 @@
+import asyncio
+import io
 import json
+import platform
 
 import pytest
 import requests
 from pytest_mock import MockerFixture
 
-from apacai import Model
+from apacai import Model, error
+from apacai import api_requestor as api_requestor_module
 from apacai.api_requestor import APIRequestor
 
 
@@ -69,18 +73,43 @@ def test_requestor_azure_ad_headers() -> None:
     assert headers["Authorization"] == "Bearer test_key"
 
 
+@pytest.mark.requestor
+def test_requestor_caches_user_agent(mocker: MockerFixture) -> None:
+    from apacai.api_requestor import _platform_user_agent, _user_agent_headers
+
+    _platform_user_agent.cache_clear()
+    _user_agent_headers.cache_clear()
+    uname = mocker.spy(platform, "uname")
+
+    api_requestor = APIRequestor(key="test_key")
+    first = api_requestor.request_headers("get", {}, None)
+    second = api_requestor.request_headers("get", {}, None)
+    assert first == second
+    assert uname.call_count == 1
+
+    mocker.patch("apacai.app_info", {"name": "app", "version": "1.0", "url": None})
+    headers = api_requestor.request_headers("get", {}, None)
+    assert headers["User-Agent"].endswith(" app/1.0")
+    assert json.loads(headers["X-APACAI-Client-User-Agent"])["application"] == {
+        "name": "app",
+        "version": "1.0",
+        "url": None,
+    }
+    assert uname.call_count == 1
+
+
 @pytest.mark.requestor
 def test_requestor_cycle_sessions(mocker: MockerFixture) -> None:
     # HACK: we need to purge the _thread_context to not interfere
     # with other tests
     from apacai.api_requestor import _thread_context
 
-    delattr(_thread_context, "session")
+    _thread_context.sessions = {}
 
     api_requestor = APIRequestor(key="test_key", api_type="azure_ad")
 
     mock_session = mocker.MagicMock()
-    mocker.patch("apacai.api_requestor._make_session", lambda: mock_session)
+    mocker.patch("apacai.api_requestor._make_session", lambda config: mock_session)
 
     # We don't call `session.close()` if not enough time has elapsed
     api_requestor.request_raw("get", "http://example.com")
@@ -93,9 +122,117 @@ def test_requestor_cycle_sessions(mocker: MockerFixture) -> None:
     # Due to 0 lifetime, the original session will be closed before the next call
     # and a new session will be created
     mock_session_2 = mocker.MagicMock()
-    mocker.patch("apacai.api_requestor._make_session", lambda: mock_session_2)
+    mocker.patch("apacai.api_requestor._make_session", lambda config: mock_session_2)
+    api_requestor.request_raw("get", "http://example.com")
+    mock_session.close.assert_called()
+    mock_session_2.request.assert_called()
+
+    _thread_context.sessions = {}
+
+
+@pytest.mark.requestor
+def test_requestor_idle_sessions_are_recycled(mocker: MockerFixture) -> None:
+    from apacai.api_requestor import RequestsPoolConfig, _thread_context
+
+    _thread_context.sessions = {}
+
+    config = RequestsPoolConfig(idle_timeout=60)
+    api_requestor = APIRequestor(key="test_key", pool_config=config)
+
+    mock_session = mocker.MagicMock()
+    mocker.patch("apacai.api_requestor._make_session", lambda config: mock_session)
+    api_requestor.request_raw("get", "http://example.com")
+
+    mock_session_2 = mocker.MagicMock()
+    mocker.patch("apacai.api_requestor._make_session", lambda config: mock_session_2)
+    _thread_context.sessions[config].last_used -= 61
     api_requestor.request_raw("get", "http://example.com")
     mock_session.close.assert_called()
     mock_session_2.request.assert_called()
 
-    delattr(_thread_context, "session")
+    _thread_context.sessions = {}
+
+
+@pytest.mark.requestor
+def test_requestor_pool_config(mocker: MockerFixture) -> None:
+    from apacai.api_requestor import RequestsPoolConfig, _thread_context
+
+    _thread_context.sessions = {}
+    mocker.patch("apacai.requests_pool_maxsize", 32)
+
+    default_requestor = APIRequestor(key="test_key")
+    custom_requestor = APIRequestor(
+        key="test_key", pool_config=RequestsPoolConfig(pool_maxsize=4, pool_block=True)
+    )
+
+    sessions = []
+
+    def fake_request(self, *args, **kwargs):
+        sessions.append(self)
+        return requests.Response()
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+    default_requestor.request_raw("get", "https://example.com")
+    custom_requestor.request_raw("get", "https://example.com")
+    default_requestor.request_raw("get", "https://example.com")
+
+    assert sessions[0] is sessions[2]
+    assert sessions[0] is not sessions[1]
+    default_adapter = sessions[0].get_adapter("https://example.com")
+    custom_adapter = sessions[1].get_adapter("https://example.com")
+    assert default_adapter._pool_maxsize == 32
+    assert custom_adapter._pool_maxsize == 4
+    assert custom_adapter._pool_block
+
+    _thread_context.sessions = {}
+
+
+@pytest.mark.requestor
+def test_requestor_pooled_aiohttp_session_closed_on_loop_shutdown() -> None:
+    async def get_session():
+        async with api_requestor_module.aiohttp_session() as session:
+            return session
+
+    session = asyncio.run(get_session())
+    assert session.closed
+
+
+@pytest.mark.requestor
+def test_requestor_streams_server_sent_events(mocker: MockerFixture) -> None:
+    body = (
+        b'data: {"id": "a"}\r\n\r\n'
+        b": comment\r\n"
+        b'data: {"id":\r\ndata: "b"}\r\n\r\n'
+        b"data: [DONE]\r\n\r\n"
+    )
+
+    def fake_request(self, *args, **kwargs):
+        r = requests.Response()
+        r.status_code = 200
+        r.headers["content-type"] = "text/event-stream"
+        r.raw = io.BytesIO(body)
+        return r
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+    resp, got_stream, _ = APIRequestor(key="test_key").request(
+        "post", "/completions", {}, stream=True
+    )
+    assert got_stream
+    assert [r.data for r in resp] == [{"id": "a"}, {"id": "b"}]
+
+
+@pytest.mark.requestor
+def test_requestor_raises_stream_errors(mocker: MockerFixture) -> None:
+    def fake_request(self, *args, **kwargs):
+        r = requests.Response()
+        r.status_code = 200
+        r.headers["content-type"] = "text/event-stream"
+        r.raw = io.BytesIO(b'data: {"error": {"message": "boom"}}\n\n')
+        return r
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+    resp, _, _ = APIRequestor(key="test_key").request(
+        "post", "/completions", {}, stream=True
+    )
+    with pytest.raises(error.APIError, match="boom"):
+        list(resp)
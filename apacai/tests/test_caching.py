@@ -0,0 +1,145 @@
+import base64
+import json
+
+import numpy as np
+import pytest
+import requests
+from pytest_mock import MockerFixture
+
+import apacai
+from apacai import caching
+from apacai.caching import EmbeddingCache
+
+
+def vec(*values):
+    return np.array(values, dtype="float32")
+
+
+def test_memory_cache_evicts_least_recently_used() -> None:
+    cache = EmbeddingCache(max_items=2)
+    cache.set_many("m", ["a", "b"], [vec(1), vec(2)])
+    cache.get_many("m", ["a"])
+    cache.set_many("m", ["c"], [vec(3)])
+
+    found = cache.get_many("m", ["a", "b", "c"])
+    assert found[1] is None
+    assert found[0].tolist() == [1.0] and found[2].tolist() == [3.0]
+    assert cache.get_many("other-model", ["a"]) == [None]
+    assert cache.stats() == {
+        "hits": 3,
+        "misses": 2,
+        "hit_rate": 0.6,
+        "memory_items": 2,
+    }
+
+
+def test_entries_expire_after_ttl(monkeypatch, tmp_path) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(caching.time, "time", lambda: now[0])
+    cache = EmbeddingCache(path=str(tmp_path / "cache.db"), ttl=60)
+    cache.set_many("m", ["a"], [vec(1)])
+
+    now[0] += 59
+    assert cache.get_many("m", ["a"])[0].tolist() == [1.0]
+    now[0] += 2
+    assert cache.get_many("m", ["a"]) == [None]
+    assert EmbeddingCache(path=str(tmp_path / "cache.db"), ttl=60).get_many(
+        "m", ["a"]
+    ) == [None]
+
+
+def test_disk_cache_is_shared_and_bounded(monkeypatch, tmp_path) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(caching.time, "time", lambda: now[0])
+    path = str(tmp_path / "cache.db")
+    writer = EmbeddingCache(path=path, max_disk_bytes=3 * 8)
+    writer.set_many("m", ["a", "b", "c"], [vec(1, 1), vec(2, 2), vec(3, 3)])
+
+    now[0] += 1
+    reader = EmbeddingCache(path=path)
+    assert reader.get_many("m", ["a"])[0].tolist() == [1.0, 1.0]
+    now[0] += 1
+    writer.set_many("m", ["d"], [vec(4, 4)])
+
+    found = EmbeddingCache(path=path).get_many("m", ["a", "b", "c", "d"])
+    # One of "b" and "c", the least recently used vectors, made room for "d".
+    assert found[0] is not None and found[3] is not None
+    assert sum(v is None for v in found) == 1
+    assert found[3].tolist() == [4.0, 4.0]
+
+
+def mock_embeddings(mocker: MockerFixture) -> list:
+    sent = []
+
+    def fake_request(self, method, url, data=None, **kwargs):
+        inputs = json.loads(data)["input"]
+        sent.append(inputs)
+        data = [
+            {
+                "object": "embedding",
+                "index": i,
+                "embedding": base64.b64encode(vec(len(t), 1).tobytes()).decode(),
+            }
+            for i, t in enumerate(inputs)
+        ]
+        r = requests.Response()
+        r.status_code = 200
+        r._content = json.dumps(
+            {"object": "list", "data": data, "usage": {"total_tokens": len(inputs)}}
+        ).encode()
+        return r
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+    return sent
+
+
+def test_create_only_requests_cache_misses(mocker: MockerFixture, monkeypatch) -> None:
+    sent = mock_embeddings(mocker)
+    monkeypatch.setattr(apacai, "embedding_cache", EmbeddingCache())
+    model = "text-embedding-ada-002"
+
+    resp = apacai.Embedding.create(input=["a", "bb"], model=model)
+    assert [d.embedding for d in resp.data] == [[1.0, 1.0], [2.0, 1.0]]
+
+    resp = apacai.Embedding.create(input=["bb", "ccc", "ccc", "a"], model=model)
+    assert sent == [["a", "bb"], ["ccc"]]
+    assert [d.embedding for d in resp.data] == [
+        [2.0, 1.0],
+        [3.0, 1.0],
+        [3.0, 1.0],
+        [1.0, 1.0],
+    ]
+    assert resp.usage.total_tokens == 1
+
+    matrix = apacai.Embedding.create(input="ccc", model=model, return_numpy=True)
+    assert len(sent) == 2
+    np.testing.assert_array_equal(matrix, [[3.0, 1.0]])
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"cache": None}, {"encoding_format": "base64"}, {"input": [[1, 2, 3]]}],
+)
+def test_create_bypasses_cache(mocker: MockerFixture, monkeypatch, kwargs) -> None:
+    sent = mock_embeddings(mocker)
+    monkeypatch.setattr(apacai, "embedding_cache", EmbeddingCache())
+    params = dict({"input": ["a"], "model": "text-embedding-ada-002"}, **kwargs)
+
+    apacai.Embedding.create(**params)
+    apacai.Embedding.create(**params)
+    assert len(sent) == 2
+
+
+def test_cache_key_includes_options_and_api_base(
+    mocker: MockerFixture, monkeypatch
+) -> None:
+    sent = mock_embeddings(mocker)
+    monkeypatch.setattr(apacai, "embedding_cache", EmbeddingCache())
+    params = {"input": ["a"], "model": "text-embedding-3-small"}
+
+    apacai.Embedding.create(**params)
+    apacai.Embedding.create(dimensions=2, **params)
+    apacai.Embedding.create(dimensions=2, **params)
+    apacai.Embedding.create(api_base="https://other.example.com/v1", **params)
+    apacai.Embedding.create(user="someone", **params)
+    assert len(sent) == 3
@@ -0,0 +1,133 @@
+import base64
+import json
+
+import numpy as np
+import pytest
+import requests
+from pytest_mock import MockerFixture
+
+import apacai
+
+VECTORS = np.array([[0.5, -1.0, 2.0], [0.25, 3.0, -0.125]], dtype="float32")
+
+
+def mock_embeddings(mocker: MockerFixture, encoding_format: str) -> list:
+    sent = []
+
+    def fake_request(self, method, url, data=None, **kwargs):
+        sent.append(json.loads(data))
+        data = [
+            {
+                "object": "embedding",
+                "index": i,
+                "embedding": base64.b64encode(v.tobytes()).decode()
+                if encoding_format == "base64"
+                else v.tolist(),
+            }
+            for i, v in enumerate(VECTORS)
+        ]
+        r = requests.Response()
+        r.status_code = 200
+        r.headers["content-type"] = "application/json"
+        # The API does not promise to return the inputs in order.
+        r._content = json.dumps({"object": "list", "data": data[::-1]}).encode()
+        return r
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+    return sent
+
+
+@pytest.mark.parametrize("encoding_format", ["base64", "float"])
+def test_create_return_numpy(mocker: MockerFixture, encoding_format) -> None:
+    sent = mock_embeddings(mocker, encoding_format)
+    kwargs = {} if encoding_format == "base64" else {"encoding_format": "float"}
+
+    matrix = apacai.Embedding.create(
+        input=["a", "b"], model="text-embedding-ada-002", return_numpy=True, **kwargs
+    )
+    assert sent[0]["encoding_format"] == encoding_format
+    assert "return_numpy" not in sent[0]
+    assert matrix.dtype == np.float32
+    assert matrix.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(matrix, VECTORS)
+
+
+def test_create_returns_lists_by_default(mocker: MockerFixture) -> None:
+    mock_embeddings(mocker, "base64")
+    resp = apacai.Embedding.create(input=["a", "b"], model="text-embedding-ada-002")
+    assert resp.data[1].embedding == VECTORS[0].tolist()
+
+
+def mock_echo_embeddings(mocker: MockerFixture) -> list:
+    """Embeds each input "<n>" as the vector [n, -n]."""
+    batches = []
+
+    def fake_request(self, method, url, data=None, **kwargs):
+        inputs = json.loads(data)["input"]
+        batches.append(inputs)
+        if "fail" in inputs:
+            r = requests.Response()
+            r.status_code = 400
+            r._content = b'{"error": {"message": "bad input"}}'
+            return r
+        data = [
+            {
+                "object": "embedding",
+                "index": i,
+                "embedding": base64.b64encode(
+                    np.array([float(t), -float(t)], dtype="float32").tobytes()
+                ).decode(),
+            }
+            for i, t in enumerate(inputs)
+        ]
+        r = requests.Response()
+        r.status_code = 200
+        r._content = json.dumps({"object": "list", "data": data}).encode()
+        return r
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+    return batches
+
+
+def test_split_input() -> None:
+    split = apacai.Embedding._split_input
+    assert list(split("abc", 2, None)) == [(0, ["abc"])]
+    assert list(split([1, 2, 3], 2, None)) == [(0, [[1, 2, 3]])]
+    assert list(split(iter("abcde"), 2, None)) == [
+        (0, ["a", "b"]),
+        (2, ["c", "d"]),
+        (4, ["e"]),
+    ]
+    # Three tokens each, and an input over the budget still gets its own batch.
+    texts = ["x" * 12, "x" * 12, "x" * 40, "x" * 12]
+    assert [len(b) for _, b in split(texts, 10, 7)] == [2, 1, 1]
+
+
+@pytest.mark.parametrize("return_numpy", [False, True])
+def test_create_many(mocker: MockerFixture, return_numpy) -> None:
+    batches = mock_echo_embeddings(mocker)
+    texts = [str(i) for i in range(10)]
+
+    results = list(
+        apacai.Embedding.create_many(
+            texts,
+            model="text-embedding-ada-002",
+            max_batch_size=3,
+            max_concurrency=2,
+            return_numpy=return_numpy,
+        )
+    )
+    assert sorted(batches) == [texts[0:3], texts[3:6], texts[6:9], texts[9:]]
+    assert [start for start, _ in results] == [0, 3, 6, 9]
+    vectors = [list(v) for _, batch in results for v in batch]
+    assert vectors == [[float(i), -float(i)] for i in range(10)]
+
+
+def test_create_many_raises_batch_errors(mocker: MockerFixture) -> None:
+    mock_echo_embeddings(mocker)
+    results = apacai.Embedding.create_many(
+        ["1", "2", "fail", "4"], model="text-embedding-ada-002", max_batch_size=2
+    )
+    assert next(results)[0] == 0
+    with pytest.raises(apacai.error.InvalidRequestError, match="bad input"):
+        next(results)
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from apacai.embeddings_index import FlatIndex, IVFIndex, top_k
+
+
+def clustered_vectors(n=2000, dim=16, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    points = centers[rng.integers(clusters, size=n)] + 0.1 * rng.normal(size=(n, dim))
+    return points.astype("float32")
+
+
+def exact_neighbors(vectors, queries, k):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return top_k(1 - queries @ vectors.T, k)
+
+
+def test_top_k() -> None:
+    distances = np.array([[0.5, 0.1, 0.9, 0.3], [0.2, 0.8, 0.0, 0.4]])
+    np.testing.assert_array_equal(top_k(distances, 2), [[1, 3], [2, 0]])
+    np.testing.assert_array_equal(top_k(distances[0], 10), [1, 3, 0, 2])
+
+
+def test_flat_index_search_add_remove_and_filter() -> None:
+    vectors = clustered_vectors()
+    queries = vectors[:5] + 0.01
+    index = FlatIndex()
+    ids = index.add(vectors[:1000])
+    index.add(vectors[1000:])
+    assert len(index) == 2000
+    assert ids[0] == 0 and index.ids[-1] == 1999
+
+    found, distances = index.search(queries, k=10)
+    np.testing.assert_array_equal(found, exact_neighbors(vectors, queries, 10))
+    assert np.all(np.diff(distances, axis=1) >= 0)
+
+    single, _ = index.search(queries[0], k=3)
+    np.testing.assert_array_equal(single, found[0, :3])
+
+    assert index.remove([found[0, 0], 123456]) == 1
+    assert index.search(queries[0], k=1)[0][0] == found[0, 1]
+
+    even, _ = index.search(queries, k=5, filter=lambda ids: ids % 2 == 0)
+    assert np.all(even % 2 == 0)
+    some, _ = index.search(queries[0], k=5, filter={7, 8})
+    assert sorted(some[:2]) == [7, 8] and list(some[2:]) == [-1, -1, -1]
+
+
+def test_empty_index() -> None:
+    ids, distances = FlatIndex().search(np.ones(4), k=2)
+    assert list(ids) == [-1, -1] and np.all(np.isinf(distances))
+    ids, _ = IVFIndex().search(np.ones((3, 4)), k=2)
+    assert ids.shape == (3, 2)
+
+
+def test_ivf_index_recall_and_filter() -> None:
+    vectors = clustered_vectors()
+    queries = clustered_vectors(n=20, seed=1)
+    index = IVFIndex(n_lists=40, n_probe=6)
+    index.add(vectors[:1500])
+    index.add(vectors[1500:], ids=np.arange(1500, 2000) + 10_000)
+
+    expected = exact_neighbors(vectors, queries, 10)
+    expected = np.where(expected >= 1500, expected + 10_000, expected)
+    found, _ = index.search(queries, k=10)
+    recall = np.mean([len(set(f) & set(e)) / 10 for f, e in zip(found, expected)])
+    assert recall > 0.9
+
+    exact, _ = index.search(queries, k=10, n_probe=40)
+    np.testing.assert_array_equal(exact, expected)
+
+    found, _ = index.search(queries, k=10, filter=lambda ids: ids >= 10_000)
+    assert np.all((found >= 10_000) | (found == -1))
+
+
+def test_ivf_index_trains_once_it_has_enough_vectors() -> None:
+    vectors = clustered_vectors()
+    index = IVFIndex(n_lists=40)
+    index.add(vectors[:10])
+    assert index.centroids is None and index.n_lists == 40
+    found, _ = index.search(vectors[:3], k=2)
+    np.testing.assert_array_equal(found, exact_neighbors(vectors[:10], vectors[:3], 2))
+
+    index.add(vectors[10:])
+    assert index.centroids.shape == (40, 16) and index.n_lists == 40
+    found, _ = index.search(vectors[:3], k=1, n_probe=40)
+    np.testing.assert_array_equal(found[:, 0], [0, 1, 2])
+
+
+@pytest.mark.parametrize("index_class", [FlatIndex, IVFIndex])
+def test_save_and_load(tmp_path, index_class) -> None:
+    vectors = clustered_vectors(n=500)
+    index = index_class()
+    index.add(vectors)
+    index.remove([3])
+    expected = index.search(vectors[:4], k=5)
+    index.save(str(tmp_path / "index"))
+
+    loaded = index_class.load(str(tmp_path / "index"))
+    assert isinstance(loaded.vectors, np.memmap)
+    found = loaded.search(vectors[:4], k=5)
+    np.testing.assert_array_equal(found[0], expected[0])
+    np.testing.assert_allclose(found[1], expected[1], rtol=1e-6)
+
+    # Loaded indexes are copied into memory when they change.
+    assert list(loaded.add(vectors[3:4])) == [500]
+    assert loaded.search(vectors[3], k=1)[0][0] == 500
+
+    other = FlatIndex if index_class is IVFIndex else IVFIndex
+    with pytest.raises(ValueError):
+        other.load(str(tmp_path / "index"))
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from apacai import embeddings_quantization
+from apacai.embeddings_index import top_k
+from apacai.embeddings_quantization import (
+    BinaryEmbeddings,
+    Float16Embeddings,
+    Int8Embeddings,
+    quantize,
+)
+
+
+def embeddings(n=1000, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(n, dim)).astype("float32")
+
+
+def exact_neighbors(vectors, queries, k):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return top_k(1 - queries @ vectors.T, k)
+
+
+@pytest.mark.parametrize(
+    "method, cls, ratio, tolerance",
+    [
+        ("float16", Float16Embeddings, 2, 1e-3),
+        ("int8", Int8Embeddings, 3.5, 0.02),
+        ("binary", BinaryEmbeddings, 32, None),
+    ],
+)
+def test_quantize(method, cls, ratio, tolerance) -> None:
+    vectors = embeddings()
+    quantized = quantize(vectors, method)
+    assert isinstance(quantized, cls)
+    assert quantized.shape == vectors.shape and len(quantized) == 1000
+    assert vectors.nbytes / quantized.nbytes >= ratio
+
+    decoded = quantized.dequantize()
+    assert decoded.dtype == np.float32 and decoded.shape == vectors.shape
+    np.testing.assert_array_equal(quantized[5:10], decoded[5:10])
+    np.testing.assert_array_equal(quantized[[1, 3]], decoded[[1, 3]])
+    np.testing.assert_array_equal(np.asarray(quantized), decoded)
+    if tolerance is None:
+        np.testing.assert_array_equal(decoded, np.where(vectors > 0, 1, -1))
+    else:
+        scale = np.abs(vectors).max(axis=1, keepdims=True)
+        assert np.all(np.abs(decoded - vectors) <= tolerance * scale)
+
+
+def test_quantize_rejects_unknown_method() -> None:
+    with pytest.raises(ValueError, match="method"):
+        quantize(embeddings(), "int4")
+
+
+def test_hamming_distances() -> None:
+    codes = BinaryEmbeddings.from_float([[1, -1, 1, -1], [1, 1, 1, 1]])
+    np.testing.assert_array_equal(codes.hamming_distances([1, 1, 1, -1]), [1, 1])
+    np.testing.assert_array_equal(
+        codes.hamming_distances([[-1, -1, -1, -1]]), [[2, 4]]
+    )
+
+
+def test_hamming_distances_without_bitwise_count(monkeypatch) -> None:
+    monkeypatch.delattr(np, "bitwise_count", raising=False)
+    codes = BinaryEmbeddings.from_float(embeddings(n=50))
+    queries = embeddings(n=3, seed=1)
+    expected = (
+        (queries[:, None, :] > 0) != (embeddings(n=50)[None, :, :] > 0)
+    ).sum(axis=-1)
+    np.testing.assert_array_equal(codes.hamming_distances(queries), expected)
+
+
+def test_binary_search_with_rescoring(monkeypatch) -> None:
+    monkeypatch.setattr(embeddings_quantization, "MAX_CHUNK_ELEMENTS", 1000)
+    vectors = embeddings(n=2000)
+    queries = vectors[:20] + 0.3 * embeddings(n=20, seed=1)
+    codes = quantize(vectors, "binary")
+    expected = exact_neighbors(vectors, queries, 10)
+
+    found, distances = codes.search(
+        queries, k=10, candidates=400, rescore_embeddings=vectors
+    )
+    assert found.shape == (20, 10)
+    assert np.all(np.diff(distances, axis=1) >= 0)
+    recall = np.mean([len(set(f) & set(e)) / 10 for f, e in zip(found, expected)])
+    assert recall >= 0.8
+
+    exhaustive, _ = codes.search(
+        queries, k=10, candidates=2000, rescore_embeddings=vectors
+    )
+    np.testing.assert_array_equal(exhaustive, expected)
+
+    int8 = quantize(vectors, "int8")
+    single, _ = codes.search(queries[0], k=3, rescore_embeddings=int8)
+    assert single.shape == (3,)
+    assert single[0] == 0
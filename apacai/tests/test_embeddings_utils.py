@@ -0,0 +1,414 @@
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import apacai
+
+embeddings_utils = pytest.importorskip("apacai.embeddings_utils")
+
+
+def fake_embeddings(calls):
+    def create(input, **kwargs):
+        calls.append(list(input))
+        data = [
+            {"object": "embedding", "index": i, "embedding": [float(len(t))]}
+            for i, t in enumerate(input)
+        ]
+        return {"object": "list", "data": data[::-1]}
+
+    return create
+
+
+def test_coalescer_merges_concurrent_calls(monkeypatch) -> None:
+    calls = []
+    monkeypatch.setattr(apacai.Embedding, "create", fake_embeddings(calls))
+    coalescer = embeddings_utils.EmbeddingCoalescer(max_batch_size=8, max_wait=5)
+
+    results = {}
+
+    def embed(text):
+        results[text] = coalescer.get_embedding(text)
+
+    threads = [threading.Thread(target=embed, args=("x" * n,)) for n in range(1, 9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(calls[0]) == sorted(results)
+    assert all(results[text] == [float(len(text))] for text in results)
+
+
+def test_coalescer_sends_partial_batch_after_max_wait(monkeypatch) -> None:
+    calls = []
+    monkeypatch.setattr(apacai.Embedding, "create", fake_embeddings(calls))
+    coalescer = embeddings_utils.EmbeddingCoalescer(max_wait=0.01)
+
+    assert coalescer.get_embedding("a\nb") == [3.0]
+    assert calls == [["a b"]]
+
+
+def test_coalescer_raises_for_every_caller(monkeypatch) -> None:
+    def create(**kwargs):
+        raise apacai.error.RateLimitError("slow down")
+
+    monkeypatch.setattr(apacai.Embedding, "create", create)
+    coalescer = embeddings_utils.EmbeddingCoalescer(max_wait=0.01)
+    with pytest.raises(apacai.error.RateLimitError):
+        coalescer.get_embedding("a")
+
+
+@pytest.mark.asyncio
+async def test_coalescer_merges_concurrent_coroutines(monkeypatch) -> None:
+    import asyncio
+
+    calls = []
+    create = fake_embeddings(calls)
+
+    async def acreate(**kwargs):
+        return create(**kwargs)
+
+    monkeypatch.setattr(apacai.Embedding, "acreate", acreate)
+    coalescer = embeddings_utils.EmbeddingCoalescer(max_batch_size=3, max_wait=0.01)
+
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+    results = await asyncio.gather(*(coalescer.aget_embedding(t) for t in texts))
+    assert results == [[float(len(t))] for t in texts]
+    assert calls == [texts[:3], texts[3:]]
+
+
+def test_coalescer_fails_callers_when_interrupted(monkeypatch) -> None:
+    def create(**kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(apacai.Embedding, "create", create)
+    coalescer = embeddings_utils.EmbeddingCoalescer(max_batch_size=2, max_wait=5)
+    errors = []
+
+    def embed():
+        try:
+            coalescer.get_embedding("a")
+        except KeyboardInterrupt as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=embed) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    assert len(errors) == 2
+
+
+def test_coalescer_fails_callers_when_leader_is_interrupted(monkeypatch) -> None:
+    monkeypatch.setattr(apacai.Embedding, "create", fake_embeddings([]))
+    go = threading.Event()
+
+    class InterruptedEvent(threading.Event):
+        def wait(self, timeout=None):
+            go.wait()
+            raise KeyboardInterrupt
+
+    class Batch(embeddings_utils._Batch):
+        def __init__(self):
+            super().__init__()
+            self.full = InterruptedEvent()
+
+    monkeypatch.setattr(embeddings_utils, "_Batch", Batch)
+    coalescer = embeddings_utils.EmbeddingCoalescer(max_batch_size=3, max_wait=5)
+    errors = []
+
+    def embed():
+        try:
+            coalescer.get_embedding("a")
+        except KeyboardInterrupt as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=embed, daemon=True) for _ in range(2)]
+    for t in threads:
+        t.start()
+        # The first thread leads, the second waits for its result.
+        while len(coalescer._batch.texts) < threads.index(t) + 1:
+            time.sleep(0.001)
+    go.set()
+    for t in threads:
+        t.join(timeout=5)
+    assert len(errors) == 2
+    # The next call starts a new batch.
+    assert coalescer._batch.texts == []
+
+
+@pytest.mark.asyncio
+async def test_coalescer_fails_coroutines_when_cancelled(monkeypatch) -> None:
+    import asyncio
+
+    started = asyncio.Event()
+
+    async def acreate(**kwargs):
+        started.set()
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(apacai.Embedding, "acreate", acreate)
+    coalescer = embeddings_utils.EmbeddingCoalescer(max_wait=0)
+    waiter = asyncio.ensure_future(coalescer.aget_embedding("a"))
+    await started.wait()
+    (task,) = coalescer._tasks
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(waiter, 5)
+    await asyncio.sleep(0)
+    assert not coalescer._tasks
+
+
+def test_get_embedding_retries_connection_errors(monkeypatch) -> None:
+    errors = [apacai.error.APIConnectionError("reset"), apacai.error.Timeout("slow")]
+
+    def create(input, **kwargs):
+        if errors:
+            raise errors.pop(0)
+        return fake_embeddings([])(input)
+
+    delays = []
+    monkeypatch.setattr(apacai.Embedding, "create", create)
+    monkeypatch.setattr(embeddings_utils.time, "sleep", delays.append)
+    assert embeddings_utils.get_embedding("abc") == [3.0]
+    assert len(delays) == 2 and all(1 <= d <= 4 for d in delays)
+
+
+@pytest.mark.asyncio
+async def test_aget_embedding_retries_connection_errors(monkeypatch) -> None:
+    errors = [apacai.error.APIConnectionError("reset")]
+
+    async def acreate(input, **kwargs):
+        if errors:
+            raise errors.pop(0)
+        return fake_embeddings([])(input)
+
+    async def sleep(delay):
+        pass
+
+    monkeypatch.setattr(apacai.Embedding, "acreate", acreate)
+    monkeypatch.setattr(embeddings_utils.asyncio, "sleep", sleep)
+    assert await embeddings_utils.aget_embedding("ab") == [2.0]
+    assert not errors
+
+
+def test_get_embedding_gives_up_after_six_attempts(monkeypatch) -> None:
+    attempts = []
+
+    def create(**kwargs):
+        attempts.append(kwargs)
+        raise apacai.error.APIConnectionError("reset")
+
+    monkeypatch.setattr(apacai.Embedding, "create", create)
+    monkeypatch.setattr(embeddings_utils.time, "sleep", lambda delay: None)
+    with pytest.raises(apacai.error.APIConnectionError):
+        embeddings_utils.get_embeddings(["a"])
+    assert len(attempts) == 6
+
+
+def test_get_embeddings_returns_lists_unless_asked(monkeypatch) -> None:
+    np = pytest.importorskip("numpy")
+
+    def create(input, return_numpy, **kwargs):
+        if return_numpy:
+            return np.array([[float(len(t))] for t in input], dtype="float32")
+        data = [{"index": i, "embedding": [float(len(t))]} for i, t in enumerate(input)]
+        return {"object": "list", "data": data}
+
+    monkeypatch.setattr(apacai.Embedding, "create", create)
+    assert embeddings_utils.get_embeddings(["a", "bb"]) == [[1.0], [2.0]]
+    matrix = embeddings_utils.get_embeddings(["a", "bb"], return_numpy=True)
+    np.testing.assert_array_equal(matrix, [[1.0], [2.0]])
+
+METRICS = {
+    "cosine": "cosine",
+    "L1": "cityblock",
+    "L2": "euclidean",
+    "Linf": "chebyshev",
+}
+
+
+@pytest.mark.parametrize("metric", sorted(METRICS))
+@pytest.mark.parametrize("chunk_size", [None, 7])
+def test_distances_match_scipy(metric, chunk_size) -> None:
+    np = pytest.importorskip("numpy")
+    distance = pytest.importorskip("scipy.spatial.distance")
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(50, 16))
+    queries = rng.normal(size=(3, 16))
+    expected = distance.cdist(queries, embeddings, METRICS[metric])
+
+    distances = embeddings_utils.distances_from_embeddings(
+        queries, embeddings, metric, chunk_size=chunk_size
+    )
+    np.testing.assert_allclose(distances, expected, atol=1e-9)
+
+    single = embeddings_utils.distances_from_embeddings(
+        list(queries[0]), [list(e) for e in embeddings], metric, chunk_size=chunk_size
+    )
+    np.testing.assert_allclose(single, expected[0], atol=1e-9)
+
+
+def test_distances_reject_unknown_metric() -> None:
+    with pytest.raises(ValueError, match="distance_metric"):
+        embeddings_utils.distances_from_embeddings([1.0], [[1.0]], "L3")
+
+
+def test_top_k_and_nearest_neighbors() -> None:
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(1)
+    embeddings = rng.normal(size=(100, 8)).astype("float32")
+    queries = rng.normal(size=(4, 8)).astype("float32")
+
+    distances = embeddings_utils.distances_from_embeddings(queries, embeddings)
+    expected = np.argsort(distances, axis=-1)[:, :5]
+    np.testing.assert_array_equal(embeddings_utils.top_k(distances, 5), expected)
+    np.testing.assert_array_equal(
+        embeddings_utils.indices_of_nearest_neighbors_from_distances(distances[0], 5),
+        expected[0],
+    )
+
+    indices, nearest = embeddings_utils.nearest_neighbors_from_embeddings(
+        queries, embeddings, 5, chunk_size=9
+    )
+    np.testing.assert_array_equal(indices, expected)
+    np.testing.assert_allclose(
+        nearest, np.take_along_axis(distances, expected, axis=-1), rtol=1e-6
+    )
+    indices, _ = embeddings_utils.nearest_neighbors_from_embeddings(
+        queries[0], embeddings, 200, distance_metric="L1"
+    )
+    assert indices.shape == (100,)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_embedding_store_append_and_search(tmp_path, dtype) -> None:
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(30, 8)).astype("float32")
+    path = str(tmp_path / "store")
+
+    store = embeddings_utils.EmbeddingStore(path, dtype=dtype)
+    assert len(store) == 0 and store.vectors.shape == (0, 0)
+    assert store.append(vectors[:10]) == range(0, 10)
+    assert store.append(vectors[10:], [{"n": i} for i in range(10, 30)]) == range(
+        10, 30
+    )
+
+    reopened = embeddings_utils.EmbeddingStore(path)
+    assert len(reopened) == 30
+    assert isinstance(reopened.vectors, np.memmap)
+    assert reopened.vectors.dtype == np.dtype(dtype)
+    np.testing.assert_allclose(reopened.vectors, vectors, rtol=1e-3, atol=1e-3)
+    assert reopened.get_metadata([0, 12, 29]) == [{}, {"n": 12}, {"n": 29}]
+
+    rows, _ = reopened.search(vectors[:2], k=3, chunk_size=7)
+    expected = embeddings_utils.top_k(
+        embeddings_utils.distances_from_embeddings(vectors[:2], vectors), 3
+    )
+    np.testing.assert_array_equal(rows, expected)
+
+    with pytest.raises(ValueError):
+        reopened.append(np.ones((1, 4)))
+
+
+def test_embedding_store_ignores_interrupted_appends(tmp_path) -> None:
+    np = pytest.importorskip("numpy")
+    path = str(tmp_path / "store")
+    store = embeddings_utils.EmbeddingStore(path, dim=2)
+    store.append([[1.0, 0.0]], [{"id": "a"}])
+
+    # Data written after the last committed append is not visible...
+    with open(str(tmp_path / "store" / "vectors.bin"), "ab") as f:
+        f.write(np.ones(6, dtype="float32").tobytes())
+    with open(str(tmp_path / "store" / "metadata.jsonl"), "ab") as f:
+        f.write(b'{"id": "partial"')
+    assert len(store) == 1
+
+    # ...and is replaced by the next one.
+    store.append([[0.0, 1.0]], [{"id": "b"}])
+    np.testing.assert_array_equal(store.vectors, [[1.0, 0.0], [0.0, 1.0]])
+    assert store.get_metadata([0, 1]) == [{"id": "a"}, {"id": "b"}]
+
+
+def test_embedding_store_add_texts(tmp_path, monkeypatch) -> None:
+    np = pytest.importorskip("numpy")
+
+    def create_many(texts, return_numpy, **kwargs):
+        assert return_numpy and kwargs == {"model": "m"}
+        texts = list(texts)
+        for start in range(0, len(texts), 2):
+            batch = texts[start : start + 2]
+            yield start, np.array([[len(t), 1.0] for t in batch], dtype="float32")
+
+    monkeypatch.setattr(apacai.Embedding, "create_many", create_many)
+    store = embeddings_utils.EmbeddingStore(str(tmp_path / "store"))
+    rows = store.add_texts(["a", "bb\nb", "c"], [{"k": 1}, {"k": 2}, {"k": 3}], model="m")
+    assert rows == range(0, 3)
+    np.testing.assert_array_equal(store.vectors[:, 0], [1, 4, 1])
+    assert store.get_metadata([1]) == [{"k": 2, "text": "bb b"}]
+
+
+@pytest.mark.parametrize("method", ["float16", "int8", "binary"])
+def test_distances_from_quantized_embeddings(method) -> None:
+    np = pytest.importorskip("numpy")
+    from apacai.embeddings_quantization import quantize
+
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(40, 16)).astype("float32")
+    quantized = quantize(vectors, method)
+    decoded = quantized.dequantize()
+
+    np.testing.assert_allclose(
+        embeddings_utils.distances_from_embeddings(vectors[:2], quantized, chunk_size=9),
+        embeddings_utils.distances_from_embeddings(vectors[:2], decoded),
+        rtol=1e-5,
+    )
+    np.testing.assert_allclose(
+        embeddings_utils.cosine_similarity(vectors[0], quantized),
+        1 - embeddings_utils.distances_from_embeddings(vectors[0], decoded),
+        rtol=1e-5,
+    )
+
+
+def test_cosine_similarity_accepts_a_matrix_on_either_side() -> None:
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(4)
+    matrix = rng.normal(size=(3, 4))
+    vector = rng.normal(size=4)
+    expected = [
+        np.dot(row, vector) / (np.linalg.norm(row) * np.linalg.norm(vector))
+        for row in matrix
+    ]
+    assert embeddings_utils.cosine_similarity(vector, vector) == pytest.approx(1.0)
+    np.testing.assert_allclose(
+        embeddings_utils.cosine_similarity(vector, matrix), expected
+    )
+    np.testing.assert_allclose(
+        embeddings_utils.cosine_similarity(matrix, vector), expected
+    )
+    assert embeddings_utils.cosine_similarity(matrix, matrix[:2]).shape == (3, 2)
+
+
+HEAVY_MODULES = ("matplotlib", "pandas", "plotly", "scipy", "sklearn", "tenacity")
+
+
+def test_import_does_not_load_heavy_dependencies() -> None:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import apacai.embeddings_utils"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines look like "import time: self [us] | cumulative | module".
+    imported = {
+        line.rsplit("|", 1)[1].strip().split(".")[0]
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "|" in line
+    }
+    assert "apacai" in imported
+    assert not imported.intersection(HEAVY_MODULES)
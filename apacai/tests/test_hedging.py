@@ -0,0 +1,176 @@
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+from apacai import error
+from apacai.api_requestor import APIRequestor
+from apacai.hedging import HedgingPolicy, is_idempotent
+
+SLOW_SECS = 1.0
+
+
+class SlowFirstHandler(http.server.BaseHTTPRequestHandler):
+    """Answers the first `slow_requests` requests after `delay` seconds, and the
+    others at once."""
+
+    def respond(self):
+        with self.server.lock:
+            self.server.requests.append(self.path)
+            slow = len(self.server.requests) <= self.server.slow_requests
+        if slow:
+            time.sleep(self.server.delay)
+        body = json.dumps({"object": "list", "data": [], "slow": slow}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.respond()
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(http.server.ThreadingHTTPServer):
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # Abandoned requests are answered on closed connections.
+        pass
+
+
+@pytest.fixture
+def slow_server():
+    server = Server(("127.0.0.1", 0), SlowFirstHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.slow_requests = 1
+    server.delay = SLOW_SECS
+    # Don't wait for the slow requests that lost to their hedges.
+    server.block_on_close = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def server_url(server) -> str:
+    return "http://127.0.0.1:%d" % server.server_port
+
+
+def test_is_idempotent() -> None:
+    assert is_idempotent("get", "https://api.apacai.com/v1/files/file-1")
+    assert is_idempotent("post", "https://api.apacai.com/v1/embeddings")
+    assert is_idempotent(
+        "post",
+        "https://x.apacai.azure.com/apacai/deployments/d/embeddings?api-version=1",
+    )
+    assert not is_idempotent("post", "https://api.apacai.com/v1/completions")
+    assert not is_idempotent("delete", "https://api.apacai.com/v1/files/file-1")
+
+
+def test_delay_follows_percentile() -> None:
+    policy = HedgingPolicy(percentile=90, min_delay=0.001, min_samples=10)
+    key = policy.key("get", "/files/file-1")
+    assert key == ("get", "/files/{id}")
+    for i in range(9):
+        policy.record(key, i / 100)
+    assert policy.delay(key) is None
+    policy.record(key, 0.5)
+    assert policy.delay(key) == 0.5
+    policy.record(key, 0.01)
+    assert policy.delay(key) == pytest.approx(0.08)
+
+
+def test_budget_limits_hedges() -> None:
+    policy = HedgingPolicy(budget_ratio=0.5, budget_capacity=1)
+    key = policy.key("get", "/models")
+    assert policy.allow_hedge(key)
+    assert not policy.allow_hedge(key)
+    policy.delay(key)
+    policy.delay(key)
+    assert policy.allow_hedge(key)
+    assert not policy.allow_hedge(key)
+
+
+def test_hedges_slow_get(slow_server) -> None:
+    policy = HedgingPolicy(min_samples=0, min_delay=0.05)
+    requestor = APIRequestor(
+        key="test_key", api_base=server_url(slow_server), hedging_policy=policy
+    )
+    start = time.monotonic()
+    resp, _, _ = requestor.request("get", "/files/file-1")
+    assert time.monotonic() - start < SLOW_SECS
+    assert resp.data["slow"] is False
+    assert slow_server.requests == ["/files/file-1"] * 2
+
+
+def test_hedges_embeddings(slow_server) -> None:
+    policy = HedgingPolicy(min_samples=0, min_delay=0.05)
+    requestor = APIRequestor(
+        key="test_key", api_base=server_url(slow_server), hedging_policy=policy
+    )
+    resp, _, _ = requestor.request("post", "/embeddings", {"input": "a"})
+    assert resp.data["slow"] is False
+    assert len(slow_server.requests) == 2
+
+
+def test_no_hedge_without_budget(slow_server) -> None:
+    policy = HedgingPolicy(min_samples=0, min_delay=0.05, budget_capacity=0)
+    requestor = APIRequestor(
+        key="test_key", api_base=server_url(slow_server), hedging_policy=policy
+    )
+    resp, _, _ = requestor.request("get", "/models")
+    assert resp.data["slow"] is True
+    assert slow_server.requests == ["/models"]
+
+
+def test_no_hedge_for_completions(slow_server) -> None:
+    policy = HedgingPolicy(min_samples=0, min_delay=0.05)
+    requestor = APIRequestor(
+        key="test_key", api_base=server_url(slow_server), hedging_policy=policy
+    )
+    resp, _, _ = requestor.request("post", "/completions", {"prompt": "a"})
+    assert resp.data["slow"] is True
+    assert slow_server.requests == ["/completions"]
+
+
+def test_first_attempts_are_not_queued(slow_server) -> None:
+    # More concurrent requests than there are hedging threads.
+    slow_server.slow_requests = 96
+    slow_server.delay = 0.2
+    policy = HedgingPolicy(min_samples=0, min_delay=0.05, budget_capacity=0)
+    requestor = APIRequestor(
+        key="test_key", api_base=server_url(slow_server), hedging_policy=policy
+    )
+    threads = [
+        threading.Thread(target=requestor.request, args=("get", "/models"))
+        for _ in range(96)
+    ]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - start < 0.5
+    assert len(slow_server.requests) == 96
+
+
+def test_records_failed_first_attempts() -> None:
+    policy = HedgingPolicy(min_samples=1)
+    requestor = APIRequestor(
+        key="test_key", api_base="http://127.0.0.1:9", hedging_policy=policy
+    )
+    with pytest.raises(error.APIConnectionError):
+        requestor.request("get", "/models")
+    assert policy.delay(policy.key("get", "/models")) is not None
@@ -0,0 +1,152 @@
+import pytest
+
+from apacai import error
+from apacai.api_requestor import APIRequestor
+from apacai.hooks import HookRegistry, MetricsAggregator, endpoint
+from apacai.retry import RetryPolicy
+
+
+def record_events(registry, events):
+    def recorder(event):
+        return lambda info: events.append((event, info.status, info.attempt))
+
+    for event in (
+        "request_start",
+        "response_headers",
+        "response_complete",
+        "stream_event",
+        "retry",
+        "error",
+    ):
+        registry.register(event, recorder(event))
+
+
+def test_register_validates_events() -> None:
+    registry = HookRegistry()
+
+    @registry.register("error")
+    def on_error(info):
+        pass
+
+    assert registry.has("error")
+    registry.unregister("error", on_error)
+    assert not registry.has("error")
+    with pytest.raises(ValueError):
+        registry.register("sent", on_error)
+
+
+def test_endpoint() -> None:
+    assert endpoint("/files/file-abc123/content?x=1") == "/files/{id}/content"
+    assert endpoint("/engines/text-davinci-003/completions") == (
+        "/engines/{id}/completions"
+    )
+    assert endpoint("/chat/completions") == "/chat/completions"
+
+
+@pytest.mark.requestor
+def test_hooks_see_request_lifecycle(fake_responses) -> None:
+    fake_responses(
+        (429, "application/json", b'{"error": {"message": "slow down"}}'),
+        (200, "application/json", b'{"id": "x"}'),
+        headers={"X-Request-Id": "req-1"},
+    )
+    registry = HookRegistry()
+    events = []
+    record_events(registry, events)
+    completed = []
+    registry.register("response_complete", completed.append)
+
+    requestor = APIRequestor(
+        key="test_key", hooks=registry, retry_policy=RetryPolicy(initial_backoff=0)
+    )
+    requestor.request("post", "/completions", {"model": "ada", "prompt": "hi"})
+    assert events == [
+        ("request_start", None, 0),
+        ("response_headers", 429, 0),
+        ("retry", 429, 0),
+        ("request_start", 429, 1),
+        ("response_headers", 200, 1),
+        ("response_complete", 200, 1),
+    ]
+    info = completed[0]
+    assert (info.method, info.path, info.model) == ("post", "/completions", "ada")
+    assert info.request_id == "req-1"
+    assert info.response_bytes == len(b'{"id": "x"}')
+    assert info.headers_ms <= info.duration_ms
+    assert not info.stream
+
+
+@pytest.mark.requestor
+def test_hooks_see_errors(fake_responses) -> None:
+    fake_responses((400, "application/json", b'{"error": {"message": "bad"}}'))
+    registry = HookRegistry()
+    errors = []
+    registry.register("error", errors.append)
+    with pytest.raises(error.InvalidRequestError):
+        APIRequestor(key="test_key", hooks=registry).request("get", "/models")
+    assert len(errors) == 1
+    assert errors[0].status == 400
+    assert isinstance(errors[0].error, error.InvalidRequestError)
+
+
+@pytest.mark.requestor
+def test_hooks_see_stream_events(fake_responses) -> None:
+    body = b'data: {"id": "a"}\n\ndata: {"id": "b"}\n\ndata: [DONE]\n\n'
+    fake_responses((200, "text/event-stream", body))
+    registry = HookRegistry()
+    events = []
+    record_events(registry, events)
+    completed = []
+    registry.register("response_complete", completed.append)
+
+    resp, _, _ = APIRequestor(key="test_key", hooks=registry).request(
+        "post", "/completions", {"model": "ada"}, stream=True
+    )
+    assert events[-1][0] == "response_headers"
+    assert [r.data["id"] for r in resp] == ["a", "b"]
+    assert [e[0] for e in events[2:]] == [
+        "stream_event",
+        "stream_event",
+        "response_complete",
+    ]
+    info = completed[0]
+    assert info.stream
+    assert info.response_bytes == len(b'{"id": "a"}{"id": "b"}')
+    assert info.timing.total_ms is not None
+
+
+@pytest.mark.requestor
+def test_metrics_aggregator(fake_responses) -> None:
+    fake_responses(
+        (200, "application/json", b"{}"),
+        (200, "application/json", b"{}"),
+        (404, "application/json", b'{"error": {"message": "gone"}}'),
+    )
+    registry = HookRegistry()
+    metrics = MetricsAggregator().attach(registry)
+    requestor = APIRequestor(key="test_key", hooks=registry)
+    for _ in range(2):
+        requestor.request("post", "/embeddings", {"model": "ada"})
+    with pytest.raises(error.InvalidRequestError):
+        requestor.request("get", "/files/file-123")
+
+    assert metrics.requests == {
+        ("/embeddings", "ada", "POST", "200"): 2,
+        ("/files/{id}", "", "GET", "404"): 1,
+    }
+    assert metrics.errors == {("/files/{id}", "", "InvalidRequestError"): 1}
+
+    text = metrics.to_prometheus()
+    assert (
+        'apacai_requests_total{endpoint="/embeddings",model="ada",'
+        'method="POST",status="200"} 2'
+    ) in text
+    assert "# TYPE apacai_request_duration_seconds histogram" in text
+    assert (
+        'apacai_request_duration_seconds_bucket{endpoint="/embeddings",'
+        'model="ada",le="+Inf"} 2'
+    ) in text
+    assert (
+        'apacai_request_duration_seconds_count{endpoint="/embeddings",model="ada"} 2'
+    ) in text
+    assert text.endswith("\n")
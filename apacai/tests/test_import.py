@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+import pytest
+
+import apacai
+
+
+def imported_modules(code: str) -> set:
+    output = subprocess.run(
+        [sys.executable, "-c", code + "\nimport sys; print(' '.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return set(output.split())
+
+
+def test_import_loads_no_transport() -> None:
+    modules = imported_modules("import apacai")
+    assert "apacai" in modules
+    assert not {"aiohttp", "requests", "apacai.api_resources"} & modules
+
+
+def test_resource_access_loads_only_sync_transport() -> None:
+    modules = imported_modules("import apacai; apacai.Completion")
+    assert {"requests", "apacai.api_resources.completion"} <= modules
+    assert "aiohttp" not in modules
+    assert "apacai.api_resources.file" not in modules
+
+
+def test_lazy_attributes() -> None:
+    from apacai import api_requestor, api_resources
+    from apacai.api_resources.completion import Completion
+
+    assert apacai.Completion is api_resources.Completion is Completion
+    assert apacai.aclose_sessions is api_requestor.aclose_sessions
+    assert apacai.util.convert_to_apacai_object
+    assert set(apacai.__all__) <= set(dir(apacai))
+    with pytest.raises(AttributeError):
+        apacai.NotAResource
@@ -0,0 +1,67 @@
+import pytest
+
+from apacai import json_codec
+from apacai.api_requestor import APIRequestor, parse_stream
+from apacai.apacai_object import ApacAIObject
+from apacai import error
+
+
+@pytest.fixture(params=json_codec.BACKENDS)
+def backend(request):
+    saved = json_codec.backend()
+    try:
+        json_codec.set_backend(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} is not installed")
+    yield request.param
+    json_codec.set_backend(saved)
+
+
+def test_round_trip(backend) -> None:
+    obj = {"input": ["héllo", "wörld"], "n": 1, "stream": False, "temp": 0.5}
+    encoded = json_codec.dumps(obj)
+    assert isinstance(encoded, bytes)
+    assert json_codec.loads(encoded) == obj
+    assert json_codec.loads(encoded.decode("utf-8")) == obj
+
+
+def test_dumps_falls_back_for_unsupported_values(backend) -> None:
+    assert json_codec.loads(json_codec.dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+
+
+def test_dumps_apacai_object(backend) -> None:
+    obj = ApacAIObject.construct_from({"role": "user", "content": "hi"})
+    assert json_codec.loads(json_codec.dumps({"messages": [obj]})) == {
+        "messages": [{"role": "user", "content": "hi"}]
+    }
+
+
+def test_loads_raises_value_error(backend) -> None:
+    with pytest.raises(ValueError):
+        json_codec.loads(b"{not json")
+
+
+def test_unknown_backend() -> None:
+    with pytest.raises(ValueError):
+        json_codec.set_backend("simplejson")
+
+
+def test_parse_stream_yields_undecoded_payloads() -> None:
+    chunks = [b"data: {\"a\"", b": 1}\n\n: comment\n", b"data: [DONE]\n\n"]
+    assert list(parse_stream(iter(chunks))) == [b"{\"a\": 1}"]
+
+
+@pytest.mark.requestor
+def test_interpret_response_line_decodes_bytes(backend) -> None:
+    requestor = APIRequestor(key="test_key")
+    headers = {"Content-Type": "application/json"}
+    resp = requestor._interpret_response_line(b'{"id": "x"}', 200, headers, False)
+    assert resp.data == {"id": "x"}
+
+    with pytest.raises(error.APIError, match="HTTP code 200 from API \\(oops\\)"):
+        requestor._interpret_response_line(b"oops", 200, headers, False)
+
+    with pytest.raises(error.InvalidRequestError, match="bad"):
+        requestor._interpret_response_line(
+            b'{"error": {"message": "bad"}}', 400, headers, False
+        )
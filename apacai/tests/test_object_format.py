@@ -0,0 +1,128 @@
+import json
+import pickle
+
+import pytest
+import requests
+from pytest_mock import MockerFixture
+
+import apacai
+from apacai import util
+from apacai.apacai_object import ApacAIObject, LazyApacAIObject
+
+EMBEDDING_RESPONSE = {
+    "object": "list",
+    "data": [
+        {"object": "embedding", "index": 0, "embedding": [0.1, 0.2]},
+        {"object": "embedding", "index": 1, "embedding": [0.3, 0.4]},
+    ],
+    "model": "text-embedding-ada-002",
+    "usage": {"prompt_tokens": 2, "total_tokens": 2},
+}
+
+
+def test_raw_format_returns_decoded_data() -> None:
+    resp = util.convert_to_apacai_object(EMBEDDING_RESPONSE, object_format="raw")
+    assert resp is EMBEDDING_RESPONSE
+
+
+def test_lazy_format_converts_on_access() -> None:
+    data = json.loads(json.dumps(EMBEDDING_RESPONSE))
+    resp = util.convert_to_apacai_object(data, object_format="lazy")
+    assert isinstance(resp, LazyApacAIObject)
+    # Nothing is converted or copied up front.
+    assert type(dict.__getitem__(resp, "usage")) is dict
+    assert dict.__getitem__(resp, "data") is data["data"]
+
+    assert resp.usage.total_tokens == 2
+    assert isinstance(dict.__getitem__(resp, "usage"), LazyApacAIObject)
+    assert resp.usage is resp["usage"]
+    assert [d.embedding for d in resp.data] == [[0.1, 0.2], [0.3, 0.4]]
+    assert resp == EMBEDDING_RESPONSE
+    assert json.loads(str(resp)) == EMBEDDING_RESPONSE
+
+
+def test_lazy_format_keeps_object_classes() -> None:
+    resp = util.convert_to_apacai_object(
+        {"object": "file", "id": "file-1", "purpose": "fine-tune"},
+        object_format="lazy",
+    )
+    assert isinstance(resp, apacai.File)
+    assert isinstance(resp, LazyApacAIObject)
+    assert resp.instance_url() == "/files/file-1"
+
+    restored = pickle.loads(pickle.dumps(resp))
+    assert type(restored) is type(resp)
+    assert restored == resp
+
+
+@pytest.mark.parametrize("object_format", ["lazy", "object"])
+def test_objects_have_no_instance_dict(object_format) -> None:
+    for data in ({"object": "file", "id": "file-1"}, {"a": 1}):
+        obj = util.convert_to_apacai_object(
+            data, api_key="sk-test", object_format=object_format
+        )
+        assert not hasattr(obj, "__dict__")
+        assert obj.api_key == "sk-test"
+        obj.organization = "org-1"
+        assert "organization" not in obj
+        obj.purpose = "search"
+        assert obj["purpose"] == "search"
+
+
+@pytest.mark.parametrize("object_format", ["lazy", "object"])
+def test_objects_keep_private_attributes(object_format) -> None:
+    obj = util.convert_to_apacai_object({"a": 1}, object_format=object_format)
+    obj._foo = 1
+    assert obj._foo == 1
+    assert "_foo" not in obj
+    del obj._foo
+    with pytest.raises(AttributeError):
+        obj._foo
+    with pytest.raises(AttributeError):
+        del obj._bar
+
+
+def test_lazy_format_does_not_keep_previous_values() -> None:
+    obj = util.convert_to_apacai_object({"a": 1}, object_format="lazy")
+    with pytest.raises(AttributeError):
+        obj._previous
+
+
+def test_global_object_format(monkeypatch) -> None:
+    monkeypatch.setattr(apacai, "object_format", "raw")
+    assert util.convert_to_apacai_object({"a": {"b": 1}}) == {"a": {"b": 1}}
+    assert type(util.convert_to_apacai_object({"a": 1})) is dict
+    # Explicit formats win over the global default, including nested values.
+    obj = util.convert_to_apacai_object({"a": {"b": 1}}, object_format="object")
+    assert isinstance(obj.a, ApacAIObject)
+
+
+def test_invalid_object_format() -> None:
+    with pytest.raises(ValueError, match="object_format"):
+        util.convert_to_apacai_object({}, object_format="numpy")
+
+
+@pytest.mark.parametrize("object_format", ["raw", "lazy", "object"])
+def test_create_and_list_accept_object_format(
+    mocker: MockerFixture, object_format
+) -> None:
+    def fake_request(self, *args, **kwargs):
+        r = requests.Response()
+        r.status_code = 200
+        r.headers["content-type"] = "application/json"
+        r._content = json.dumps(EMBEDDING_RESPONSE).encode("utf-8")
+        return r
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+
+    resp = apacai.Embedding.create(
+        input=["a", "b"],
+        model="text-embedding-ada-002",
+        encoding_format="float",
+        object_format=object_format,
+    )
+    assert resp["data"][1]["embedding"] == [0.3, 0.4]
+    assert isinstance(resp, ApacAIObject) == (object_format != "raw")
+
+    listed = apacai.Model.list(object_format=object_format)
+    assert listed == EMBEDDING_RESPONSE
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+import requests
+from pytest_mock import MockerFixture
+
+import apacai
+from apacai.rate_limiting import FileRateLimiter, RateLimiter, estimate_tokens
+
+
+def test_estimate_tokens() -> None:
+    assert estimate_tokens({"prompt": "a" * 40, "max_tokens": 10, "n": 2}) == 30
+    assert estimate_tokens({"input": ["abcd", "abcdefgh"]}) == 3
+    messages = [{"role": "user", "content": "a" * 8}]
+    assert estimate_tokens({"messages": messages}) == 6
+    assert estimate_tokens({}) == 0
+
+
+def test_rate_limiter_paces_requests() -> None:
+    limiter = RateLimiter(requests_per_minute=60)
+    # The bucket starts full, then refills at one request per second.
+    for _ in range(60):
+        assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(1, abs=0.01)
+    assert limiter.reserve() == pytest.approx(2, abs=0.01)
+
+
+def test_rate_limiter_paces_tokens() -> None:
+    limiter = RateLimiter(tokens_per_minute=600)
+    assert limiter.reserve(tokens=600) == 0
+    assert limiter.reserve(tokens=100) == pytest.approx(10, abs=0.01)
+    # Requests without tokens are not held up by the token debt.
+    assert limiter.reserve() == 0
+
+
+def test_file_rate_limiter_shares_state(tmp_path) -> None:
+    path = str(tmp_path / "limits")
+    first = FileRateLimiter(path, requests_per_minute=2)
+    second = FileRateLimiter(path, requests_per_minute=2)
+    assert first.reserve() == 0
+    assert second.reserve() == 0
+    assert first.reserve() == pytest.approx(30, abs=0.1)
+
+
+@pytest.mark.requestor
+def test_create_reserves_estimated_tokens(mocker: MockerFixture) -> None:
+    def fake_request(self, *args, **kwargs):
+        r = requests.Response()
+        r.status_code = 200
+        r.headers["content-type"] = "application/json"
+        r._content = json.dumps({"object": "text_completion"}).encode("utf-8")
+        return r
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+    limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=1000)
+    acquire = mocker.spy(limiter, "acquire")
+    mocker.patch.object(apacai, "rate_limiter", limiter)
+
+    apacai.Completion.create(model="ada", prompt="a" * 40, max_tokens=5)
+    acquire.assert_called_once_with(15)
@@ -0,0 +1,175 @@
+import io
+import json
+
+import pytest
+import requests
+from pytest_mock import MockerFixture
+
+import apacai
+from apacai import error
+from apacai.api_requestor import APIRequestor
+from apacai.retry import RetryBudget, RetryPolicy, retry_after_seconds
+
+
+def _rate_limit_error(headers=None) -> error.RateLimitError:
+    return error.RateLimitError("slow down", headers=headers or {})
+
+
+def test_retry_after_seconds() -> None:
+    assert retry_after_seconds({"retry-after": "3"}) == 3.0
+    assert retry_after_seconds({"retry-after": "1.5"}) == 1.5
+    assert retry_after_seconds({"retry-after-ms": "250"}) == 0.25
+    assert retry_after_seconds({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+    assert retry_after_seconds({"retry-after": "soon"}) is None
+    assert retry_after_seconds({}) is None
+
+
+def test_policy_honors_retry_after() -> None:
+    policy = RetryPolicy(max_retries=3, budget=RetryBudget())
+    exc = _rate_limit_error({"retry-after": "2"})
+    assert policy.next_delay(exc, attempt=0, elapsed=0) == 2.0
+    # A Retry-After longer than the policy allows means giving up.
+    exc = _rate_limit_error({"retry-after": "3600"})
+    assert policy.next_delay(exc, attempt=0, elapsed=0) is None
+
+
+def test_policy_backoff_is_bounded() -> None:
+    policy = RetryPolicy(
+        max_retries=10, initial_backoff=1, max_backoff=4, budget=RetryBudget()
+    )
+    for attempt in range(6):
+        delay = policy.next_delay(_rate_limit_error(), attempt=attempt, elapsed=0)
+        assert 0 <= delay <= min(4, 2 ** attempt)
+
+
+def test_policy_stops_retrying() -> None:
+    policy = RetryPolicy(max_retries=2, timeout=5, budget=RetryBudget())
+    exc = _rate_limit_error()
+    assert policy.next_delay(exc, attempt=2, elapsed=0) is None
+    assert policy.next_delay(exc, attempt=0, elapsed=5) is None
+    invalid = error.InvalidRequestError("bad", "param")
+    assert policy.next_delay(invalid, attempt=0, elapsed=0) is None
+
+
+def test_budget_limits_retries() -> None:
+    budget = RetryBudget(ratio=0.5, min_retries_per_sec=0, capacity=1)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+
+@pytest.mark.requestor
+def test_requestor_retries_rate_limited_requests(mocker: MockerFixture) -> None:
+    statuses = [429, 503, 200]
+    sleeps = []
+
+    def fake_request(self, *args, **kwargs):
+        r = requests.Response()
+        r.status_code = statuses.pop(0)
+        r.headers["content-type"] = "application/json"
+        r.headers["retry-after"] = "1"
+        body = {"error": {"message": "busy"}} if r.status_code != 200 else {}
+        r._content = json.dumps(body).encode("utf-8")
+        return r
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+    mocker.patch("apacai.api_requestor.time.sleep", sleeps.append)
+
+    requestor = APIRequestor(
+        key="test_key", retry_policy=RetryPolicy(max_retries=2, budget=RetryBudget())
+    )
+    response, _, _ = requestor.request("get", "/models")
+    assert response.data == {}
+    assert statuses == []
+    assert sleeps == [1.0, 1.0]
+
+
+@pytest.mark.requestor
+def test_requestor_gives_up_after_max_retries(mocker: MockerFixture) -> None:
+    def fake_request(self, *args, **kwargs):
+        r = requests.Response()
+        r.status_code = 429
+        r.headers["content-type"] = "application/json"
+        r._content = json.dumps({"error": {"message": "busy"}}).encode("utf-8")
+        return r
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+    sleep = mocker.patch("apacai.api_requestor.time.sleep")
+
+    requestor = APIRequestor(
+        key="test_key", retry_policy=RetryPolicy(max_retries=1, budget=RetryBudget())
+    )
+    with pytest.raises(error.RateLimitError):
+        requestor.request("get", "/models")
+    assert sleep.call_count == 1
+
+
+def test_timeout_policy_retries_until_timeout() -> None:
+    policy = RetryPolicy.for_timeout(60)
+    exc = error.TryAgain("warming up")
+    assert policy.next_delay(exc, attempt=100, elapsed=0) is not None
+    assert policy.next_delay(exc, attempt=0, elapsed=60) is None
+
+
+@pytest.mark.requestor
+def test_create_with_timeout_waits_for_model(mocker: MockerFixture) -> None:
+    statuses = [409, 409, 409, 409, 200]
+
+    def fake_request(self, *args, **kwargs):
+        r = requests.Response()
+        r.status_code = statuses.pop(0)
+        r.headers["content-type"] = "application/json"
+        body = {"error": {"message": "warming up"}} if r.status_code != 200 else {}
+        r._content = json.dumps(body).encode("utf-8")
+        return r
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+    mocker.patch("apacai.api_requestor.time.sleep")
+
+    apacai.Completion.create(model="ada", prompt="hi", timeout=30)
+    assert statuses == []
+
+
+def fake_uploads(mocker: MockerFixture, statuses, bodies) -> None:
+    def send(self, request, **kwargs):
+        bodies.append(request.body)
+        r = requests.Response()
+        r.request = request
+        r.status_code = statuses.pop(0)
+        r.headers["content-type"] = "application/json"
+        r.headers["retry-after"] = "0"
+        body = {"error": {"message": "busy"}} if r.status_code != 200 else {}
+        r._content = json.dumps(body).encode("utf-8")
+        return r
+
+    mocker.patch("requests.adapters.HTTPAdapter.send", send)
+
+
+@pytest.mark.requestor
+def test_retried_upload_sends_the_file_again(mocker: MockerFixture) -> None:
+    bodies = []
+    fake_uploads(mocker, [429, 200], bodies)
+    apacai.File.create(file=io.BytesIO(b"file-content"), purpose="fine-tune")
+    assert len(bodies) == 2
+    assert all(b"file-content" in body for body in bodies)
+    assert len(bodies[0]) == len(bodies[1])
+
+
+class Unseekable(io.RawIOBase):
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        return 0
+
+
+@pytest.mark.requestor
+def test_unseekable_upload_is_not_retried(mocker: MockerFixture) -> None:
+    bodies = []
+    fake_uploads(mocker, [429, 200], bodies)
+    with pytest.raises(error.RateLimitError):
+        apacai.File.create(file=Unseekable(), purpose="fine-tune")
+    assert len(bodies) == 1
@@ -0,0 +1,50 @@
+import pytest
+
+from apacai.sse import ServerSentEvent, SSEDecoder, iter_events
+
+BODY = (
+    b": keep-alive\n"
+    b"event: message\n"
+    b"id: 1\n"
+    b"data: first\n"
+    b"data:second\n"
+    b"\n"
+    b"retry: 3000\n"
+    b"data: {\"a\": 1}\n"
+    b"\n"
+)
+
+EXPECTED = [
+    ServerSentEvent(b"first\nsecond", "message", "1"),
+    ServerSentEvent(b"{\"a\": 1}", None, "1"),
+]
+
+
+def test_decodes_fields_and_multiline_data() -> None:
+    decoder = SSEDecoder()
+    assert decoder.feed(BODY) == EXPECTED
+    assert decoder.retry == 3000
+
+
+@pytest.mark.parametrize("newline", [b"\r\n", b"\r"])
+def test_line_endings(newline) -> None:
+    assert list(iter_events([BODY.replace(b"\n", newline)])) == EXPECTED
+
+
+@pytest.mark.parametrize("newline", [b"\n", b"\r\n", b"\r"])
+def test_events_split_across_chunks(newline) -> None:
+    body = BODY.replace(b"\n", newline)
+    chunks = [body[i : i + 1] for i in range(len(body))]
+    assert list(iter_events(chunks)) == EXPECTED
+
+
+def test_blank_lines_without_data_dispatch_nothing() -> None:
+    decoder = SSEDecoder()
+    assert decoder.feed(b"event: ping\n\n\ndata: x\n\n") == [ServerSentEvent(b"x")]
+
+
+def test_flush_returns_unterminated_event() -> None:
+    decoder = SSEDecoder()
+    assert decoder.feed(b"data: a\n\ndata: b") == [ServerSentEvent(b"a")]
+    assert decoder.flush() == [ServerSentEvent(b"b")]
+    assert decoder.flush() == []
@@ -0,0 +1,179 @@
+import http.server
+import io
+import threading
+import time
+
+import pytest
+import requests
+from pytest_mock import MockerFixture
+
+import apacai
+from apacai.api_requestor import APIRequestor
+from apacai.streaming import Stream, StreamAccumulator, StreamTiming
+
+
+def chat_chunk(index, delta, finish_reason=None, **fields):
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion.chunk",
+        "created": 1,
+        "model": "gpt-3.5-turbo",
+        "choices": [{"index": index, "delta": delta, "finish_reason": finish_reason}],
+        **fields,
+    }
+
+
+def test_merges_interleaved_chat_choices() -> None:
+    chunks = [
+        chat_chunk(0, {"role": "assistant"}),
+        chat_chunk(1, {"role": "assistant", "content": "Hi"}),
+        chat_chunk(0, {"content": "Hel"}),
+        chat_chunk(0, {"content": "lo"}, "stop"),
+        chat_chunk(1, {}, "length", usage={"total_tokens": 9}),
+    ]
+    accumulator = StreamAccumulator()
+    assert list(accumulator.consume(chunks)) == [(1, "Hi"), (0, "Hel"), (0, "lo")]
+    assert accumulator.text(0) == "Hello"
+    assert accumulator.finish_reason(1) == "length"
+
+    resp = accumulator.response(object_format="raw")
+    assert resp["object"] == "chat.completion"
+    assert resp["usage"] == {"total_tokens": 9}
+    assert resp["choices"] == [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "Hello"},
+            "finish_reason": "stop",
+        },
+        {
+            "index": 1,
+            "message": {"role": "assistant", "content": "Hi"},
+            "finish_reason": "length",
+        },
+    ]
+    assert accumulator.response().choices[0].message.content == "Hello"
+
+
+def test_merges_function_calls() -> None:
+    accumulator = StreamAccumulator()
+    accumulator.add(chat_chunk(0, {"role": "assistant", "function_call": {"name": "f"}}))
+    accumulator.add(chat_chunk(0, {"function_call": {"arguments": '{"a"'}}))
+    accumulator.add(chat_chunk(0, {"function_call": {"arguments": ": 1}"}}, "function_call"))
+    message = accumulator.response(object_format="raw")["choices"][0]["message"]
+    assert message == {
+        "role": "assistant",
+        "content": None,
+        "function_call": {"name": "f", "arguments": '{"a": 1}'},
+    }
+
+
+def test_merges_completion_logprobs() -> None:
+    def chunk(text, finish_reason=None):
+        return {
+            "object": "text_completion",
+            "choices": [
+                {
+                    "index": 0,
+                    "text": text,
+                    "logprobs": {"tokens": [text], "token_logprobs": [-1.0]},
+                    "finish_reason": finish_reason,
+                }
+            ],
+        }
+
+    accumulator = StreamAccumulator()
+    for _ in accumulator.consume([chunk("a"), chunk("b", "stop")]):
+        pass
+    choice = accumulator.response(object_format="raw")["choices"][0]
+    assert choice["text"] == "ab"
+    assert choice["finish_reason"] == "stop"
+    assert choice["logprobs"]["tokens"] == ["a", "b"]
+    assert choice["logprobs"]["token_logprobs"] == [-1.0, -1.0]
+
+
+@pytest.mark.requestor
+def test_accumulates_raw_stream(mocker: MockerFixture) -> None:
+    events = [
+        chat_chunk(0, {"role": "assistant", "content": "Hel"}),
+        chat_chunk(0, {"content": "lo"}, "stop"),
+    ]
+    body = b"".join(
+        b"data: " + apacai.json_codec.dumps(e) + b"\n\n" for e in events
+    ) + b"data: [DONE]\n\n"
+
+    def fake_request(self, *args, **kwargs):
+        r = requests.Response()
+        r.status_code = 200
+        r.headers["content-type"] = "text/event-stream"
+        r.raw = io.BytesIO(body)
+        return r
+
+    mocker.patch("requests.sessions.Session.request", fake_request)
+    chunks = apacai.ChatCompletion.create(
+        model="gpt-3.5-turbo",
+        messages=[{"role": "user", "content": "Hi"}],
+        stream=True,
+        object_format="raw",
+    )
+    accumulator = StreamAccumulator()
+    assert "".join(text for _, text in accumulator.consume(chunks)) == "Hello"
+    assert accumulator.response()["choices"][0]["finish_reason"] == "stop"
+
+
+class SSEHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for i in range(3):
+            time.sleep(0.01)
+            self.wfile.write(b'data: {"id": "%d"}\n\n' % i)
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def sse_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SSEHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d" % server.server_port
+    server.shutdown()
+    server.server_close()
+
+
+def test_stream_timing(sse_server, monkeypatch) -> None:
+    finished = []
+    monkeypatch.setattr(apacai, "stream_timing_hook", finished.append)
+    requestor = APIRequestor(key="test_key", api_base=sse_server)
+    resp, got_stream, _ = requestor.request("post", "/completions", {}, stream=True)
+    assert got_stream
+    assert isinstance(resp, Stream)
+    assert [r.data["id"] for r in resp] == ["0", "1", "2"]
+
+    timing = resp.timing
+    assert finished == [timing]
+    assert timing.url == "/completions"
+    assert timing.connect_ms is not None
+    assert timing.headers_ms <= timing.first_event_ms <= timing.total_ms
+    assert timing.events == 3
+    assert len(timing.gaps_ms) == 2
+    assert timing.gap_percentile(50) <= timing.gap_percentile(100)
+    assert timing.to_dict()["gap_max_ms"] == max(timing.gaps_ms)
+
+
+def test_stream_timing_finishes_on_close(monkeypatch) -> None:
+    finished = []
+    monkeypatch.setattr(apacai, "stream_timing_hook", finished.append)
+    timing = StreamTiming()
+    stream = Stream(timing.track(iter([b"a", b"b", b"c"])), timing)
+    assert next(stream) == b"a"
+    stream.close()
+    assert finished == [timing]
+    assert timing.events == timing.event_bytes == 1
+    assert timing.first_event_ms is not None
+    assert timing.gap_percentile(50) is None
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+import apacai
+from apacai import tracing
+from apacai.retry import RetryPolicy
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = tracing.InMemorySpanExporter()
+    monkeypatch.setattr(apacai, "tracer", tracing.Tracer(exporter))
+    return exporter
+
+
+def by_name(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+def test_no_spans_without_tracer() -> None:
+    assert apacai.tracer is None
+    assert tracing.span("apacai.request") is tracing.NOOP_SPAN
+    with tracing.span("apacai.request") as span:
+        assert not span.is_recording()
+
+
+@pytest.mark.requestor
+def test_create_spans(fake_responses, exporter) -> None:
+    body = {
+        "object": "text_completion",
+        "model": "ada-001",
+        "choices": [],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 5, "total_tokens": 8},
+    }
+    fake_responses(
+        (429, "application/json", b'{"error": {"message": "slow down"}}'),
+        (200, "application/json", json.dumps(body).encode()),
+    )
+    apacai.Completion.create(
+        model="ada", prompt="hi", retry_policy=RetryPolicy(initial_backoff=0)
+    )
+
+    spans = exporter.get_finished_spans()
+    assert [s.name for s in spans if s.name == "apacai.http"] == ["apacai.http"] * 2
+    spans = by_name(exporter)
+    root = spans["apacai.Completion.create"]
+    assert root.parent is None
+    assert root.attributes == {
+        "gen_ai.request.model": "ada",
+        "gen_ai.response.model": "ada-001",
+        "gen_ai.usage.input_tokens": 3,
+        "gen_ai.usage.output_tokens": 5,
+        "gen_ai.usage.total_tokens": 8,
+    }
+    request = spans["apacai.request"]
+    assert request.parent is root
+    assert request.attributes["http.request.method"] == "POST"
+    assert request.attributes["url.path"] == "/completions"
+    assert request.attributes["http.response.status_code"] == 200
+    assert request.attributes["apacai.retries"] == 1
+    assert [name for name, _ in request.events] == ["retry"]
+    for name in ("apacai.headers", "apacai.serialize", "apacai.http", "apacai.read"):
+        assert spans[name].parent is request
+    assert spans["apacai.convert"].parent is root
+    assert spans["apacai.http"].end_time <= spans["apacai.read"].start_time
+
+
+@pytest.mark.requestor
+def test_stream_span(fake_responses, exporter) -> None:
+    body = b'data: {"choices": []}\n\ndata: {"choices": []}\n\ndata: [DONE]\n\n'
+    fake_responses((200, "text/event-stream", body))
+    stream = apacai.Completion.create(model="ada", prompt="hi", stream=True)
+    assert "apacai.stream" not in by_name(exporter)
+
+    assert len(list(stream)) == 2
+    spans = by_name(exporter)
+    stream_span = spans["apacai.stream"]
+    assert stream_span.parent is spans["apacai.request"]
+    assert stream_span.start_time <= spans["apacai.http"].start_time
+    assert stream_span.attributes["apacai.stream.events"] == 2
+    assert spans["apacai.Completion.create"].attributes["apacai.stream"] is True
+
+
+@pytest.mark.requestor
+def test_error_is_recorded(fake_responses, exporter) -> None:
+    fake_responses((404, "application/json", b'{"error": {"message": "x"}}'))
+    with pytest.raises(apacai.error.InvalidRequestError):
+        apacai.Model.retrieve("ada")
+    spans = by_name(exporter)
+    assert spans["apacai.Model.retrieve"].exceptions
+    assert spans["apacai.request"].exceptions
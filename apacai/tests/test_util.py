@@ -1,4 +1,5 @@
 import json
+import logging
 from tempfile import NamedTemporaryFile
 
 import pytest
@@ -31,6 +32,24 @@ def test_apacai_api_key_path_with_malformed_key(api_key_file) -> None:
         util.default_api_key()
 
 
+def test_apacai_api_key_path_is_cached(api_key_file, monkeypatch) -> None:
+    print("sk-foo", file=api_key_file)
+    api_key_file.flush()
+    assert util.default_api_key() == "sk-foo"
+
+    # Within the reload interval the cached key is used without touching disk.
+    monkeypatch.setattr(util, "API_KEY_PATH_RELOAD_SECS", 3600)
+    api_key_file.seek(0)
+    api_key_file.truncate()
+    print("sk-barbaz", file=api_key_file)
+    api_key_file.flush()
+    assert util.default_api_key() == "sk-foo"
+
+    # Once it elapses, the changed file is read again.
+    monkeypatch.setattr(util, "API_KEY_PATH_RELOAD_SECS", 0)
+    assert util.default_api_key() == "sk-barbaz"
+
+
 def test_key_order_apacai_object_rendering() -> None:
     sample_response = {
         "id": "chatcmpl-7NaPEA6sgX7LnNPyKPbRlsyqLbr5V",
@@ -53,3 +72,30 @@ def test_key_order_apacai_object_rendering() -> None:
     oai_object = util.convert_to_apacai_object(sample_response)
     # The `__str__` method was sorting while dumping to json
     assert list(json.loads(str(oai_object)).keys()) == list(sample_response.keys())
+
+
+def test_log_debug_is_skipped_when_disabled(mocker, monkeypatch) -> None:
+    monkeypatch.setattr(apacai, "log", None)
+    monkeypatch.setattr(util, "APACAI_LOG", None)
+    logfmt = mocker.spy(util, "logfmt")
+    util.log_debug("Request to APACAI API", method="get", path="/models")
+    assert logfmt.call_count == 0
+    assert not util.debug_enabled()
+
+
+def test_log_debug_formats_lazily_for_logger(caplog, monkeypatch) -> None:
+    monkeypatch.setattr(apacai, "log", None)
+    monkeypatch.setattr(util, "APACAI_LOG", None)
+    with caplog.at_level(logging.DEBUG, logger="apacai"):
+        assert util.debug_enabled()
+        util.log_debug("Post details", data="a b", api_version=None)
+    assert caplog.messages == ["api_version=None data='a b' message='Post details'"]
+
+
+def test_log_info_prints_to_console(capsys, monkeypatch) -> None:
+    monkeypatch.setattr(apacai, "log", "info")
+    util.log_info("APACAI API response", response_code=200)
+    util.log_debug("Post details", data=None)
+    assert capsys.readouterr().err == (
+        "message='APACAI API response' response_code=200\n"
+    )
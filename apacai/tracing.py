@@ -0,0 +1,275 @@
+"""
+Tracing of API calls, compatible with OpenTelemetry.
+
+Set `apacai.tracer` to an OpenTelemetry tracer, such as
+`opentelemetry.trace.get_tracer("apacai")`, or to any object with the same
+`start_as_current_span` and `start_span` methods, to record these spans:
+
+- `apacai.<Resource>.<method>` around `create`, `retrieve`, `list` and
+  `File.download` calls, with the model and token usage of the response;
+- `apacai.request` around sending a request and reading its response, with the
+  number of retries, and inside it `apacai.headers`, `apacai.serialize`,
+  `apacai.http` for each attempt, and `apacai.read`;
+- `apacai.stream` for a streamed response, from the start of the request to
+  the end of the stream;
+- `apacai.convert` around converting a response into objects.
+
+Spans opened while another is current become its children. The current span
+is kept in a context variable, so it follows async tasks. When `apacai.tracer`
+is None, which is the default, no span is created.
+
+`Tracer` is a minimal implementation that hands finished spans to an exporter
+such as `InMemorySpanExporter`, for tests and debugging.
+"""
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+import apacai
+
+
+class _NoopSpan:
+    """Stands in for a span, and for the context manager opening it."""
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def add_event(self, name: str, attributes=None) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException, attributes=None) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _attributes(attributes: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # OpenTelemetry rejects None attribute values.
+    if attributes is None:
+        return None
+    return {k: v for k, v in attributes.items() if v is not None}
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Returns a context manager for a span that is current while it runs."""
+    tracer = apacai.tracer
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.start_as_current_span(name, attributes=_attributes(attributes))
+
+
+def start_span(
+    name: str,
+    attributes: Optional[Dict[str, Any]] = None,
+    start_time: Optional[int] = None,
+):
+    """Starts a span without making it current; the caller ends it.
+
+    `start_time` is in nanoseconds since the epoch, and defaults to now.
+    """
+    tracer = apacai.tracer
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.start_span(
+        name, attributes=_attributes(attributes), start_time=start_time
+    )
+
+
+def set_attributes(span, attributes: Dict[str, Any]) -> None:
+    for key, value in attributes.items():
+        if value is not None:
+            span.set_attribute(key, value)
+
+
+def set_response_attributes(span, response) -> None:
+    """Records the model and token usage of a response on a span."""
+    get = getattr(response, "get", None)
+    if get is None:
+        return
+    usage = get("usage")
+    if not isinstance(usage, dict):
+        usage = {}
+    set_attributes(
+        span,
+        {
+            "gen_ai.response.model": get("model"),
+            "gen_ai.usage.input_tokens": usage.get("prompt_tokens"),
+            "gen_ai.usage.output_tokens": usage.get("completion_tokens"),
+            "gen_ai.usage.total_tokens": usage.get("total_tokens"),
+        },
+    )
+
+
+def trace_stream(timing) -> None:
+    """Records a `streaming.StreamTiming` as an `apacai.stream` span."""
+    if apacai.tracer is None:
+        return
+    # The span starts with the request, so that it covers the time to the
+    # first event.
+    elapsed_ns = int((time.monotonic() - timing.start) * 1e9)
+    stream_span = start_span(
+        "apacai.stream", {"url.path": timing.url}, time.time_ns() - elapsed_ns
+    )
+
+    def end(timing) -> None:
+        set_attributes(
+            stream_span,
+            {
+                "apacai.stream.events": timing.events,
+                "apacai.stream.event_bytes": timing.event_bytes,
+                "apacai.stream.first_event_ms": timing.first_event_ms,
+                "apacai.stream.total_ms": timing.total_ms,
+            },
+        )
+        stream_span.end()
+
+    timing.on_finish(end)
+
+
+def traced(operation: str):
+    """Wraps a resource method in an `apacai.<Resource>.<operation>` span."""
+
+    def decorator(func: Callable) -> Callable:
+        def open_span(resource, kwargs):
+            cls = resource if isinstance(resource, type) else type(resource)
+            return span(
+                "apacai.%s.%s" % (cls.__name__, operation),
+                {
+                    "gen_ai.request.model": kwargs.get("model")
+                    or kwargs.get("engine")
+                    or kwargs.get("deployment_id"),
+                    "apacai.stream": kwargs.get("stream"),
+                },
+            )
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(resource, *args, **kwargs):
+                if apacai.tracer is None:
+                    return await func(resource, *args, **kwargs)
+                with open_span(resource, kwargs) as s:
+                    result = await func(resource, *args, **kwargs)
+                    set_response_attributes(s, result)
+                    return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(resource, *args, **kwargs):
+            if apacai.tracer is None:
+                return func(resource, *args, **kwargs)
+            with open_span(resource, kwargs) as s:
+                result = func(resource, *args, **kwargs)
+                set_response_attributes(s, result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+class Span:
+    """A span recorded by `Tracer`. Times are `time.time_ns()` values."""
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional["Span"],
+        attributes: Optional[Dict[str, Any]],
+        exporter,
+        start_time: Optional[int] = None,
+    ):
+        self.name = name
+        self.parent = parent
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[tuple] = []
+        self.exceptions: List[BaseException] = []
+        self.start_time = time.time_ns() if start_time is None else start_time
+        self.end_time: Optional[int] = None
+        self._exporter = exporter
+
+    def is_recording(self) -> bool:
+        return self.end_time is None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, attributes=None) -> None:
+        self.events.append((name, dict(attributes or {})))
+
+    def record_exception(self, exception: BaseException, attributes=None) -> None:
+        self.exceptions.append(exception)
+
+    def end(self) -> None:
+        if self.end_time is None:
+            self.end_time = time.time_ns()
+            self._exporter.export(self)
+
+    def __repr__(self) -> str:
+        return "<Span %s %r>" % (self.name, self.attributes)
+
+
+# The span of `Tracer` that is current in this context.
+_current_span: ContextVar[Optional[Span]] = ContextVar(
+    "apacai-current-span", default=None
+)
+
+
+class _CurrentSpan:
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.span.record_exception(exc)
+        self.span.end()
+
+
+class InMemorySpanExporter:
+    """Keeps finished spans in a list, in the order they ended."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def get_finished_spans(self) -> List[Span]:
+        return list(self.spans)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class Tracer:
+    """A minimal tracer with the methods of an OpenTelemetry tracer used here."""
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter if exporter is not None else InMemorySpanExporter()
+
+    def start_span(self, name: str, attributes=None, start_time=None) -> Span:
+        return Span(name, _current_span.get(), attributes, self.exporter, start_time)
+
+    def start_as_current_span(self, name: str, attributes=None) -> _CurrentSpan:
+        return _CurrentSpan(self.start_span(name, attributes))
@@ -2,8 +2,9 @@ import logging
 import os
 import re
 import sys
+import time
 from enum import Enum
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import apacai
 
@@ -11,7 +12,15 @@ APACAI_LOG = os.environ.get("APACAI_LOG")
 
 logger = logging.getLogger("apacai")
 
+# Minimum number of seconds between checks of `apacai.api_key_path` for changes.
+API_KEY_PATH_RELOAD_SECS = 1.0
+
+# Maps a key file path to its (mtime_ns, size) stamp, key and last check time.
+_api_key_path_cache: Dict[str, Tuple[Tuple[int, int], str, float]] = {}
+
 __all__ = [
+    "debug_enabled",
+    "info_enabled",
     "log_info",
     "log_debug",
     "log_warn",
@@ -53,24 +62,57 @@ def _console_log_level():
         return None
 
 
-def log_debug(message, **params):
-    msg = logfmt(dict(message=message, **params))
-    if _console_log_level() == "debug":
+def debug_enabled() -> bool:
+    """Whether `log_debug` output goes anywhere.
+
+    Check this before building expensive log parameters on hot paths.
+    """
+    return _console_log_level() == "debug" or logger.isEnabledFor(logging.DEBUG)
+
+
+def info_enabled() -> bool:
+    """Whether `log_info` output goes anywhere."""
+    return _console_log_level() is not None or logger.isEnabledFor(logging.INFO)
+
+
+class _LazyLogfmt:
+    # Defers logfmt formatting until a logging handler actually emits the record.
+    __slots__ = ("props",)
+
+    def __init__(self, props):
+        self.props = props
+
+    def __str__(self):
+        return logfmt(self.props)
+
+
+def _log(level, console, message, params):
+    props = dict(message=message, **params)
+    if console:
+        msg = logfmt(props)
         print(msg, file=sys.stderr)
-    logger.debug(msg)
+        logger.log(level, msg)
+    else:
+        logger.log(level, "%s", _LazyLogfmt(props))
+
+
+def log_debug(message, **params):
+    console = _console_log_level() == "debug"
+    if console or logger.isEnabledFor(logging.DEBUG):
+        _log(logging.DEBUG, console, message, params)
 
 
 def log_info(message, **params):
-    msg = logfmt(dict(message=message, **params))
-    if _console_log_level() in ["debug", "info"]:
-        print(msg, file=sys.stderr)
-    logger.info(msg)
+    console = _console_log_level() is not None
+    if console or logger.isEnabledFor(logging.INFO):
+        _log(logging.INFO, console, message, params)
 
 
 def log_warn(message, **params):
-    msg = logfmt(dict(message=message, **params))
-    print(msg, file=sys.stderr)
-    logger.warn(msg)
+    _log(logging.WARNING, True, message, params)
+
+
+_WHITESPACE_RE = re.compile(r"\s")
 
 
 def logfmt(props):
@@ -81,10 +123,10 @@ def logfmt(props):
         # Check if val is already a string to avoid re-encoding into ascii.
         if not isinstance(val, str):
             val = str(val)
-        if re.search(r"\s", val):
+        if _WHITESPACE_RE.search(val):
             val = repr(val)
         # key should already be a string
-        if re.search(r"\s", key):
+        if _WHITESPACE_RE.search(key):
             key = repr(key)
         return "{key}={val}".format(key=key, val=val)
 
@@ -98,6 +140,13 @@ def get_object_classes():
     return OBJECT_CLASSES
 
 
+# How API responses are returned:
+#   "object": ApacAIObjects, converted eagerly (the default).
+#   "lazy": LazyApacAIObjects, which convert nested values on first access.
+#   "raw": the decoded JSON as plain dicts and lists.
+OBJECT_FORMATS = ("object", "lazy", "raw")
+
+
 def convert_to_apacai_object(
     resp,
     api_key=None,
@@ -105,6 +154,7 @@ def convert_to_apacai_object(
     organization=None,
     engine=None,
     plain_old_data=False,
+    object_format: Optional[str] = None,
 ):
     # If we get a ApacAIResponse, we'll want to return a ApacAIObject.
 
@@ -114,19 +164,31 @@ def convert_to_apacai_object(
         response_ms = resp.response_ms
         resp = resp.data
 
-    if plain_old_data:
+    if object_format is None:
+        object_format = apacai.object_format
+    if object_format not in OBJECT_FORMATS:
+        raise ValueError(
+            "'object_format' must be one of %s, got %r"
+            % (", ".join(OBJECT_FORMATS), object_format)
+        )
+
+    if plain_old_data or object_format == "raw":
         return resp
     elif isinstance(resp, list):
         return [
             convert_to_apacai_object(
-                i, api_key, api_version, organization, engine=engine
+                i,
+                api_key,
+                api_version,
+                organization,
+                engine=engine,
+                object_format=object_format,
             )
             for i in resp
         ]
     elif isinstance(resp, dict) and not isinstance(
         resp, apacai.apacai_object.ApacAIObject
     ):
-        resp = resp.copy()
         klass_name = resp.get("object")
         if isinstance(klass_name, str):
             klass = get_object_classes().get(
@@ -134,6 +196,11 @@ def convert_to_apacai_object(
             )
         else:
             klass = apacai.apacai_object.ApacAIObject
+        if object_format == "lazy":
+            # Lazy objects wrap the decoded dict without copying it.
+            klass = apacai.apacai_object.lazy_class(klass)
+        else:
+            resp = resp.copy()
 
         return klass.construct_from(
             resp,
@@ -173,13 +240,29 @@ def merge_dicts(x, y):
     return z
 
 
+def _read_api_key_path(path: str) -> str:
+    now = time.monotonic()
+    cached = _api_key_path_cache.get(path)
+    if cached is not None and now - cached[2] < API_KEY_PATH_RELOAD_SECS:
+        return cached[1]
+
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    if cached is not None and cached[0] == stamp:
+        _api_key_path_cache[path] = (stamp, cached[1], now)
+        return cached[1]
+
+    with open(path, "rt") as k:
+        api_key = k.read().strip()
+        if not api_key.startswith("sk-"):
+            raise ValueError(f"Malformed API key in {path}.")
+    _api_key_path_cache[path] = (stamp, api_key, now)
+    return api_key
+
+
 def default_api_key() -> str:
     if apacai.api_key_path:
-        with open(apacai.api_key_path, "rt") as k:
-            api_key = k.read().strip()
-            if not api_key.startswith("sk-"):
-                raise ValueError(f"Malformed API key in {apacai.api_key_path}.")
-            return api_key
+        return _read_api_key_path(apacai.api_key_path)
     elif apacai.api_key is not None:
         return apacai.api_key
     else:
@@ -0,0 +1,135 @@
+"""
+Compares the cost of turning decoded API responses into response objects.
+
+For each response shape and `object_format`, prints the time to build the
+response object, the time to build it and read every nested value, and the
+memory allocated while building it.
+
+    python benchmarks/object_formats.py [--repeat N]
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from apacai import util
+
+FORMATS = ("object", "lazy", "raw")
+
+
+def chat_response():
+    return {
+        "id": "chatcmpl-123",
+        "object": "chat.completion",
+        "created": 1677652288,
+        "model": "gpt-3.5-turbo",
+        "choices": [
+            {
+                "index": i,
+                "message": {"role": "assistant", "content": "Hello there! " * 20},
+                "finish_reason": "stop",
+            }
+            for i in range(4)
+        ],
+        "usage": {"prompt_tokens": 9, "completion_tokens": 12, "total_tokens": 21},
+    }
+
+
+def embedding_response(n=256, dim=1536):
+    return {
+        "object": "list",
+        "data": [
+            {
+                "object": "embedding",
+                "index": i,
+                "embedding": [random.random() for _ in range(dim)],
+            }
+            for i in range(n)
+        ],
+        "model": "text-embedding-ada-002",
+        "usage": {"prompt_tokens": n, "total_tokens": n},
+    }
+
+
+def list_response(n=500):
+    return {
+        "object": "list",
+        "data": [
+            {
+                "id": "model-%d" % i,
+                "object": "model",
+                "created": 1677610602,
+                "owned_by": "apacai",
+                "permission": [{"id": "perm-%d" % i, "allow_sampling": True}],
+            }
+            for i in range(n)
+        ],
+    }
+
+
+def touch(obj):
+    if isinstance(obj, dict):
+        for v in obj.values():
+            touch(v)
+    elif isinstance(obj, list) and obj and isinstance(obj[0], dict):
+        for v in obj:
+            touch(v)
+
+
+def bench(payload, object_format, repeat):
+    build = build_and_touch = float("inf")
+    for _ in range(repeat):
+        data = json.loads(payload)
+        start = time.perf_counter()
+        util.convert_to_apacai_object(data, object_format=object_format)
+        build = min(build, time.perf_counter() - start)
+
+        data = json.loads(payload)
+        start = time.perf_counter()
+        touch(util.convert_to_apacai_object(data, object_format=object_format))
+        build_and_touch = min(build_and_touch, time.perf_counter() - start)
+
+    data = json.loads(payload)
+    tracemalloc.start()
+    obj = util.convert_to_apacai_object(data, object_format=object_format)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return build, build_and_touch, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    responses = {
+        "chat": chat_response(),
+        "embedding": embedding_response(),
+        "list": list_response(),
+    }
+    print(
+        "%-10s %-7s %12s %16s %14s"
+        % ("response", "format", "build (ms)", "build+read (ms)", "alloc (KiB)")
+    )
+    for name, response in responses.items():
+        payload = json.dumps(response)
+        for object_format in FORMATS:
+            build, build_and_touch, allocated = bench(
+                payload, object_format, args.repeat
+            )
+            print(
+                "%-10s %-7s %12.3f %16.3f %14.1f"
+                % (
+                    name,
+                    object_format,
+                    build * 1000,
+                    build_and_touch * 1000,
+                    allocated / 1024,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
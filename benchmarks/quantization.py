@@ -0,0 +1,110 @@
+"""
+Compares quantized embeddings with float32 for nearest neighbor search.
+
+For each representation, prints its size, the time to find the `k` nearest
+neighbors of a batch of queries, and recall@k against exact float32 search.
+The embeddings are synthetic, clustered unit vectors; pass `--embeddings` with
+a .npy file of real embeddings for representative numbers.
+
+    python benchmarks/quantization.py [--n N] [--dim D] [--k K] [--embeddings FILE]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from apacai.embeddings_quantization import quantize
+from apacai.embeddings_utils import nearest_neighbors_from_embeddings
+
+
+def synthetic_embeddings(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 100), dim))
+    vectors = centers[rng.integers(len(centers), size=n)]
+    vectors += 0.5 * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype("float32")
+
+
+def recall(found, expected):
+    k = expected.shape[1]
+    return np.mean([len(set(f) & set(e)) / k for f, e in zip(found, expected)])
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--embeddings", help="a .npy file of embeddings to use")
+    args = parser.parse_args()
+
+    if args.embeddings:
+        vectors = np.load(args.embeddings).astype("float32")
+    else:
+        vectors = synthetic_embeddings(args.n, args.dim)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype("float32")
+    k = args.k
+
+    (expected, _), exact_time = timed(
+        lambda: nearest_neighbors_from_embeddings(queries, vectors, k)
+    )
+    float16 = quantize(vectors, "float16")
+    int8 = quantize(vectors, "int8")
+    binary = quantize(vectors, "binary")
+    # (name, bytes held in memory, search)
+    runs = [
+        (
+            "float16",
+            float16.nbytes,
+            lambda: nearest_neighbors_from_embeddings(queries, float16, k),
+        ),
+        (
+            "int8",
+            int8.nbytes,
+            lambda: nearest_neighbors_from_embeddings(queries, int8, k),
+        ),
+        ("binary", binary.nbytes, lambda: binary.search(queries, k, candidates=k)),
+        (
+            "binary, int8 rescore",
+            binary.nbytes + int8.nbytes,
+            lambda: binary.search(queries, k, rescore_embeddings=int8),
+        ),
+        (
+            # The float32 vectors would be memory-mapped from disk.
+            "binary, float32 rescore",
+            binary.nbytes,
+            lambda: binary.search(queries, k, rescore_embeddings=vectors),
+        ),
+    ]
+
+    row = "%-24s %12s %10s %16s %10s"
+    print(row % ("representation", "size (MiB)", "ratio", "ms/query", "recall@%d" % k))
+    results = [("float32", vectors.nbytes, expected, exact_time)]
+    for name, size, search in runs:
+        (found, _), elapsed = timed(search)
+        results.append((name, size, found, elapsed))
+    for name, size, found, elapsed in results:
+        print(
+            "%-24s %12.1f %9.1fx %16.2f %10.3f"
+            % (
+                name,
+                size / 2 ** 20,
+                vectors.nbytes / size,
+                elapsed * 1000 / len(queries),
+                recall(found, expected),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
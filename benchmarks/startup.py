@@ -0,0 +1,104 @@
+"""
+Measures the cold start cost of the library.
+
+Each scenario runs in a fresh interpreter. Prints the median time spent in the
+scenario itself, the median wall time of the whole process, and the peak RSS
+of the process. `Completion.create` is answered by a stubbed transport, so no
+network access or API key is needed.
+
+    python benchmarks/startup.py [--repeat N]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Run in the child before the timer starts; reports the scenario's cost.
+PRELUDE = """
+import json, resource, sys, time
+start = time.perf_counter()
+"""
+
+REPORT = """
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform != "darwin":
+    rss *= 1024
+sys.__stdout__.write(json.dumps({"elapsed": elapsed, "rss": rss}) + "\\n")
+"""
+
+SCENARIOS = {
+    "python": "pass",
+    "import apacai": "import apacai",
+    "Completion.create": """
+from unittest import mock
+
+import requests
+
+import apacai
+
+def request(self, method, url, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["content-type"] = "application/json"
+    response._content = b'{"object": "text_completion", "choices": []}'
+    return response
+
+apacai.api_key = "sk-benchmark"
+with mock.patch("requests.sessions.Session.request", request):
+    apacai.Completion.create(model="text-davinci-003", prompt="Hello")
+""",
+    "cli --help": """
+import contextlib, io
+
+from apacai import _apacai_scripts
+
+sys.argv = ["apacai", "--help"]
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        _apacai_scripts.main()
+    except SystemExit:
+        pass
+""",
+}
+
+
+def run(code):
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", PRELUDE + code + REPORT],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    wall = time.perf_counter() - start
+    result = json.loads(output.splitlines()[-1])
+    return result["elapsed"], wall, result["rss"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(
+        "%-18s %14s %14s %14s"
+        % ("scenario", "scenario (ms)", "process (ms)", "peak RSS (MiB)")
+    )
+    for name, code in SCENARIOS.items():
+        results = [run(code) for _ in range(args.repeat)]
+        print(
+            "%-18s %14.1f %14.1f %14.1f"
+            % (
+                name,
+                statistics.median(r[0] for r in results) * 1000,
+                statistics.median(r[1] for r in results) * 1000,
+                max(r[2] for r in results) / 2 ** 20,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Measures how fast streamed responses are decoded, in events per second.
+
+A large streamed chat completion is read from memory, through a
+`requests.Response` as the sync transport sees it, either line by line with
+`iter_lines` as earlier versions did, or with the incremental SSE decoder that
+`APIRequestor` uses now. Both paths decode the JSON of every event. Reads from
+the body return at most `--chunk-size` bytes, like reads from a socket.
+
+    python benchmarks/streaming.py [--events N] [--chunk-size N] [--repeat N]
+"""
+import argparse
+import io
+import json
+import time
+
+import requests
+
+from apacai.api_requestor import APIRequestor, parse_stream_helper
+
+
+def chunk_event(i):
+    return {
+        "id": "chatcmpl-123",
+        "object": "chat.completion.chunk",
+        "created": 1677652288,
+        "model": "gpt-3.5-turbo",
+        "choices": [
+            {"index": 0, "delta": {"content": " token%d" % i}, "finish_reason": None}
+        ],
+    }
+
+
+def stream_body(n):
+    events = [b"data: " + json.dumps(chunk_event(i)).encode() for i in range(n)]
+    events.append(b"data: [DONE]")
+    return b"\n\n".join(events) + b"\n\n"
+
+
+class Body(io.BytesIO):
+    def __init__(self, body, chunk_size):
+        super().__init__(body)
+        self.chunk_size = chunk_size
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.chunk_size
+        return super().read(min(size, self.chunk_size))
+
+
+def response(body, chunk_size):
+    r = requests.Response()
+    r.status_code = 200
+    r.headers["content-type"] = "text/event-stream"
+    r.raw = Body(body, chunk_size)
+    return r
+
+
+def parse_lines(lines):
+    for line in lines:
+        data = parse_stream_helper(line)
+        if data is not None:
+            yield data
+
+
+def read_lines(requestor, body, chunk_size):
+    # The line-based path used before the SSE decoder.
+    r = response(body, chunk_size)
+    resp = (
+        requestor._interpret_response_line(data, r.status_code, r.headers, True)
+        for data in parse_lines(r.iter_lines())
+    )
+    return sum(1 for _ in resp)
+
+
+def read_events(requestor, body, chunk_size):
+    resp, _ = requestor._interpret_response(response(body, chunk_size), stream=True)
+    return sum(1 for _ in resp)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    requestor = APIRequestor(key="sk-benchmark")
+    body = stream_body(args.events)
+    paths = {"lines": read_lines, "sse": read_events}
+    best = dict.fromkeys(paths, float("inf"))
+    # Alternate between the paths so that both see the same machine noise.
+    for _ in range(args.repeat):
+        for name, read in paths.items():
+            start = time.perf_counter()
+            count = read(requestor, body, args.chunk_size)
+            best[name] = min(best[name], time.perf_counter() - start)
+            assert count == args.events
+
+    print("%-8s %14s" % ("path", "events/s"))
+    for name, elapsed in best.items():
+        print("%-8s %14.0f" % (name, args.events / elapsed))
+
+if __name__ == "__main__":
+    main()